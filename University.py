@@ -1,28 +1,149 @@
+import os
+from collections import deque
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import statsmodels
+
+import instrumentation
+from backends import PandasBackend, SQLBackend
+from data import NUMERIC_COLUMNS, file_signature, load_students, resolve_data_path
+from filters import normalize_selection
+from ranking import RANKED_COLUMNS
+from results import ResultCache
+from store import StudentStore, poll_inbox
+from viewer import render_table
 
 st.set_page_config(layout="wide", page_title="📊 University Dashboard")
 
-df = pd.read_csv("Students_Grading_Cleaned.csv")
+# Spans and counters are collected on every rerun; DASHBOARD_DEBUG=1 shows the last DEBUG_RERUNS.
+DEBUG = os.environ.get("DASHBOARD_DEBUG", "0") != "0"
+DEBUG_RERUNS = 10
+
+st.session_state.setdefault("traces", deque(maxlen=DEBUG_RERUNS))
+st.session_state.setdefault("rerun", 0)
+st.session_state.rerun += 1
+trace = instrumentation.start(f"#{st.session_state.rerun}")
+
+DATA_PATH = resolve_data_path("Students_Grading_Cleaned.csv")
+
+# Deferred mode renders only the selected tab; set DASHBOARD_DEFERRED_TABS=0 for classic tabs.
+DEFERRED_TABS = os.environ.get("DASHBOARD_DEFERRED_TABS", "1") != "0"
+
+# Worker processes used to build the cube after a data refresh; 1 builds it in-process.
+PARALLEL_WORKERS = int(os.environ.get("DASHBOARD_WORKERS", "1"))
+
+# Where filters and aggregations run: "pandas" (in memory), "duckdb" or "sqlite" (embedded database).
+BACKEND = os.environ.get("DASHBOARD_BACKEND", "pandas")
+
+# CSV files of new or corrected rows dropped here are upserted by student_id on the next rerun.
+INBOX_PATH = os.environ.get("DASHBOARD_INBOX", "inbox")
+
+# Summaries and figures are shared by every session through one process-wide cache, bounded
+# by DASHBOARD_CACHE_MB and DASHBOARD_CACHE_TTL seconds; DASHBOARD_CACHE_DIR keeps it across restarts.
+CACHE_MB = int(os.environ.get("DASHBOARD_CACHE_MB", "256"))
+CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", "600"))
+CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR")
+
+# Student lookup lists at most this many matches for a name prefix.
+LOOKUP_LIMIT = 20
+
+# A directory written by partitions.py: the sidebar then picks terms and only their partitions are
+# loaded. The SQL backends keep reading DATA_PATH.
+PARTITIONS = os.environ.get("DASHBOARD_PARTITIONS") if BACKEND == "pandas" else None
+
+# Term combinations whose loaded store is kept in memory at once.
+TERM_BACKENDS = 4
 
 st.sidebar.image("Logo.png")
 
 
-gender = st.sidebar.selectbox("Gender", df["gender"].unique())
-department = st.sidebar.multiselect("Department", df["department"].unique())
-age_group = st.sidebar.multiselect("Age Group", df["age_group"].unique())
+# One entry: a changed source file replaces the backend instead of keeping the old table loaded.
+@st.cache_resource(max_entries=1)
+def get_backend(signature):
+    if BACKEND != "pandas":
+        return SQLBackend(DATA_PATH, engine=BACKEND)
+    cube, moments = None, None
+    if PARALLEL_WORKERS > 1:
+        from parallel import aggregate
+
+        cube, moments = aggregate(DATA_PATH, PARALLEL_WORKERS)
+    return PandasBackend(StudentStore(load_students(DATA_PATH), cube, moments))
+
+
+@st.cache_resource
+def get_manifest(signature):
+    from partitions import Manifest
+
+    return Manifest(PARTITIONS)
+
+
+@st.cache_resource(max_entries=TERM_BACKENDS)
+def get_term_backend(signature, terms):
+    return PandasBackend(StudentStore(manifest.read(list(terms))))
+
+
+@st.cache_resource
+def get_results():
+    return ResultCache(CACHE_MB * 2**20, CACHE_TTL, CACHE_DIR)
+
+
+if PARTITIONS:
+    from partitions import MANIFEST
+
+    manifest = get_manifest(file_signature(os.path.join(PARTITIONS, MANIFEST)))
+    # No term selected means every term, like the other filters; the latest is preselected.
+    terms = tuple(st.sidebar.multiselect("Term", manifest.terms, default=manifest.terms[-1:]))
+    signature = (file_signature(manifest.path), terms)
+    with instrumentation.span("load"):
+        backend = get_term_backend(*signature)
+else:
+    signature = file_signature(DATA_PATH)
+    with instrumentation.span("load"):
+        backend = get_backend(signature)
+    # Partitioned history is appended a term at a time with partitions.py, not through the inbox.
+    with instrumentation.span("inbox"):
+        poll_inbox(backend, DATA_PATH, INBOX_PATH)
+results = get_results()
+
+gender = st.sidebar.selectbox("Gender", backend.values("gender"))
+department = st.sidebar.multiselect("Department", backend.values("department"))
+age_group = st.sidebar.multiselect("Age Group", backend.values("age_group"))
+
+selection = {"gender": gender, "department": department, "age_group": age_group}
+result_key = ((signature, backend.version), normalize_selection(selection))
 
-filtered_df = df[df["gender"] == gender]
-if department:
-    filtered_df = filtered_df[filtered_df["department"].isin(department)]
-if age_group:
-    filtered_df = filtered_df[filtered_df["age_group"].isin(age_group)]
 
-numerical = filtered_df.describe()
-categorical = filtered_df.describe(include="O")
+def span_name(chart_id):
+    return chart_id if isinstance(chart_id, str) else chart_id[0]
+
+
+def cached(chart_id, compute):
+    def timed():
+        with instrumentation.span(f"compute {span_name(chart_id)}"):
+            return compute()
+
+    return results.get((*result_key, chart_id), timed)
+
+
+def cached_figure(chart_id, build):
+    # Figures are cached as the plain dicts the chart helpers return, so a hit is used as-is.
+    with instrumentation.span(f"figure {span_name(chart_id)}"):
+        return cached(chart_id, build)
+
+
+def plotly_chart(fig, **kwargs):
+    from charts import PreparedFigure
+
+    with instrumentation.span(f"plotly_chart {fig['layout']['title']['text']}"):
+        if DEBUG:
+            # Streamlit serializes the figure itself; measuring its size costs a second pass.
+            import plotly.io as pio
+
+            instrumentation.count("bytes_sent", len(pio.to_json(fig, validate=False)))
+        st.plotly_chart(PreparedFigure(fig), **kwargs)
+
+
+with instrumentation.span("summary"):
+    summary = cached("summary", lambda: backend.summary(selection))
 
 st.markdown(
     """
@@ -75,37 +196,7 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-tab1, tab2 , tab3 , tab4 = st.tabs([
-    "📊 DataFrame & Basic Stats",
-    "🏛️ Department Overview" ,
-    "🏆 Performance Insights" ,
-    "🧮 Score Correlation"
-])
-
-with tab1:
-    total_students = len(filtered_df)
-    st.markdown(f'<div class="custom-title">🎓 Total Students: {total_students}</div>', unsafe_allow_html=True)
-
-    st.markdown('<h2 class="custom-title">📋 DataFrame</h2>', unsafe_allow_html=True)
-    st.dataframe(filtered_df)
-
-    st.markdown('<h2 class="custom-title">📊 Numerical Statistics</h2>', unsafe_allow_html=True)
-    st.dataframe(numerical)
-
-    st.markdown('<h2 class="custom-title">🗂️ Categorical Statistics</h2>', unsafe_allow_html=True)
-    st.dataframe(categorical)
-
-with tab2:
-    averages = {
-        "📅 Attendance": filtered_df["attendance"].mean(),
-        "📝 Midterm": filtered_df["midterm_score"].mean(),
-        "📚 Quizzes": filtered_df["quizzes_avg"].mean(),
-        "💻 Project": filtered_df["projects_score"].mean(),
-        "🙋 Participation": filtered_df["participation_score"].mean(),
-        "🎯 Final Exam": filtered_df["final_score"].mean(),
-        "🏁 Total Score": filtered_df["total_score"].mean()
-    }
-
+def render_averages(averages):
     st.markdown("<h2 class='custom-title'>📊 Averages Summary</h2>", unsafe_allow_html=True)
 
     colors = [
@@ -164,576 +255,433 @@ with tab2:
         </div>
     """, unsafe_allow_html=True)
 
-    department_counts = filtered_df["department"].value_counts().reset_index()
-    department_counts.columns = ["Department", "Count"]
-
-    colors_map = {
-        "CS": "#00008B",
-        "Engineering": "#4B0082",
-        "Business": "#8000B0",
-        "Mathematics": "#C71585"
-    }
-
-    bar_colors = [colors_map.get(dept, "#00008B") for dept in department_counts["Department"]]
-
-    fig = go.Figure()
-
-    for i in range(len(department_counts)):
-        fig.add_trace(go.Bar(
-            x=[department_counts["Department"][i]],
-            y=[department_counts["Count"][i]],
-            name=department_counts["Department"][i],
-            text=[department_counts["Count"][i]],
-            textposition='inside',
-            textfont=dict(size=16, family="Arial", color="white", weight="bold"),
-            marker=dict(color=bar_colors[i]),
-            width=0.7
-        ))
-
-    fig.update_layout(
-        title={
-            "text": "Number of Students in each Department",
-            "x": 0.5,
-            "y": 0.9,
-            "xanchor": "center",
-            "yanchor": "top",
-        },
-        title_font=dict(size=24, family="Arial", color="black"),
-        yaxis=dict(showticklabels=False, title=None, showgrid=False),
-        xaxis=dict(
-            tickfont=dict(size=14, family="Arial", color="black", weight="bold"),
-            showgrid=False,
-            tickangle=0
-        ),
-        plot_bgcolor="white",
-        showlegend=True,
-        legend_title=dict(text="Department"),
-        legend=dict(font=dict(size=14, family="Arial", color="black", weight="bold")),
-        width=900,
-        height=500,
-        margin=dict(l=50, r=50, t=100, b=50),
-        bargap=0.15
-    )
 
-    for i, dept in enumerate(department_counts["Department"]):
-        fig.add_shape(
-            type="line",
-            x0=i-0.35,
-            x1=i+0.35,
-            y0=0,
-            y1=0,
-            line=dict(color="gray", width=1)
-        )
 
-    st.plotly_chart(fig, use_container_width=True)
-
-    grade_counts = filtered_df['grade'].value_counts().reset_index()
-    grade_counts.columns = ["Grade", "Count"]
-
-    colors_map = {
-        "A": "#00008B",
-        "B": "#4B0082",
-        "C": "#8000B0",
-        "D": "#C71585"
-    }
-
-    pie_colors = [colors_map.get(grade, "#00008B") for grade in grade_counts["Grade"]]
-
-    fig2 = px.pie(grade_counts, names="Grade", values="Count", title="Grade Distribution",
-                  hole=0.5, color="Grade", labels={"Grade": "Grade", "Count": "Number of Students"})
-
-    fig2.update_traces(marker=dict(colors=pie_colors))
-
-    fig2.update_layout(
-        title={
-            "text": "Grade Distribution",
-            "x": 0.5,
-            "xanchor": "center",
-            "yanchor": "top"
-        },
-        title_font=dict(size=24, family="Arial", color="black"),
-        legend=dict(
-            font=dict(size=17, family="Arial", color="black", weight="bold")
-        ),
-        annotations=[
-            dict(
-                font=dict(size=20, family="Arial", color="black", weight="bold"),
-                showarrow=False,
-                text="Number of Students",
-                x=0.5,
-                y=-0.1
-            )
-        ]
+def render_timings(traces):
+    import pandas as pd
+
+    from charts import timeline_chart
+
+    with st.sidebar.expander("⏱️ Rerun timings", expanded=True):
+        latest = {trace.label: trace for trace in reversed(traces)}
+        trace = latest[st.selectbox("Rerun", list(latest))]
+        counters = ", ".join(f"{name}: {value:,}" for name, value in sorted(trace.counters.items()))
+        st.caption(f"{trace.duration_ms:.0f} ms · {counters or 'no counters'}")
+        fig = timeline_chart(pd.DataFrame(trace.records()), f"Rerun {trace.label}")
+        plotly_chart(fig, use_container_width=True)
+        st.dataframe(pd.DataFrame([
+            {"rerun": trace.label, "ms": round(trace.duration_ms, 1), **trace.counters} for trace in traces
+        ]).fillna(0), hide_index=True)
+        st.download_button("Export JSON", instrumentation.to_json(traces), "timings.json", "application/json")
+        st.download_button("Export CSV", instrumentation.to_csv(traces), "timings.csv", "text/csv")
+
+
+def render_student_lookup():
+    st.markdown('<h2 class="custom-title">🔎 Student Lookup</h2>', unsafe_allow_html=True)
+    text = st.text_input("Student ID, email or name", key="lookup", placeholder="e.g. S1010, student10@university.com or Ali D")
+    if not text.strip():
+        return
+    from aggregates import AVERAGE_COLUMNS
+
+    # With term partitions a student has one row per term, so every match carries its term.
+    terms = ["term"] if "term" in backend.columns else []
+    columns = [*terms, "student_id", "email", "full_name", "department", "age_group", "grade", *AVERAGE_COLUMNS.values()]
+    with instrumentation.span("lookup"):
+        matches, total = backend.lookup(text, LOOKUP_LIMIT, columns)
+    if not total:
+        st.warning(f"No student matches {text.strip()!r}")
+        return
+    shown = f", showing the first {len(matches)}" if total > len(matches) else ""
+    st.caption(f"{total:,} matching students across the whole dataset{shown}.")
+    choice = st.selectbox(
+        "Student",
+        range(len(matches)),
+        format_func=lambda i: " · ".join(str(matches[column].iat[i]) for column in ["full_name", "student_id", "department", *terms]),
+        key="lookup_choice",
     )
+    render_profile(matches.iloc[choice])
+
+
+def render_profile(student):
+    import pandas as pd
 
-    st.plotly_chart(fig2, use_container_width=True)
-
-    attendance_per_dept = filtered_df.groupby("department")["attendance"].mean().reset_index()
-
-    colors_map = {
-        "CS": "#00008B",
-        "Engineering": "#4B0082",
-        "Business": "#8000B0",
-        "Mathematics": "#C71585"
-    }
-
-    bar_colors = [colors_map.get(dept, "#00008B") for dept in attendance_per_dept["department"]]
-
-    fig = go.Figure()
-
-    for i, row in attendance_per_dept.iterrows():
-        dept = row["department"]
-        attendance = row["attendance"]
-        color = colors_map.get(dept, "#00008B")
-
-        fig.add_trace(go.Bar(
-            x=[dept],
-            y=[attendance],
-            name=dept,
-            marker=dict(color=color),
-            text=[round(attendance, 1)],
-            textposition='inside',
-            textfont=dict(size=16, family="Arial", color="white", weight="bold"),
-            width=0.7,
-            showlegend=True,
-            legendgroup=dept
-        ))
-
-    fig.update_layout(
-        title={
-            "text": "Average Attendance by Department",
-            "x": 0.5,
-            "y": 0.9,
-            "xanchor": "center",
-            "yanchor": "top",
-        },
-        title_font=dict(size=24, family="Arial", color="black"),
-        yaxis=dict(showticklabels=False, title=None, showgrid=False),
-        xaxis=dict(
-            tickfont=dict(size=14, family="Arial", color="black", weight="bold"),
-            showgrid=False,
-            tickangle=0
-        ),
-        plot_bgcolor="white",
-        showlegend=True,
-        legend_title_text="Department",
-        legend=dict(font=dict(size=14, family="Arial", color="black", weight="bold")),  # ✅ bold legend
-        width=900,
-        height=500,
-        margin=dict(l=50, r=50, t=100, b=50),
-        bargap=0.15
+    from aggregates import AVERAGE_COLUMNS
+
+    # Group averages come from the cached per-selection summaries, not from a scan.
+    department = backend.summary({"department": [str(student["department"])]}).averages
+    age_group = backend.summary({"age_group": [str(student["age_group"])]}).averages
+
+    term = f" · {student['term']}" if "term" in student else ""
+    st.markdown(
+        f"**{student['full_name']}** · {student['student_id']} · {student['email']}{term}  \n"
+        f"{student['department']} · age {student['age_group']} · grade {student['grade']}"
     )
+    cols = st.columns(len(AVERAGE_COLUMNS))
+    for col, (label, column) in zip(cols, AVERAGE_COLUMNS.items()):
+        col.metric(label, f"{student[column]:.1f}", f"{student[column] - department[label]:+.1f} vs department")
+    st.dataframe(pd.DataFrame({
+        "Student": [float(student[column]) for column in AVERAGE_COLUMNS.values()],
+        f"{student['department']} average": list(department.values()),
+        f"Age {student['age_group']} average": list(age_group.values()),
+    }, index=list(AVERAGE_COLUMNS)).round(2), use_container_width=True)
+
+
+def render_overview():
+    total_students = summary.count
+    st.markdown(f'<div class="custom-title">🎓 Total Students: {total_students}</div>', unsafe_allow_html=True)
 
-    for i in range(len(attendance_per_dept)):
-        fig.add_shape(
-            type="line",
-            x0=i - 0.35,
-            x1=i + 0.35,
-            y0=0,
-            y1=0,
-            line=dict(color="gray", width=1)
-        )
+    render_student_lookup()
 
-    st.plotly_chart(fig, use_container_width=True)
+    st.markdown('<h2 class="custom-title">📋 DataFrame</h2>', unsafe_allow_html=True)
+    render_table(backend, selection)
 
-with tab3:
-    averages = {
-        "📅 Attendance": filtered_df["attendance"].mean(),
-        "📝 Midterm": filtered_df["midterm_score"].mean(),
-        "📚 Quizzes": filtered_df["quizzes_avg"].mean(),
-        "💻 Project": filtered_df["projects_score"].mean(),
-        "🙋 Participation": filtered_df["participation_score"].mean(),
-        "🎯 Final Exam": filtered_df["final_score"].mean(),
-        "🏁 Total Score": filtered_df["total_score"].mean()
-    }
+    st.markdown('<h2 class="custom-title">📊 Numerical Statistics</h2>', unsafe_allow_html=True)
+    st.dataframe(summary.numerical)
+    if summary.quantile_error:
+        st.caption(f"Quartiles are estimated from quantile sketches (rank error ≤ {summary.quantile_error:.1%}).")
 
-    st.markdown("<h2 class='custom-title'>📊 Averages Summary</h2>", unsafe_allow_html=True)
+    st.markdown('<h2 class="custom-title">🗂️ Categorical Statistics</h2>', unsafe_allow_html=True)
+    st.dataframe(summary.categorical)
 
-    colors = [
-        "linear-gradient(135deg, #007cf0, #00dfd8)",
-        "linear-gradient(135deg, #7928ca, #ff0080)",
-        "linear-gradient(135deg, #f7971e, #ffd200)",
-        "linear-gradient(135deg, #00c9ff, #92fe9d)",
-        "linear-gradient(135deg, #f953c6, #b91d73)",
-        "linear-gradient(135deg, #43cea2, #185a9d)",
-        "linear-gradient(135deg, #fc5c7d, #6a82fb)"
-    ]
 
+def render_departments():
+    from charts import DEPARTMENT_COLORS, GRADE_COLORS, bar_chart, pie_chart
 
-    cards = list(averages.items())
-    total_card = cards.pop(-1)
+    render_averages(summary.averages)
 
-    cols = st.columns(3)
-    for i, (label, value) in enumerate(cards):
-        with cols[i % 3]:
-            st.markdown(f"""
-                <div style="
-                    background: {colors[i]};
-                    padding: 1.5rem;
-                    border-radius: 1rem;
-                    text-align: center;
-                    color: white;
-                    margin-bottom: 1.5rem;
-                    box-shadow: 0 4px 15px rgba(0,0,0,0.15);
-                    height: 180px;
-                    display: flex;
-                    flex-direction: column;
-                    justify-content: center;
-                ">
-                    <h4 style="margin-bottom: 0.5rem; font-size: 1.4rem; font-weight: 900;">{label}</h4>
-                    <h2 style="font-size: 2.8rem; font-weight: bold;">{value:.2f}</h2>
-                </div>
-            """, unsafe_allow_html=True)
+    department_counts = summary.value_counts["department"]
 
-    label, value = total_card
-    st.markdown(f"""
-        <div style="
-            background: {colors[-1]};
-            padding: 2rem;
-            border-radius: 1rem;
-            text-align: center;
-            color: white;
-            margin: 2rem 0;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.15);
-            height: 220px;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-        ">
-            <h2 style="margin-bottom: 0.5rem; font-size: 1.8rem; font-weight: 900;">{label}</h2>
-            <h1 style="font-size: 4rem; font-weight: bold;">{value:.2f}</h1>
-        </div>
-    """, unsafe_allow_html=True)
+    fig = cached_figure("department_counts", lambda: bar_chart(
+        department_counts.index,
+        department_counts.values,
+        "Number of Students in each Department",
+        color_map=DEPARTMENT_COLORS,
+    ))
 
-        # === Top 5 Students by Total Score (Enhanced) ===
-    top_students = filtered_df.nlargest(5, "total_score")[["full_name", "total_score"]]
-
-    fig = px.bar(
-    top_students,
-    x="total_score",
-    y="full_name",
-    title="Top 5 Students by Total Score",
-    labels={"full_name": "Student Name", "total_score": "Total Score"},
-    text_auto=True,
-    color="full_name",
-    color_discrete_sequence=px.colors.sequential.Aggrnyl
-)
+    plotly_chart(fig, use_container_width=True)
 
-    fig.update_traces(marker=dict(line=dict(width=0)), width=0.6) 
-
-    fig.update_layout(
-    title=dict(
-        text="Top 5 Students by Total Score",
-        x=0.5,
-        xanchor="center",
-        font=dict(size=24, family="Arial", color="black")
-    ),
-    legend=dict(
-        font=dict(size=14, family="Arial", color="black")
-    ),
-    yaxis=dict(
-        tickfont=dict(size=14, family="Arial", color="black", weight="bold")
-    )
-)
+    grade_counts = summary.value_counts["grade"]
 
-    st.plotly_chart(fig, use_container_width=True)
+    fig2 = cached_figure("grade_counts", lambda: pie_chart(
+        grade_counts.index,
+        grade_counts.values,
+        "Grade Distribution",
+        color_map=GRADE_COLORS,
+        hole=0.5,
+        annotation="Number of Students",
+    ))
 
-    Lowest_students = filtered_df.nsmallest(5, "total_score")[["full_name", "total_score"]]
+    plotly_chart(fig2, use_container_width=True)
 
-    fig = px.bar(
-    Lowest_students,
-    x="total_score",
-    y="full_name",
-    title="Lowest 5 Students by Total Score",
-    labels={"full_name": "Student Name", "total_score": "Total Score"},
-    text_auto=True,
-    color="full_name",
-    color_discrete_sequence=px.colors.sequential.Blues_r
-)
+    attendance_per_dept = summary.attendance_per_dept
 
-    fig.update_traces(marker=dict(line=dict(width=0)), width=0.6)
-
-    fig.update_layout(
-    title=dict(
-        text="Lowest 5 Students by Total Score",
-        x=0.5,
-        xanchor="center",
-        font=dict(size=24, family="Arial", color="black")
-    ),
-    legend=dict(
-        font=dict(size=14, family="Arial", color="black")
-    ),
-    yaxis=dict(
-        tickfont=dict(size=14, family="Arial", color="black", weight="bold")
-    )
-)
+    fig = cached_figure("attendance_per_dept", lambda: bar_chart(
+        attendance_per_dept["department"],
+        attendance_per_dept["attendance"],
+        "Average Attendance by Department",
+        color_map=DEPARTMENT_COLORS,
+        text=attendance_per_dept["attendance"].round(1),
+    ))
 
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
-    activity_percentages = (filtered_df['extracurricular_activities'].value_counts(normalize=True).round(1)) * 100
+    if PARTITIONS:
+        render_trends()
 
-    fig = px.pie(
-    names=activity_percentages.index,
-    values=activity_percentages.values,
-    title="Participation in Extracurricular Activities",
-    color_discrete_sequence=["#2ca25f", "#a1d99b"],
-)
 
-    fig.update_layout(
-    title=dict(
-        text="Participation in Extracurricular Activities",
-        x=0.5,
-        xanchor="center",
-        font=dict(size=24, color="black", family="Arial")
-    ),
-    legend=dict(
-        font=dict(size=17, color="black", family="Arial", weight="bold")
-    )
-)
+def render_trends():
+    from aggregates import AVERAGE_COLUMNS
+    from charts import DEPARTMENT_COLORS, line_chart
 
-    fig.update_traces(
-    textfont=dict(size=14, family="Arial", color="black", weight="bold")
-)
+    # Every term, straight from the manifest's per-partition sums; no partition file is opened.
+    label = st.selectbox("Trend of", list(AVERAGE_COLUMNS), index=len(AVERAGE_COLUMNS) - 1)
 
-    st.plotly_chart(fig, use_container_width=True)
-
-    grade_distribution = filtered_df.groupby('parent_education_level')['grade'].value_counts().unstack().fillna(0).reset_index()
-
-    color_palette = ["#004e64", "#00a5cf", "#7209b7", "#25a18e", "#7ae582"]
-
-    fig = px.bar(
-    grade_distribution,
-    x="parent_education_level",
-    y=grade_distribution.columns[1:],
-    labels={
-        "parent_education_level": "Parent Education Level",
-        "value": "Number of Students"
-    },
-    barmode="group",
-    color_discrete_sequence=color_palette,
-    text_auto=True)
-
-    fig.update_layout(
-        title={
-            "text": "Grade Distribution by Parent Education Level",
-            "x": 0.5,
-            "y": 0.9,
-            "xanchor": "center",
-            "yanchor": "top",
-        },
-        title_font=dict(size=24, family="Arial", color="black"),
-        yaxis=dict(showticklabels=False, title=None, showgrid=False),
-        xaxis=dict(
-            tickfont=dict(size=14, family="Arial", color="black", weight="bold"),
-            showgrid=False,
-            tickangle=0
-        ),
-        plot_bgcolor="white",
-        showlegend=True,
-        legend_title=dict(text="Grade"),
-        legend=dict(font=dict(size=17, family="Arial", color="black", weight="bold")),
-        width=900,
-        height=500,
-        margin=dict(l=50, r=50, t=100, b=50),
-        bargap=0.15
-    )
+    fig = cached_figure(("department_trends", label), lambda: line_chart(
+        manifest.trends(AVERAGE_COLUMNS[label], selection).round(2),
+        f"{label} by Department across Terms",
+        color_map=DEPARTMENT_COLORS,
+        labels={"x": "Term", "y": label, "color": "Department"},
+    ))
 
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
-    internet_access_counts = filtered_df['internet_access_at_home'].value_counts()
 
-    fig = px.pie(
-    names=internet_access_counts.index,
-    values=internet_access_counts.values,
-    color_discrete_sequence=px.colors.qualitative.Alphabet,
-    hole=0.5
-)
+def render_performance():
+    import plotly.express as px
 
-    fig.update_traces(
-    textfont=dict(size=16, family="Arial", color="white"),
-    textfont_weight="bold",
-    textinfo='label+percent'
-)
+    from charts import bar_chart, grouped_bar_chart, pie_chart
 
-    fig.update_layout(
-    title=dict(
-        text="Internet Access at Home",
-        x=0.5,
-        xanchor='center',
-        y=0.95,
-        font=dict(size=24, color="black", family="Arial")
-    ),
-    legend=dict(
-        font=dict(size=17, color="black", family="Arial", weight="bold"
-        ),
-        bgcolor="rgba(0,0,0,0)"
-    )
-)
+    render_averages(summary.averages)
 
-    st.plotly_chart(fig, use_container_width=True)
+    ranked = st.number_input("Students per ranking", min_value=1, max_value=50, value=5)
 
-with tab4:
-    averages = {
-        "📅 Attendance": filtered_df["attendance"].mean(),
-        "📝 Midterm": filtered_df["midterm_score"].mean(),
-        "📚 Quizzes": filtered_df["quizzes_avg"].mean(),
-        "💻 Project": filtered_df["projects_score"].mean(),
-        "🙋 Participation": filtered_df["participation_score"].mean(),
-        "🎯 Final Exam": filtered_df["final_score"].mean(),
-        "🏁 Total Score": filtered_df["total_score"].mean()
-    }
+    # === Top N Students by Total Score (Enhanced) ===
+    def top_students_chart():
+        top_students = backend.top(selection, "total_score", ranked, ["full_name", "total_score"])
+        return bar_chart(
+            top_students["full_name"],
+            top_students["total_score"],
+            f"Top {ranked} Students by Total Score",
+            sequence=px.colors.sequential.Aggrnyl,
+            orientation="h",
+            labels={"x": "Total Score", "y": "Student Name"},
+        )
 
-    st.markdown("<h2 class='custom-title'>📊 Averages Summary</h2>", unsafe_allow_html=True)
+    fig = cached_figure(("top_students", ranked), top_students_chart)
 
-    colors = [
-        "linear-gradient(135deg, #007cf0, #00dfd8)",
-        "linear-gradient(135deg, #7928ca, #ff0080)",
-        "linear-gradient(135deg, #f7971e, #ffd200)",
-        "linear-gradient(135deg, #00c9ff, #92fe9d)",
-        "linear-gradient(135deg, #f953c6, #b91d73)",
-        "linear-gradient(135deg, #43cea2, #185a9d)",
-        "linear-gradient(135deg, #fc5c7d, #6a82fb)"
-    ]
+    plotly_chart(fig, use_container_width=True)
 
+    def lowest_students_chart():
+        Lowest_students = backend.top(selection, "total_score", ranked, ["full_name", "total_score"], ascending=True)
+        return bar_chart(
+            Lowest_students["full_name"],
+            Lowest_students["total_score"],
+            f"Lowest {ranked} Students by Total Score",
+            sequence=px.colors.sequential.Blues_r,
+            orientation="h",
+            labels={"x": "Total Score", "y": "Student Name"},
+        )
 
-    cards = list(averages.items())
-    total_card = cards.pop(-1)
+    fig = cached_figure(("lowest_students", ranked), lowest_students_chart)
 
-    cols = st.columns(3)
-    for i, (label, value) in enumerate(cards):
-        with cols[i % 3]:
-            st.markdown(f"""
-                <div style="
-                    background: {colors[i]};
-                    padding: 1.5rem;
-                    border-radius: 1rem;
-                    text-align: center;
-                    color: white;
-                    margin-bottom: 1.5rem;
-                    box-shadow: 0 4px 15px rgba(0,0,0,0.15);
-                    height: 180px;
-                    display: flex;
-                    flex-direction: column;
-                    justify-content: center;
-                ">
-                    <h4 style="margin-bottom: 0.5rem; font-size: 1.4rem; font-weight: 900;">{label}</h4>
-                    <h2 style="font-size: 2.8rem; font-weight: bold;">{value:.2f}</h2>
-                </div>
-            """, unsafe_allow_html=True)
+    plotly_chart(fig, use_container_width=True)
 
-    label, value = total_card
-    st.markdown(f"""
-        <div style="
-            background: {colors[-1]};
-            padding: 2rem;
-            border-radius: 1rem;
-            text-align: center;
-            color: white;
-            margin: 2rem 0;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.15);
-            height: 220px;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-        ">
-            <h2 style="margin-bottom: 0.5rem; font-size: 1.8rem; font-weight: 900;">{label}</h2>
-            <h1 style="font-size: 4rem; font-weight: bold;">{value:.2f}</h1>
-        </div>
-    """, unsafe_allow_html=True)
+    render_leaderboards(ranked)
 
-    numerical_data = filtered_df.select_dtypes(include="number").corr().round(2)
+    activity_counts = summary.value_counts["extracurricular_activities"]
+    activity_percentages = (activity_counts / activity_counts.sum()).round(1) * 100
 
+    fig = cached_figure("extracurricular_activities", lambda: pie_chart(
+        activity_percentages.index,
+        activity_percentages.values,
+        "Participation in Extracurricular Activities",
+        sequence=["#2ca25f", "#a1d99b"],
+        textfont=dict(size=14, family="Arial", color="black", weight="bold"),
+    ))
 
-    fig = px.imshow(
-    numerical_data, 
-    title="Correlation Matrix of Numerical Data",
-    text_auto=True
-)
+    plotly_chart(fig, use_container_width=True)
 
-    fig.update_traces(
-    textfont=dict(
-        size=10,  
-        color="black",  
-        family="Arial",  
-        weight="bold"  
-    ),
-    texttemplate="%{z}",
-)
+    grade_distribution = summary.grade_distribution
 
-    fig.update_layout(
-    title_font=dict(size=24, family="Arial", color="black"),
-    title_x=0.5, 
-    title_xanchor="center", 
-    xaxis=dict(title="Features", tickfont=dict(size=12, family="Arial", color="black")),
-    yaxis=dict(title="Features", tickfont=dict(size=12, family="Arial", color="black")),
-    plot_bgcolor="white",
-    width=1200,
-    height=600
-)
+    fig = cached_figure("grade_distribution", lambda: grouped_bar_chart(
+        grade_distribution,
+        "parent_education_level",
+        grade_distribution.columns[1:],
+        "Grade Distribution by Parent Education Level",
+        palette=["#004e64", "#00a5cf", "#7209b7", "#25a18e", "#7ae582"],
+        legend_title="Grade",
+        labels={"parent_education_level": "Parent Education Level", "value": "Number of Students"},
+    ))
+
+    plotly_chart(fig, use_container_width=True)
 
-    st.plotly_chart(fig)
-
-    fig1 = px.scatter(filtered_df, x="study_hours_per_week", y="total_score", color="gender", trendline="ols", title="Effect of Study Hours on Final Scores")
-    fig1.update_layout(
-    title=dict(
-        text="Effect of Study Hours on Final Scores",
-        x=0.5, 
-        xanchor='center',
-        y=0.95,  
-        yanchor='bottom'
-    ),
-    title_font=dict(size=24, color="black", family="Arial"),
-    xaxis_title_font=dict(size=17),
-    yaxis_title_font=dict(size=17),
-    xaxis=dict(showgrid=False),
-    yaxis=dict(showgrid=False),
-    legend=dict(
-        font=dict(size=17, family="Arial Black")
+    internet_access_counts = summary.value_counts["internet_access_at_home"]
+
+    fig = cached_figure("internet_access_at_home", lambda: pie_chart(
+        internet_access_counts.index,
+        internet_access_counts.values,
+        "Internet Access at Home",
+        sequence=px.colors.qualitative.Alphabet,
+        hole=0.5,
+        textfont=dict(size=16, family="Arial", color="white", weight="bold"),
+        textinfo="label+percent",
+        title_y=0.95,
+        legend_bgcolor="rgba(0,0,0,0)",
+    ))
+
+    plotly_chart(fig, use_container_width=True)
+
+
+def render_leaderboards(ranked):
+    st.markdown('<h2 class="custom-title">🏅 Department Leaderboards</h2>', unsafe_allow_html=True)
+    controls = st.columns([1, 1])
+    score = controls[0].selectbox("Ranked by", RANKED_COLUMNS)
+    boards = cached(
+        ("leaderboard", score, ranked),
+        lambda: backend.leaderboard(selection, "department", score, ranked, ["student_id", "full_name", score]),
     )
-)
-    st.plotly_chart(fig1)
-
-    fig2 = px.scatter(filtered_df, x="final_score", y="quizzes_avg", size="study_hours_per_week", color_discrete_sequence= ["red" , "blue"], title="Correlation between Final Score and Quizzes based on Study Hours")
-    fig2.update_traces(marker=dict(
-    color=df["gender"].apply(lambda x: 'purple' if x == 'M' else 'blue'),
-    showscale=False
-))
-    fig2.update_layout(
-    title=dict(
-        text="Correlation between Final Score and Quizzes based on Study Hours",
-        x=0.5, 
-        xanchor='center',
-        y=0.95,  
-        yanchor='bottom'
-    ),
-    title_font=dict(size=24, color="black", family="Arial"),
-    xaxis_title_font=dict(size=17),
-    yaxis_title_font=dict(size=17),
-    xaxis=dict(showgrid=False),
-    yaxis=dict(showgrid=False),
-    legend=dict(
-        font=dict(size=17, family="Arial Black")
+    departments = boards["department"].astype(str).unique()
+    for column, department in zip(st.columns(max(len(departments), 1)), departments):
+        board = boards[boards["department"].astype(str) == department]
+        column.markdown(f"**{department}**")
+        column.dataframe(board[["rank", "student_id", "full_name", score]], hide_index=True, use_container_width=True)
+
+    student_id = controls[1].text_input("Percentile rank of student ID", placeholder="e.g. S1000").strip()
+    if student_id:
+        within = backend.percentile_rank(student_id, selection, score)
+        if within is None:
+            controls[1].warning(f"No student with ID {student_id}")
+        else:
+            overall = backend.percentile_rank(student_id, {}, score)
+            controls[1].caption(
+                f"{student_id} scores at or above {within:.1f}% of the filtered students "
+                f"and {overall:.1f}% of all students on {score}."
+            )
+
+
+def render_correlation():
+    from charts import GENDER_COLORS, POINT_BUDGET, add_trendlines, box_chart, heatmap_chart, scatter_chart
+
+    render_averages(summary.averages)
+
+    controls = st.columns([3, 1])
+    correlated = controls[0].multiselect(
+        "Correlated columns",
+        NUMERIC_COLUMNS,
+        default=[column for column in NUMERIC_COLUMNS if column != "age"],
     )
-)
-    st.plotly_chart(fig2)
-
-    fig3 = px.box(filtered_df, x="parent_education_level", y="total_score", color="gender", title="Total Score by Parent Education Level")
-    fig3.update_layout(
-    title=dict(
-        text="Total Score by Parent Education Level",
-        x=0.5, 
-        xanchor='center',
-        y=0.95,  
-        yanchor='bottom'
-    ),
-    title_font=dict(size=24, color="black", family="Arial"),
-    xaxis_title_font=dict(size=17),
-    yaxis_title_font=dict(size=17),
-    xaxis=dict(showgrid=False),
-    yaxis=dict(showgrid=False),
-    legend=dict(
-        font=dict(size=17, family="Arial Black")
+    method = controls[1].radio("Method", ["Pearson", "Spearman"], horizontal=True)
+    columns = tuple(correlated or NUMERIC_COLUMNS)
+    numerical_data = cached(
+        ("correlation", method, columns),
+        lambda: backend.corr(selection, list(columns), method.lower()).round(2),
+    )
+
+
+    fig = cached_figure(
+        ("correlation_heatmap", method, columns),
+        lambda: heatmap_chart(numerical_data, "Correlation Matrix of Numerical Data"),
+    )
+
+    plotly_chart(fig)
+
+    scatter_mode = st.radio("Scatter rendering", ["Points", "Density"], horizontal=True)
+    point_budget = st.number_input("Point budget", min_value=500, max_value=200_000, value=POINT_BUDGET, step=500)
+    mode = scatter_mode.lower()
+
+    def study_hours_chart():
+        fig1 = scatter_chart(
+            backend.select(selection, ["study_hours_per_week", "total_score", "gender", "grade"]),
+            "study_hours_per_week",
+            "total_score",
+            "Effect of Study Hours on Final Scores",
+            color="gender",
+            color_map=GENDER_COLORS,
+            budget=point_budget,
+            mode=mode,
+            strata=["gender", "grade"],
+        )
+        if mode == "points":
+            study_hours = summary.numerical["study_hours_per_week"]
+            add_trendlines(fig1, summary.trendlines, (study_hours["min"], study_hours["max"]), GENDER_COLORS)
+        return fig1
+
+    fig1 = cached_figure(("study_hours", mode, point_budget), study_hours_chart)
+    plotly_chart(fig1)
+
+    fig2 = cached_figure(("final_vs_quizzes", mode, point_budget), lambda: scatter_chart(
+        backend.select(selection, ["final_score", "quizzes_avg", "study_hours_per_week", "gender", "grade"]),
+        "final_score",
+        "quizzes_avg",
+        "Correlation between Final Score and Quizzes based on Study Hours",
+        color="gender",
+        color_map=GENDER_COLORS,
+        size="study_hours_per_week",
+        budget=point_budget,
+        mode=mode,
+        strata=["gender", "grade"],
+    ))
+    plotly_chart(fig2)
+
+    fig3 = cached_figure("score_box", lambda: box_chart(
+        summary.box_stats,
+        "parent_education_level",
+        "gender",
+        "Total Score by Parent Education Level",
+        y_title="total_score",
+    ))
+    plotly_chart(fig3)
+
+
+def render_cohorts():
+    from charts import grouped_bar_chart, heatmap_chart
+    from cohorts import COHORT_DIMENSIONS
+
+    # Cohorts are defined here, independently of the sidebar filters, and compared in one pass.
+    count = st.number_input("Cohorts", min_value=2, max_value=4, value=2)
+    cohorts = []
+    for i, column in enumerate(st.columns(count)):
+        column.markdown(f"**Cohort {i + 1}**")
+        cohorts.append({
+            dimension: column.multiselect(dimension.replace("_", " ").title(), backend.values(dimension), key=f"cohort_{i}_{dimension}")
+            for dimension in COHORT_DIMENSIONS
+        })
+    method = st.radio("Correlation method", ["Pearson", "Spearman"], horizontal=True, key="cohort_method")
+    key = (tuple(normalize_selection(cohort) for cohort in cohorts), method)
+    comparison = cached(
+        ("cohorts", *key),
+        lambda: backend.compare(cohorts, method=method.lower()),
     )
+
+    empty = [label for label in comparison.labels if not comparison.counts[label]]
+    if empty:
+        st.warning(f"No students in {', '.join(empty)}")
+
+    # Averages cards side by side, each cohort's delta taken against the first cohort.
+    averages = comparison.averages
+    baseline = comparison.labels[0]
+    for k, (column, label) in enumerate(zip(st.columns(len(comparison.labels)), comparison.labels)):
+        column.markdown(f"**{label}** · {comparison.counts[label]:,} students")
+        for measure, value in averages[label].items():
+            delta = f"{value - averages.at[measure, baseline]:+.2f} vs {baseline}" if k else None
+            column.metric(measure, f"{value:.2f}", delta)
+
+    frame = averages.round(2).rename_axis("measure").reset_index()
+    fig = cached_figure(("cohort_averages", key), lambda: grouped_bar_chart(
+        frame,
+        "measure",
+        comparison.labels,
+        "Average Scores by Cohort",
+        palette=["#004e64", "#00a5cf", "#7209b7", "#25a18e"],
+        legend_title="Cohort",
+        labels={"measure": "Measure", "value": "Average"},
+    ))
+    plotly_chart(fig, use_container_width=True)
+
+    shares = (comparison.grade_distribution / comparison.counts.where(comparison.counts > 0) * 100).round(1)
+    frame = shares.rename_axis("grade").reset_index()
+    fig = cached_figure(("cohort_grades", key), lambda: grouped_bar_chart(
+        frame,
+        "grade",
+        comparison.labels,
+        "Grade Share by Cohort (%)",
+        palette=["#004e64", "#00a5cf", "#7209b7", "#25a18e"],
+        legend_title="Cohort",
+        labels={"grade": "Grade", "value": "Share of Students (%)"},
+    ))
+    plotly_chart(fig, use_container_width=True)
+
+    for k, (column, label) in enumerate(zip(st.columns(len(comparison.labels)), comparison.labels)):
+        with column:
+            fig = cached_figure(("cohort_heatmap", key, k), lambda: heatmap_chart(
+                comparison.correlations[label].round(2), f"{label} ({method})", width=600, height=500,
+            ))
+            plotly_chart(fig, use_container_width=True)
+
+
+TABS = {
+    "📊 DataFrame & Basic Stats": render_overview,
+    "🏛️ Department Overview": render_departments,
+    "🏆 Performance Insights": render_performance,
+    "🧮 Score Correlation": render_correlation,
+    "⚖️ Cohort Comparison": render_cohorts,
+}
+
+if DEFERRED_TABS:
+    selected_tab = st.radio("Tab", list(TABS), horizontal=True, label_visibility="collapsed")
+    with instrumentation.span(f"tab {selected_tab}"):
+        TABS[selected_tab]()
+else:
+    for (name, render), tab in zip(TABS.items(), st.tabs(list(TABS))):
+        with tab, instrumentation.span(f"tab {name}"):
+            render()
+
+cache_stats = results.stats()
+st.sidebar.caption(
+    f"Result cache: {cache_stats['hit_rate']:.0%} of {cache_stats['lookups']} lookups served, "
+    f"{cache_stats['entries']} entries, {cache_stats['bytes'] / 2**20:.1f} MB"
 )
-    st.plotly_chart(fig3)
 
+st.session_state.traces.append(trace.finish())
+if DEBUG:
+    render_timings(st.session_state.traces)
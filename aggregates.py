@@ -0,0 +1,194 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import pandas as pd
+
+from data import ID_COLUMN, ID_COLUMNS, derive_ids
+from filters import normalize_selection
+from instrumentation import span
+from regression import stats_from_cube, stats_from_rows
+from sketches import box_stats, describe_from_sketches
+
+AVERAGE_COLUMNS = {
+    "📅 Attendance": "attendance",
+    "📝 Midterm": "midterm_score",
+    "📚 Quizzes": "quizzes_avg",
+    "💻 Project": "projects_score",
+    "🙋 Participation": "participation_score",
+    "🎯 Final Exam": "final_score",
+    "🏁 Total Score": "total_score",
+}
+
+COUNT_COLUMNS = ["department", "grade", "extracurricular_activities", "internet_access_at_home"]
+
+TRENDLINE = ("study_hours_per_week", "total_score", "gender")
+
+BOX = ("parent_education_level", "total_score", "gender")
+
+# Columns of a box_stats frame after the x and color columns.
+BOX_STATS = ["q1", "median", "q3", "lowerfence", "upperfence", "n"]
+
+
+@dataclass(frozen=True)
+class Summary:
+    count: int
+    averages: MappingProxyType
+    numerical: pd.DataFrame
+    categorical: pd.DataFrame
+    value_counts: MappingProxyType
+    attendance_per_dept: pd.DataFrame
+    grade_distribution: pd.DataFrame
+    trendlines: MappingProxyType
+    box_stats: pd.DataFrame
+    quantile_error: float
+
+    def __reduce__(self):
+        # Read-only mappings cannot be pickled; they travel as dicts and are wrapped again on load.
+        state = {name: dict(value) if isinstance(value, MappingProxyType) else value for name, value in vars(self).items()}
+        return _restore_summary, (state,)
+
+
+def _restore_summary(state):
+    return Summary(**{name: MappingProxyType(value) if isinstance(value, dict) else value for name, value in state.items()})
+
+
+def summarize(df, cube=None, selection=None):
+    with span("describe"):
+        categorical = describe_text(df)
+        if cube is None or not cube.covers(selection or {}):
+            return _summarize_rows(df, df.drop(columns=ID_COLUMN, errors="ignore").describe(), categorical)
+    # Everything numeric rolls up from the cube and its sketches; only the text columns scan rows.
+    with span("cube rollup"):
+        return summarize_cube(cube, selection, None, categorical)
+
+
+def describe_text(df):
+    # describe() of the text columns; compact ids are described from their numbers, as the strings would be.
+    categorical = df.describe(include=["string", "category"])
+    if ID_COLUMN not in df:
+        return categorical
+    counts = df[ID_COLUMN].value_counts()
+    ids = pd.DataFrame(
+        {
+            column: [len(df), len(counts), derive_ids(column, counts.index[:1]).iloc[0], counts.iloc[0]]
+            if len(counts) else [0, 0, None, None]
+            for column in ID_COLUMNS
+        },
+        index=["count", "unique", "top", "freq"],
+    )
+    return pd.concat([ids, categorical], axis=1)
+
+
+def summarize_cube(cube, selection, numerical=None, categorical=None):
+    total = cube.rollup([], selection).iloc[0]
+    quantile_error = 0.0
+    if numerical is None:
+        sketches = {column: cube.sketch(column, selection) for column in cube.measures}
+        numerical = describe_from_sketches(sketches, total)
+        quantile_error = max(sketch.rank_error for sketch in sketches.values())
+    averages = {label: total[f"{column}_sum"] / total["count"] for label, column in AVERAGE_COLUMNS.items()}
+    value_counts = {column: cube.counts(column, selection) for column in COUNT_COLUMNS}
+    attendance_per_dept = cube.means(["department"], "attendance", selection).reset_index()
+    grade_distribution = (
+        cube.rollup(["parent_education_level", "grade"], selection)["count"]
+        .unstack(fill_value=0).loc[:, lambda counts: counts.sum() > 0].reset_index()
+    )
+    trendlines = {group: stats.fit() for group, stats in stats_from_cube(cube, *TRENDLINE, selection).items()}
+    x, y, color = BOX
+    box = pd.DataFrame([
+        {x: x_value, color: color_value, **box_stats(sketch)}
+        for color_value in map(str, cube.slice(selection)[color].unique())
+        for x_value, sketch in sorted(cube.sketch(y, {**(selection or {}), color: color_value}, by=x).items())
+    ], columns=[x, color, *BOX_STATS])
+    return Summary(
+        count=int(total["count"]),
+        averages=MappingProxyType(averages),
+        numerical=numerical,
+        categorical=categorical,
+        value_counts=MappingProxyType(value_counts),
+        attendance_per_dept=attendance_per_dept,
+        grade_distribution=grade_distribution,
+        trendlines=MappingProxyType(trendlines),
+        box_stats=box,
+        quantile_error=quantile_error,
+    )
+
+
+def _summarize_rows(df, numerical, categorical):
+    # describe() already carries every mean, so the average cards need no extra pass.
+    averages = {label: numerical.at["mean", column] for label, column in AVERAGE_COLUMNS.items()}
+    value_counts = {
+        column: df[column].value_counts().loc[lambda counts: counts > 0] for column in COUNT_COLUMNS
+    }
+    attendance_per_dept = df.groupby("department", observed=True)["attendance"].mean().reset_index()
+    grade_distribution = (
+        df.groupby("parent_education_level", observed=True)["grade"].value_counts()
+        .unstack().fillna(0).loc[:, lambda counts: counts.sum() > 0].reset_index()
+    )
+    trendlines = {group: stats.fit() for group, stats in stats_from_rows(df, *TRENDLINE).items()}
+    x, y, color = BOX
+    box = box_stats_from_quartiles(df.groupby([x, color], observed=True)[y].describe(), [x, color])
+    return Summary(
+        count=len(df),
+        averages=MappingProxyType(averages),
+        numerical=numerical,
+        categorical=categorical,
+        value_counts=MappingProxyType(value_counts),
+        attendance_per_dept=attendance_per_dept,
+        grade_distribution=grade_distribution,
+        trendlines=MappingProxyType(trendlines),
+        box_stats=box,
+        quantile_error=0.0,
+    )
+
+
+def box_stats_from_quartiles(quartiles, by):
+    # describe()-style quartiles per group of `by` -> the q1/median/q3/fence columns box_chart draws.
+    if quartiles.empty:
+        # describe() of no rows has neither the quartile columns nor the group names.
+        return pd.DataFrame(columns=[*by, *BOX_STATS])
+    iqr = quartiles["75%"] - quartiles["25%"]
+    return pd.DataFrame({
+        "q1": quartiles["25%"],
+        "median": quartiles["50%"],
+        "q3": quartiles["75%"],
+        "lowerfence": (quartiles["25%"] - 1.5 * iqr).clip(lower=quartiles["min"]),
+        "upperfence": (quartiles["75%"] + 1.5 * iqr).clip(upper=quartiles["max"]),
+        "n": quartiles["count"],
+    }).reset_index()
+
+
+class SummaryCache:
+    # LRU of summaries keyed on the normalized filter selection of one filter engine.
+
+    def __init__(self, engine, cube=None, maxsize=128):
+        self.engine = engine
+        self.cube = cube
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, selection):
+        key = normalize_selection(selection)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.cube is not None and self.cube.covers(selection):
+            # The cube answers the numeric columns, so only the text columns are materialized.
+            columns = [column for column in self.engine.df.columns if column not in self.cube.measures]
+            summary = summarize(self.engine.select(selection, columns), self.cube, selection)
+        else:
+            summary = summarize(self.engine.select(selection), self.cube, selection)
+        with self._lock:
+            self._entries[key] = summary
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return summary
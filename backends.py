@@ -0,0 +1,587 @@
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from aggregates import AVERAGE_COLUMNS, BOX, COUNT_COLUMNS, TRENDLINE, Summary, box_stats_from_quartiles
+from cohorts import Comparison, cohort_labels, compare
+from data import (
+    ID_COLUMN,
+    ID_COLUMNS,
+    NUMERIC_COLUMNS,
+    SCHEMA,
+    batch_version,
+    compact_ids,
+    expand_ids,
+    file_signature,
+    logical_columns,
+    read_students,
+    take_columns,
+)
+from filters import normalize_selection
+from instrumentation import count, span
+from regression import OLSStats
+from viewer import SEARCH_COLUMNS, RowSet
+
+TABLE = "students"
+
+# Ids bound per `IN (...)` list, under SQLite's limit of 999 parameters per statement.
+MAX_PARAMETERS = 500
+
+
+class PandasBackend:
+    # The default: everything answered from the in-memory StudentStore. Reads take the store's
+    # lock, so a session never sees a batch that another session is halfway through upserting.
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = store.lock
+
+    @property
+    def columns(self):
+        return logical_columns(self.store.df)
+
+    @property
+    def version(self):
+        return self.store.version
+
+    def values(self, column):
+        with self.lock:
+            return self.store.filter_engine.values(column)
+
+    def summary(self, selection):
+        with self.lock:
+            return self.store.summaries.get(selection)
+
+    def clear_cache(self):
+        self.store.summaries.clear()
+
+    def select(self, selection, columns=None):
+        with self.lock:
+            return self.store.filter_engine.select(selection, columns or self.columns)
+
+    def top(self, selection, column, k=5, columns=None, ascending=False):
+        ranking = self.store.ranking
+        with self.lock:
+            if not ranking.covers(selection):
+                rows = self.select(selection, columns)
+                return rows.nsmallest(k, column) if ascending else rows.nlargest(k, column)
+            return take_columns(self.store.df, ranking.top(selection, column, k, ascending), columns or self.columns)
+
+    def leaderboard(self, selection, by, column, k=5, columns=None, ascending=False):
+        # Top k per value of `by`, stacked, with each row's rank inside its group.
+        columns = [*(c for c in columns or self.columns if c != by), by]
+        with self.lock:
+            boards = self.store.ranking.leaderboard(selection, by, column, k, ascending)
+            if not boards:
+                return pd.DataFrame(columns=[*columns, "rank"])
+            return pd.concat(
+                [
+                    take_columns(self.store.df, rows, columns).assign(rank=np.arange(1, len(rows) + 1))
+                    for rows in boards.values()
+                ],
+                ignore_index=True,
+            )
+
+    def percentile_rank(self, student_id, selection=None, column="total_score"):
+        with self.lock:
+            position = self.store.locate(student_id)
+            return None if position is None else self.store.ranking.percentile_rank(position, selection, column)
+
+    def lookup(self, text, limit=20, columns=None):
+        # Students matching an exact id/email or a name prefix, and how many matched in total.
+        with self.lock:
+            rows, total = self.store.lookup.search(text, limit)
+            return take_columns(self.store.df, rows, columns or self.columns), total
+
+    def table_rows(self, selection, sort_by=None, ascending=True, search=None):
+        view = self.store.table_view
+        with self.lock:
+            rows = view.rows(self.store.filter_engine.row_ids(selection), sort_by, ascending, search)
+        return RowSet(view, rows, self.lock)
+
+    def corr(self, selection, columns=None, method="pearson"):
+        with self.lock:
+            return self.store.correlation.corr(selection, columns, method)
+
+    def compare(self, cohorts, columns=None, method="pearson"):
+        with self.lock, span("compare cohorts"):
+            correlation = self.store.correlation
+            moments = correlation.spearman if method == "spearman" else correlation.pearson
+            return compare(self.store.cube, moments, cohorts, columns)
+
+    @property
+    def applied(self):
+        return self.store.applied
+
+    def upsert(self, rows, batch=None):
+        return self.store.upsert(rows, batch)
+
+
+class ConnectionPool:
+    # A bounded set of connections shared by every session of the process.
+
+    def __init__(self, factory, size=8):
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self.factory()
+            try:
+                yield connection
+            finally:
+                self._idle.put(connection)
+
+
+def _quote(column):
+    if column not in SCHEMA:
+        raise ValueError(f"Unknown column: {column}")
+    return f'"{column}"'
+
+
+def where_clause(selection, search=None):
+    clauses, params = [], []
+    for column, values in normalize_selection(selection or {}):
+        clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if search:
+        clauses.append("(" + " OR ".join(f"lower({_quote(column)}) LIKE ?" for column in SEARCH_COLUMNS) + ")")
+        params.extend([f"%{search.lower()}%"] * len(SEARCH_COLUMNS))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class SQLBackend:
+    # The student table in an embedded database; filters and aggregations run as SQL.
+    # DuckDB is used when installed, SQLite otherwise. Quantiles use DuckDB's quantile_cont; on
+    # SQLite the one or two columns involved are fetched and summarized with pandas.
+
+    def __init__(self, source, database=None, engine="duckdb", pool_size=8, cache_size=128):
+        self.source = source
+        self.dialect = engine
+        if engine == "duckdb":
+            try:
+                import duckdb
+            except ImportError:
+                self.dialect = "sqlite"
+        self.database = database or os.path.splitext(source)[0] + (".duckdb" if self.dialect == "duckdb" else ".sqlite")
+        if self.dialect == "duckdb":
+            root = duckdb.connect(self.database)
+            self.pool = ConnectionPool(root.cursor, pool_size)
+        else:
+            self.pool = ConnectionPool(lambda: sqlite3.connect(self.database, check_same_thread=False), pool_size)
+        self.lock = threading.RLock()
+        self.version = ""
+        self.applied = set()
+        self._summaries = OrderedDict()
+        self._cache_size = cache_size
+        self._load()
+        # Exact id/email lookups; also added to databases built before the indexes existed.
+        for column in ("student_id", "email"):
+            self.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_{column} ON {TABLE} ({_quote(column)})")
+        self.columns = list(self.query(f"SELECT * FROM {TABLE} LIMIT 0").columns)
+        self.numeric_ids = self._ids_follow_pattern()
+
+    def query(self, sql, params=()):
+        with span("sql"), self.pool.connection() as connection:
+            if self.dialect == "duckdb":
+                result = connection.execute(sql, list(params)).df()
+            else:
+                result = pd.read_sql_query(sql, connection, params=list(params))
+        count("rows_fetched", len(result))
+        return result
+
+    def execute(self, sql, params=()):
+        with self.pool.connection() as connection:
+            connection.execute(sql, list(params))
+            if self.dialect == "sqlite":
+                connection.commit()
+
+    def _load(self):
+        # (Re)load the table only when the source file changed since the database was built.
+        signature = repr(file_signature(self.source)[1:])
+        self.execute("CREATE TABLE IF NOT EXISTS dashboard_meta (key VARCHAR PRIMARY KEY, value VARCHAR)")
+        stored = self.query("SELECT value FROM dashboard_meta WHERE key = 'source'")
+        if len(stored) and stored.iloc[0, 0] == signature:
+            return
+
+        self.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        extension = os.path.splitext(self.source)[1]
+        if self.dialect == "duckdb" and extension in (".csv", ".parquet"):
+            # DuckDB scans the file itself, out of core, without a pandas copy. Yes/No columns
+            # would be sniffed as BOOLEAN, so CSV columns are only ever numbers or text. Compact
+            # ids in a snapshot are turned back into the student_id and email text columns.
+            reader = "read_parquet(?)"
+            if extension == ".csv":
+                reader = "read_csv(?, auto_type_candidates = ['BIGINT', 'DOUBLE', 'VARCHAR'])"
+            select = "*"
+            if extension == ".parquet":
+                from snapshot import snapshot_columns
+
+                select = ", ".join(
+                    f"'S' || {ID_COLUMN} AS student_id, 'student' || ({ID_COLUMN} - 1000) || '@university.com' AS email"
+                    if column == ID_COLUMN else _quote(column)
+                    for column in snapshot_columns(self.source)
+                )
+            self.execute(f"CREATE TABLE {TABLE} AS SELECT {select} FROM {reader}", [self.source])
+        else:
+            from ingest import read_chunks
+
+            chunks = read_chunks(self.source) if extension == ".csv" else [expand_ids(read_students(self.source))]
+            for chunk in chunks:
+                self._insert(chunk)
+        self.execute("DELETE FROM dashboard_meta WHERE key = 'source'")
+        self.execute("INSERT INTO dashboard_meta VALUES ('source', ?)", [signature])
+
+    def _ids_follow_pattern(self):
+        # Whether every student_id is "S<n>" with the email derived from the same n, as in a table
+        # whose ids the pandas store keeps compact (and so sorts by number).
+        number = f"{'TRY_CAST' if self.dialect == 'duckdb' else 'CAST'}(substr(\"student_id\", 2) AS BIGINT)"
+        matches = (
+            f"\"student_id\" = 'S' || {number} AND \"email\" = 'student' || ({number} - 1000) || '@university.com'"
+        )
+        counts = self.query(f"SELECT count(*), sum(CASE WHEN {matches} THEN 0 ELSE 1 END) FROM {TABLE}").iloc[0]
+        return bool(counts.iloc[0]) and not counts.iloc[1]
+
+    def sort_expression(self, column):
+        # Ids sort by their number while every id follows the pattern, as the pandas table sorts them.
+        if column in ID_COLUMNS and self.numeric_ids:
+            return "CAST(substr(\"student_id\", 2) AS BIGINT)"
+        return _quote(column)
+
+    @staticmethod
+    def _plain(rows):
+        # Categories and strings (Arrow-backed ones included) go in as plain text, and small integers
+        # are widened so products in SQL cannot overflow.
+        return rows.astype({
+            column: "object" if rows[column].dtype in ("category", "string") else "int64"
+            for column in rows.columns
+            if rows[column].dtype in ("category", "string") or rows[column].dtype.kind == "i"
+        })
+
+    def _insert(self, rows):
+        rows = self._plain(rows)
+        with self.pool.connection() as connection:
+            if self.dialect == "duckdb":
+                connection.register("incoming", rows)
+                exists = connection.execute(
+                    "SELECT count(*) FROM information_schema.tables WHERE table_name = ?", [TABLE]
+                ).fetchone()[0]
+                verb = f"INSERT INTO {TABLE}" if exists else f"CREATE TABLE {TABLE} AS"
+                connection.execute(f"{verb} SELECT * FROM incoming")
+                connection.unregister("incoming")
+            else:
+                rows.to_sql(TABLE, connection, if_exists="append", index=False)
+                connection.commit()
+
+    def values(self, column):
+        return self.query(f"SELECT DISTINCT {_quote(column)} FROM {TABLE} ORDER BY 1").iloc[:, 0].astype(str).tolist()
+
+    def select(self, selection, columns=None):
+        projection = ", ".join(_quote(column) for column in columns) if columns else "*"
+        where, params = where_clause(selection)
+        return self.query(f"SELECT {projection} FROM {TABLE}{where}", params)
+
+    def top(self, selection, column, k=5, columns=None, ascending=False):
+        projection = ", ".join(_quote(c) for c in columns) if columns else "*"
+        where, params = where_clause(selection)
+        order = "ASC" if ascending else "DESC"
+        return self.query(f"SELECT {projection} FROM {TABLE}{where} ORDER BY {_quote(column)} {order}, rowid LIMIT ?", [*params, k])
+
+    def leaderboard(self, selection, by, column, k=5, columns=None, ascending=False):
+        # One window query: rows numbered within each value of `by`, the first k of each kept.
+        projection = ", ".join(_quote(c) for c in [*(c for c in columns or self.columns if c != by), by])
+        where, params = where_clause(selection)
+        order = "ASC" if ascending else "DESC"
+        return self.query(
+            f"SELECT * FROM (SELECT {projection}, row_number() OVER "
+            f"(PARTITION BY {_quote(by)} ORDER BY {_quote(column)} {order}, rowid) AS rank "
+            f"FROM {TABLE}{where}{' AND' if where else ' WHERE'} {_quote(column)} IS NOT NULL) AS ranked "
+            f"WHERE rank <= ? ORDER BY {_quote(by)}, rank",
+            [*params, k],
+        )
+
+    @staticmethod
+    def _exact(text):
+        # Rows whose student_id or email is exactly `text`, through the column indexes.
+        text = text.strip()
+        return 'WHERE "student_id" IN (?, ?) OR "email" = ?', [text, text.upper(), text.lower()]
+
+    def percentile_rank(self, student_id, selection=None, column="total_score"):
+        # By id or email, like PandasBackend; a repeated id ranks its first row.
+        where, params = self._exact(student_id)
+        value = self.query(f"SELECT {_quote(column)} FROM {TABLE} {where} ORDER BY rowid LIMIT 1", params)
+        if not len(value):
+            return None
+        where, params = where_clause(selection or {})
+        return self.query(
+            f"SELECT 100.0 * sum(CASE WHEN {_quote(column)} <= ? THEN 1 ELSE 0 END) / count({_quote(column)}) "
+            f"FROM {TABLE}{where}",
+            [float(value.iloc[0, 0]), *params],
+        ).iloc[0, 0]
+
+    def lookup(self, text, limit=20, columns=None):
+        # Every exact id/email match through the column indexes, else names with a word starting with text.
+        projection = ", ".join(_quote(c) for c in columns) if columns else "*"
+        text = text.strip()
+        if not text:
+            return self.query(f"SELECT {projection} FROM {TABLE} LIMIT 0"), 0
+        where, params = self._exact(text)
+        total = int(self.query(f"SELECT count(*) FROM {TABLE} {where}", params).iloc[0, 0])
+        if total:
+            return self.query(f"SELECT {projection} FROM {TABLE} {where} ORDER BY rowid LIMIT ?", [*params, limit]), total
+        prefix = text.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where = "WHERE lower(\"full_name\") LIKE ? ESCAPE '\\' OR lower(\"full_name\") LIKE ? ESCAPE '\\'"
+        params = [f"{prefix}%", f"% {prefix}%"]
+        total = int(self.query(f"SELECT count(*) FROM {TABLE} {where}", params).iloc[0, 0])
+        return self.query(f"SELECT {projection} FROM {TABLE} {where} ORDER BY rowid LIMIT ?", [*params, limit]), total
+
+    def table_rows(self, selection, sort_by=None, ascending=True, search=None):
+        return SQLRowSet(self, selection, sort_by, ascending, search)
+
+    def clear_cache(self):
+        with self.lock:
+            self._summaries.clear()
+
+    def summary(self, selection):
+        key = (self.version, normalize_selection(selection))
+        with self.lock:
+            if key in self._summaries:
+                self._summaries.move_to_end(key)
+                return self._summaries[key]
+        summary = self._summarize(selection)
+        with self.lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > self._cache_size:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def _summarize(self, selection):
+        where, params = where_clause(selection)
+        # avg() of no rows is NULL; as floats they become NaN, like the pandas averages.
+        averages = self.query(
+            "SELECT count(*) AS n, " + ", ".join(f"avg({_quote(c)}) AS {_quote(c)}" for c in AVERAGE_COLUMNS.values())
+            + f" FROM {TABLE}{where}",
+            params,
+        ).iloc[0].astype("float64")
+        value_counts = {
+            column: self.query(
+                f"SELECT {_quote(column)} AS value, count(*) AS count FROM {TABLE}{where} GROUP BY 1 ORDER BY 2 DESC",
+                params,
+            ).set_index("value")["count"].rename_axis(column)
+            for column in COUNT_COLUMNS
+        }
+        attendance_per_dept = self.query(
+            f'SELECT "department", avg("attendance") AS "attendance" FROM {TABLE}{where} GROUP BY 1 ORDER BY 1',
+            params,
+        )
+        grade_distribution = (
+            self.query(
+                f'SELECT "parent_education_level", "grade", count(*) AS n FROM {TABLE}{where} GROUP BY 1, 2',
+                params,
+            )
+            .pivot(index="parent_education_level", columns="grade", values="n")
+            .fillna(0).astype("int64").sort_index().sort_index(axis=1).reset_index()
+        )
+        x, y, by = (_quote(column) for column in TRENDLINE)
+        sums = self.query(
+            f"SELECT {by} AS g, count(*) AS n, sum({x}) AS sx, sum({y}) AS sy, sum({x} * {y}) AS sxy, "
+            f"sum({x} * {x}) AS sxx, sum({y} * {y}) AS syy FROM {TABLE}{where} GROUP BY 1",
+            params,
+        )
+        trendlines = {
+            row.g: OLSStats(row.n, row.sx, row.sy, row.sxy, row.sxx, row.syy).fit()
+            for row in sums.itertuples(index=False)
+        }
+        return Summary(
+            count=int(averages["n"]),
+            averages=MappingProxyType({label: averages[column] for label, column in AVERAGE_COLUMNS.items()}),
+            numerical=self._describe(where, params),
+            categorical=self._describe_categorical(where, params),
+            value_counts=MappingProxyType(value_counts),
+            attendance_per_dept=attendance_per_dept,
+            grade_distribution=grade_distribution,
+            trendlines=MappingProxyType(trendlines),
+            box_stats=self._box_stats(where, params),
+            quantile_error=0.0,
+        )
+
+    def _describe(self, where, params):
+        if self.dialect == "sqlite":
+            return self.query(f"SELECT {', '.join(map(_quote, NUMERIC_COLUMNS))} FROM {TABLE}{where}", params).describe()
+        expressions = []
+        for column in NUMERIC_COLUMNS:
+            c = _quote(column)
+            expressions += [
+                f"count({c})", f"avg({c})", f"stddev_samp({c})", f"min({c})",
+                f"quantile_cont({c}, 0.25)", f"quantile_cont({c}, 0.5)", f"quantile_cont({c}, 0.75)", f"max({c})",
+            ]
+        values = self.query(f"SELECT {', '.join(expressions)} FROM {TABLE}{where}", params).to_numpy(dtype="float64")
+        return pd.DataFrame(
+            values.reshape(len(NUMERIC_COLUMNS), 8).T,
+            index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"],
+            columns=NUMERIC_COLUMNS,
+        )
+
+    def _describe_categorical(self, where, params):
+        described = {}
+        for column in self.columns:
+            if column in NUMERIC_COLUMNS:
+                continue
+            c = _quote(column)
+            top = self.query(
+                f"SELECT {c} AS top, count(*) AS freq, sum(count(*)) OVER () AS total, count(*) OVER () AS uniq "
+                f"FROM {TABLE}{where} GROUP BY 1 ORDER BY 2 DESC LIMIT 1",
+                params,
+            )
+            if len(top):
+                row = top.iloc[0]
+                described[column] = {"count": int(row["total"]), "unique": int(row["uniq"]), "top": row["top"], "freq": int(row["freq"])}
+        return pd.DataFrame(described, index=["count", "unique", "top", "freq"], dtype=object)
+
+    def _box_stats(self, where, params):
+        x, y, color = BOX
+        if self.dialect == "sqlite":
+            rows = self.query(f"SELECT {_quote(x)}, {_quote(color)}, {_quote(y)} FROM {TABLE}{where}", params)
+            return box_stats_from_quartiles(rows.groupby([x, color])[y].describe(), [x, color])
+        quartiles = self.query(
+            f"SELECT {_quote(x)}, {_quote(color)}, count({_quote(y)}) AS \"count\", min({_quote(y)}) AS \"min\", "
+            f"quantile_cont({_quote(y)}, 0.25) AS \"25%\", quantile_cont({_quote(y)}, 0.5) AS \"50%\", "
+            f"quantile_cont({_quote(y)}, 0.75) AS \"75%\", max({_quote(y)}) AS \"max\" "
+            f"FROM {TABLE}{where} GROUP BY 1, 2 ORDER BY 1, 2",
+            params,
+        )
+        return box_stats_from_quartiles(quartiles.set_index([x, color]), [x, color])
+
+    def corr(self, selection, columns=None, method="pearson"):
+        columns = list(columns or NUMERIC_COLUMNS)
+        where, params = where_clause(selection)
+        if method == "spearman":
+            # Rank correlation of exactly the selected rows; only the chosen columns are fetched.
+            return self.select(selection, columns).corr(method="spearman")
+        quoted = [_quote(column) for column in columns]
+        pairs = [(i, j) for i in range(len(columns)) for j in range(i, len(columns))]
+        sums = self.query(
+            "SELECT count(*), " + ", ".join(f"sum({c})" for c in quoted) + ", "
+            + ", ".join(f"sum({quoted[i]} * {quoted[j]})" for i, j in pairs) + f" FROM {TABLE}{where}",
+            params,
+        ).to_numpy(dtype="float64")[0]
+        n, means = sums[0], sums[1:len(columns) + 1] / sums[0]
+        gram = np.zeros((len(columns), len(columns)))
+        for (i, j), value in zip(pairs, sums[len(columns) + 1:]):
+            gram[i, j] = gram[j, i] = value
+        covariance = gram / n - np.outer(means, means)
+        std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            matrix = np.clip(covariance / np.outer(std, std), -1, 1)
+        return pd.DataFrame(matrix, index=columns, columns=columns)
+
+    def compare(self, cohorts, columns=None, method="pearson"):
+        # Counts, averages and grade mix of every cohort in one scan each, a CASE per cohort; cohorts
+        # may overlap, so they cannot share a GROUP BY. Correlations reuse corr() per cohort.
+        labels = cohort_labels(cohorts)
+        conditions = []
+        for cohort in cohorts:
+            where, params = where_clause(cohort)
+            conditions.append((where.removeprefix(" WHERE ") or "1 = 1", params))
+        with span("compare cohorts"):
+            selects, params = [], []
+            for condition, values in conditions:
+                selects.append(f"sum(CASE WHEN {condition} THEN 1 ELSE 0 END)")
+                params.extend(values)
+            for column in AVERAGE_COLUMNS.values():
+                for condition, values in conditions:
+                    selects.append(f"avg(CASE WHEN {condition} THEN {_quote(column)} END)")
+                    params.extend(values)
+            row = self.query(
+                "SELECT " + ", ".join(f"{select} AS c{i}" for i, select in enumerate(selects)) + f" FROM {TABLE}",
+                params,
+            ).to_numpy(dtype="float64")[0]
+            counts = pd.Series(np.nan_to_num(row[:len(labels)]).round().astype("int64"), index=labels)
+            averages = pd.DataFrame(
+                row[len(labels):].reshape(len(AVERAGE_COLUMNS), len(labels)), index=list(AVERAGE_COLUMNS), columns=labels
+            )
+
+            grade_params = [value for _, values in conditions for value in values]
+            grades = self.query(
+                'SELECT "grade", '
+                + ", ".join(f"sum(CASE WHEN {condition} THEN 1 ELSE 0 END) AS c{k}" for k, (condition, _) in enumerate(conditions))
+                + f' FROM {TABLE} GROUP BY 1 ORDER BY 1',
+                grade_params,
+            ).set_index("grade").rename_axis(None)
+            grade_distribution = grades.set_axis(labels, axis=1).fillna(0).astype("int64")
+            grade_distribution.index = grade_distribution.index.astype(str)
+
+            correlations = {label: self.corr(cohort, columns, method) for label, cohort in zip(labels, cohorts)}
+        return Comparison(labels, counts, averages, grade_distribution, correlations)
+
+    def upsert(self, rows, batch=None):
+        # Rows replace the stored row with the same student_id, the last one winning within a batch.
+        # Deletes and inserts commit as one transaction on one connection, so a concurrent reader
+        # never sees a student missing.
+        with self.lock:
+            received = rows
+            rows = rows.drop_duplicates("student_id", keep="last")
+            ids = rows["student_id"].astype(str).tolist()
+            existing = 0
+            with self.pool.connection() as connection:
+                connection.execute("BEGIN TRANSACTION")
+                try:
+                    for start in range(0, len(ids), MAX_PARAMETERS):
+                        chunk = ids[start:start + MAX_PARAMETERS]
+                        where = f"WHERE student_id IN ({', '.join('?' * len(chunk))})"
+                        existing += connection.execute(f"SELECT count(*) FROM {TABLE} {where}", chunk).fetchone()[0]
+                        connection.execute(f"DELETE FROM {TABLE} {where}", chunk)
+                    self._append(connection, self._plain(rows[self.columns]))
+                    connection.commit()
+                except BaseException:
+                    connection.rollback()
+                    raise
+            if self.numeric_ids and ID_COLUMN not in compact_ids(rows):
+                self.numeric_ids = False
+            if batch is not None:
+                self.applied.add(batch)
+            self.version = batch_version(self.version, received)
+            return int(existing), len(ids) - int(existing)
+
+    def _append(self, connection, rows):
+        # Inserts into the existing table without committing; pandas' to_sql would commit on SQLite.
+        if self.dialect == "duckdb":
+            connection.register("incoming", rows)
+            connection.execute(f"INSERT INTO {TABLE} SELECT * FROM incoming")
+            connection.unregister("incoming")
+        else:
+            connection.executemany(
+                f"INSERT INTO {TABLE} ({', '.join(map(_quote, rows.columns))}) "
+                f"VALUES ({', '.join('?' * len(rows.columns))})",
+                zip(*(rows[column].tolist() for column in rows.columns)),
+            )
+
+
+class SQLRowSet:
+    def __init__(self, backend, selection, sort_by, ascending, search):
+        self.backend = backend
+        self.where, self.params = where_clause(selection, search)
+        # rowid breaks ties, so LIMIT/OFFSET pages never repeat or skip rows; it follows the sort
+        # direction, as the pandas table reverses ties when descending.
+        direction = "ASC" if ascending else "DESC"
+        self.order = f"{backend.sort_expression(sort_by)} {direction}, rowid {direction}" if sort_by else "rowid"
+        self.total = int(backend.query(f"SELECT count(*) FROM {TABLE}{self.where}", self.params).iloc[0, 0])
+
+    def page(self, page=1, page_size=50, columns=None):
+        projection = ", ".join(_quote(column) for column in columns) if columns else "*"
+        return self.backend.query(
+            f"SELECT {projection} FROM {TABLE}{self.where} ORDER BY {self.order} LIMIT ? OFFSET ?",
+            [*self.params, page_size, (page - 1) * page_size],
+        )
@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+
+from data import NUMERIC_COLUMNS, clear_cache, load_students
+from synthetic import Profile, write
+
+SIZES = [10_000, 1_000_000, 10_000_000]
+
+# Sidebar states worth timing: one gender only, a department pair, and a narrow three-way filter.
+SCENARIOS = {
+    "gender": {"gender": "Male"},
+    "departments": {"gender": "Female", "department": ["CS", "Business"]},
+    "narrow": {"gender": "Male", "department": ["Mathematics"], "age_group": ["18-20"]},
+}
+
+# Terms of the partitioned store, each holding an equal share of the rows.
+TERMS = ["2023-Spring", "2023-Fall", "2024-Spring", "2024-Fall"]
+
+# A stage only counts as a regression when it is both this much slower and slower by NOISE_MS.
+TOLERANCE = 1.25
+NOISE_MS = 5.0
+
+
+def peak_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def timed(function, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def dataset(rows, directory, fmt):
+    path = os.path.join(directory, f"students_{rows}.{fmt}")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        write(path, rows, Profile.from_csv())
+    return path
+
+
+def partitioned(rows, directory):
+    from partitions import MANIFEST, Manifest
+
+    root = os.path.join(directory, f"partitions_{rows}")
+    manifest = Manifest(root)
+    if not os.path.exists(os.path.join(root, MANIFEST)):
+        profile, per_term = Profile.from_csv(), rows // len(TERMS)
+        for index, term in enumerate(TERMS):
+            manifest.add(term, profile.sample(per_term, index * per_term, seed=index))
+        manifest.save()
+    return manifest
+
+
+def tab_figures(backend, summary, selection):
+    # The figures each tab builds, with the same chart helpers and inputs as University.py.
+    from charts import (
+        DEPARTMENT_COLORS,
+        GRADE_COLORS,
+        add_trendlines,
+        bar_chart,
+        box_chart,
+        grouped_bar_chart,
+        heatmap_chart,
+        pie_chart,
+        scatter_chart,
+    )
+
+    def departments():
+        counts = summary.value_counts
+        attendance = summary.attendance_per_dept
+        return [
+            bar_chart(counts["department"].index, counts["department"].values, "Departments", color_map=DEPARTMENT_COLORS),
+            pie_chart(counts["grade"].index, counts["grade"].values, "Grades", color_map=GRADE_COLORS, hole=0.5),
+            bar_chart(attendance["department"], attendance["attendance"], "Attendance", color_map=DEPARTMENT_COLORS),
+        ]
+
+    def performance():
+        figures = []
+        for ascending in (False, True):
+            ranked = backend.top(selection, "total_score", 5, ["full_name", "total_score"], ascending=ascending)
+            figures.append(bar_chart(ranked["full_name"], ranked["total_score"], "Ranked", orientation="h"))
+        backend.leaderboard(selection, "department", "total_score", 5, ["student_id", "full_name", "total_score"])
+        for column in ("extracurricular_activities", "internet_access_at_home"):
+            counts = summary.value_counts[column]
+            figures.append(pie_chart(counts.index, counts.values, column))
+        distribution = summary.grade_distribution
+        figures.append(grouped_bar_chart(
+            distribution, "parent_education_level", distribution.columns[1:], "Grades",
+            palette=["#004e64", "#00a5cf", "#7209b7", "#25a18e", "#7ae582"],
+        ))
+        return figures
+
+    def correlation():
+        rows = backend.select(selection, ["study_hours_per_week", "total_score", "final_score", "quizzes_avg", "gender", "grade"])
+        scatter = scatter_chart(rows, "study_hours_per_week", "total_score", "Study hours", color="gender", strata=["gender", "grade"])
+        study_hours = summary.numerical["study_hours_per_week"]
+        add_trendlines(scatter, summary.trendlines, (study_hours["min"], study_hours["max"]))
+        return [
+            heatmap_chart(backend.corr(selection, NUMERIC_COLUMNS).round(2), "Correlation"),
+            scatter,
+            scatter_chart(rows, "final_score", "quizzes_avg", "Quizzes", color="gender", size="study_hours_per_week", strata=["gender", "grade"]),
+            box_chart(summary.box_stats, "parent_education_level", "gender", "Box", y_title="total_score"),
+        ]
+
+    return {"departments": departments, "performance": performance, "correlation": correlation}
+
+
+def serialize(figures):
+    # What st.plotly_chart sends: each figure dict encoded by plotly (orjson when installed).
+    import plotly.io as pio
+
+    return [pio.to_json(figure, validate=False) for figure in figures]
+
+
+def open_backend(path, engine):
+    from backends import PandasBackend, SQLBackend
+    from store import StudentStore
+
+    if engine != "pandas":
+        return {}, SQLBackend(path, engine=engine)
+    clear_cache()
+    stages = {}
+    stages["load"], df = timed(lambda: load_students(path), 1)
+    stages["index"], store = timed(lambda: StudentStore(df), 1)
+    return stages, PandasBackend(store)
+
+
+def run(rows, engine="pandas", directory="bench-data", fmt="feather", repeat=3):
+    path = dataset(rows, directory, fmt)
+    results = []
+
+    def record(scenario, stage, ms):
+        results.append({"rows": rows, "backend": engine, "scenario": scenario, "stage": stage, "ms": round(ms, 2), "peak_mb": round(peak_mb(), 1)})
+
+    start = time.perf_counter()
+    stages, backend = open_backend(path, engine)
+    if not stages:
+        # The SQL backends load (or reuse) their database file on construction.
+        stages = {"load": (time.perf_counter() - start) * 1000}
+    for stage, ms in stages.items():
+        record("-", stage, ms)
+
+    for scenario, selection in SCENARIOS.items():
+        record(scenario, "filter", timed(lambda: backend.select(selection), repeat)[0])
+
+        def fresh_summary():
+            backend.clear_cache()
+            return backend.summary(selection)
+
+        ms, summary = timed(fresh_summary, repeat)
+        record(scenario, "summary", ms)
+        for method in ("pearson", "spearman"):
+            record(scenario, f"correlation {method}", timed(lambda: backend.corr(selection, NUMERIC_COLUMNS, method), repeat)[0])
+        record(scenario, "table page", timed(
+            lambda: backend.table_rows(selection, "total_score", False).page(1, 50), repeat,
+        )[0])
+        for tab, build in tab_figures(backend, summary, selection).items():
+            record(scenario, f"tab {tab}", timed(lambda: serialize(build()), repeat)[0])
+    # Every scenario as a cohort of the comparison tab, answered together.
+    record("-", "compare cohorts", timed(lambda: backend.compare(list(SCENARIOS.values())), repeat)[0])
+    if engine == "pandas":
+        # The same rows split by term and department: reads scale with the terms asked for.
+        manifest = partitioned(rows, directory)
+        record("-", "read 1 term", timed(lambda: manifest.read(TERMS[-1:]), repeat)[0])
+        record("-", f"read {len(TERMS)} terms", timed(lambda: manifest.read(TERMS), repeat)[0])
+        record("-", "read 1 term, 1 department", timed(lambda: manifest.read(TERMS[-1:], {"department": ["CS"]}), repeat)[0])
+        record("-", "term trends", timed(lambda: manifest.trends("total_score", SCENARIOS["narrow"]), repeat)[0])
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    reference = {(r["rows"], r["backend"], r["scenario"], r["stage"]): r["ms"] for r in baseline}
+    regressions = []
+    for result in results:
+        before = reference.get((result["rows"], result["backend"], result["scenario"], result["stage"]))
+        if before is not None and result["ms"] > before * tolerance and result["ms"] - before > NOISE_MS:
+            regressions.append({**result, "baseline_ms": before})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time load, filters, aggregation and figures headlessly on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--backend", default="pandas", choices=["pandas", "duckdb", "sqlite"])
+    parser.add_argument("--format", default="feather", choices=["feather", "parquet", "csv"])
+    parser.add_argument("--data-dir", default="bench-data", help="generated datasets are kept here between runs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = []
+    for rows in sorted(args.rows):
+        results.extend(run(rows, args.backend, args.data_dir, args.format, args.repeat))
+        for result in results:
+            if result["rows"] == rows:
+                print(f"{rows:>10} {result['scenario']:<12} {result['stage']:<22} {result['ms']:>10.1f} ms {result['peak_mb']:>8.0f} MB")
+
+    # Timings are specific to the machine, so the baseline is kept locally: the first run writes it.
+    if args.save_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=1)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    with open(args.baseline) as file:
+        regressions = compare(results, json.load(file), args.tolerance)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['rows']} {regression['backend']} {regression['scenario']} {regression['stage']}: "
+            f"{regression['baseline_ms']:.1f} -> {regression['ms']:.1f} ms"
+        )
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+import threading
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.basedatatypes import BaseFigure
+from plotly.colors import make_colorscale, sequential
+
+from sampling import density_grid, stratified_sample
+
+DEPARTMENT_COLORS = {
+    "CS": "#00008B",
+    "Engineering": "#4B0082",
+    "Business": "#8000B0",
+    "Mathematics": "#C71585",
+}
+
+GRADE_COLORS = {
+    "A": "#00008B",
+    "B": "#4B0082",
+    "C": "#8000B0",
+    "D": "#C71585",
+}
+
+DEFAULT_COLOR = "#00008B"
+
+TITLE_FONT = dict(size=24, family="Arial", color="black")
+
+BOLD_FONT = dict(family="Arial", color="black", weight="bold")
+
+BAR_LAYOUT = dict(
+    yaxis=dict(showticklabels=False, title=None, showgrid=False),
+    xaxis=dict(
+        tickfont=dict(size=14, **BOLD_FONT),
+        showgrid=False,
+        tickangle=0,
+        showline=True,
+        linecolor="gray",
+        linewidth=1,
+    ),
+    plot_bgcolor="white",
+    width=900,
+    height=500,
+    margin=dict(l=50, r=50, t=100, b=50),
+    bargap=0.15,
+)
+
+BAR_TEXT_FONT = dict(size=16, family="Arial", color="white", weight="bold")
+
+AXIS_LAYOUT = dict(
+    xaxis_title_font=dict(size=17),
+    yaxis_title_font=dict(size=17),
+    xaxis=dict(showgrid=False),
+    yaxis=dict(showgrid=False),
+)
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def template(key, build):
+    # Layout and styling per chart kind, built through plotly's validated objects the first time a
+    # key is seen and shared as a plain dict afterwards. Keys hold only styling, never titles or
+    # data, so the dict stays as small as the set of charts; titles are patched in by titled().
+    key = repr(key)
+    with _templates_lock:
+        if key not in _templates:
+            _templates[key] = build()
+        return _templates[key]
+
+
+def clear_templates():
+    with _templates_lock:
+        _templates.clear()
+
+
+def trace(kind, **properties):
+    # A trace as a plain dict; unset (None or empty) properties are left out, as plotly itself does.
+    def clean(values):
+        values = {name: clean(value) if isinstance(value, dict) else value for name, value in values.items()}
+        return {name: value for name, value in values.items() if value is not None and not (isinstance(value, dict) and not value)}
+
+    return {"type": kind, **clean(properties)}
+
+
+def titled(layout, title, **updates):
+    # A copy of a shared template layout with this figure's title text and any per-figure layout
+    # values; the template itself is never modified.
+    layout = {**layout, **updates}
+    if title is not None:
+        layout["title"] = {**layout.get("title", {}), "text": title}
+    return layout
+
+
+def figure(traces, layout):
+    return {"data": list(traces), "layout": layout}
+
+
+class PreparedFigure(BaseFigure):
+    # Wraps a figure dict from these helpers for st.plotly_chart, which only calls to_dict() on plotly
+    # figures, so the dict is serialized (with orjson when installed) without being rebuilt and revalidated.
+
+    def __init__(self, spec):
+        self._spec = spec
+
+    def to_dict(self):
+        return self._spec
+
+
+def style(fig, title, legend_size=17, legend_font=None, **layout):
+    # Shared title/legend template; callers pass only what differs per chart.
+    fig.update_layout(
+        title=dict(text=title, x=0.5, xanchor="center"),
+        title_font=TITLE_FONT,
+        legend=dict(font=legend_font or dict(size=legend_size, **BOLD_FONT)),
+    )
+    fig.update_layout(**layout)
+    return fig
+
+
+def styled_layout(title, *updates, **kwargs):
+    # The layout dict of an empty figure passed through style() and then each update, in order.
+    fig = style(go.Figure(), title, **kwargs)
+    for update in updates:
+        fig.update_layout(**update)
+    return fig.layout.to_plotly_json()
+
+
+def point_colors(categories, color_map=None, sequence=None):
+    if color_map is not None:
+        return [color_map.get(category, DEFAULT_COLOR) for category in categories]
+    if sequence is not None:
+        return [sequence[i % len(sequence)] for i in range(len(categories))]
+    return None
+
+
+def bar_chart(categories, values, title, color_map=None, sequence=None, text=None, orientation="v", labels=None, **layout):
+    # One trace for every bar; per-bar colors go in the marker array instead of one trace per bar.
+    categories, values = list(categories), list(values)
+    x, y = (categories, values) if orientation == "v" else (values, categories)
+    bar = trace(
+        "bar",
+        x=x,
+        y=y,
+        orientation=orientation,
+        text=[str(value) for value in (values if text is None else text)],
+        textposition="inside",
+        textfont=BAR_TEXT_FONT,
+        marker=dict(color=point_colors(categories, color_map, sequence), line=dict(width=0)),
+        width=0.7 if orientation == "v" else 0.6,
+        showlegend=False,
+    )
+
+    def build():
+        if orientation == "v":
+            return styled_layout(None, dict(title_y=0.9, title_yanchor="top"), layout, **BAR_LAYOUT)
+        axis_labels = labels or {}
+        return styled_layout(
+            None,
+            layout,
+            xaxis_title=axis_labels.get("x"),
+            yaxis=dict(title=axis_labels.get("y"), tickfont=dict(size=14, **BOLD_FONT), autorange="reversed"),
+        )
+
+    return figure([bar], titled(template(("bar", orientation, labels, layout), build), title))
+
+
+def grouped_bar_chart(frame, x, series, title, palette, legend_title=None, labels=None, **layout):
+    labels = labels or {}
+    bars = [
+        trace(
+            "bar",
+            x=frame[x],
+            y=frame[name],
+            name=str(name),
+            text=frame[name],
+            marker=dict(color=palette[i % len(palette)]),
+            hovertemplate=f"{labels.get(x, x)}=%{{x}}<br>{labels.get('value', 'value')}=%{{y}}<extra>{name}</extra>",
+        )
+        for i, name in enumerate(series)
+    ]
+    return figure(bars, titled(template(("grouped_bar", legend_title, layout), lambda: styled_layout(
+        None,
+        dict(title_y=0.9, title_yanchor="top", barmode="group", showlegend=True, legend_title=dict(text=legend_title)),
+        layout,
+        **BAR_LAYOUT,
+    )), title))
+
+
+def line_chart(frame, title, color_map=None, labels=None, **layout):
+    # One line per column of frame, plotted over its index.
+    labels = labels or {}
+    lines = [
+        trace(
+            "scatter",
+            x=list(frame.index),
+            y=frame[name].tolist(),
+            name=str(name),
+            mode="lines+markers",
+            line=dict(color=(color_map or {}).get(name), width=3),
+            marker=dict(size=8),
+        )
+        for name in frame.columns
+    ]
+    return figure(lines, titled(template(("line", labels, layout), lambda: styled_layout(
+        None,
+        dict(
+            title_y=0.95,
+            xaxis_title=labels.get("x"),
+            yaxis_title=labels.get("y"),
+            legend_title=dict(text=labels.get("color")),
+            plot_bgcolor="white",
+        ),
+        layout,
+        **AXIS_LAYOUT,
+    )), title))
+
+
+def pie_chart(names, values, title, color_map=None, sequence=None, hole=0, textfont=None, textinfo=None, annotation=None, **layout):
+    names = list(names)
+    pie = trace(
+        "pie",
+        labels=names,
+        values=list(values),
+        hole=hole,
+        marker=dict(colors=point_colors(names, color_map, sequence)),
+        textfont=textfont,
+        textinfo=textinfo,
+        sort=False,
+    )
+
+    def build():
+        annotations = [dict(font=dict(size=20, **BOLD_FONT), showarrow=False, text=annotation, x=0.5, y=-0.1)]
+        return styled_layout(None, dict(annotations=annotations) if annotation else {}, layout)
+
+    return figure([pie], titled(template(("pie", annotation, layout), build), title))
+
+
+def box_chart(stats, x, color, title, y_title=None, labels=None, **layout):
+    # Boxes drawn from precomputed quartiles and fences; no raw values go into the figure.
+    labels = labels or {}
+    boxes = [
+        trace(
+            "box",
+            x=group[x],
+            q1=group["q1"],
+            median=group["median"],
+            q3=group["q3"],
+            lowerfence=group["lowerfence"],
+            upperfence=group["upperfence"],
+            name=str(value),
+            legendgroup=str(value),
+            offsetgroup=str(value),
+        )
+        for value, group in stats.groupby(color, sort=True)
+    ]
+    return figure(boxes, titled(template(("box", x, color, y_title, labels, layout), lambda: styled_layout(
+        None,
+        dict(
+            title_y=0.95,
+            title_yanchor="bottom",
+            boxmode="group",
+            legend_title_text=labels.get(color, color),
+            xaxis_title=labels.get(x, x),
+            yaxis_title=y_title,
+        ),
+        layout,
+        legend_font=dict(size=17, family="Arial Black"),
+        **AXIS_LAYOUT,
+    )), title))
+
+
+GENDER_COLORS = {
+    "Male": "purple",
+    "Female": "blue",
+}
+
+POINT_BUDGET = 20_000
+
+WEBGL_THRESHOLD = 5_000
+
+
+def scatter_chart(df, x, y, title, color=None, color_map=None, size=None, budget=POINT_BUDGET, mode="points", strata=None, bins=60, **layout):
+    # Bounded payload: sample to the point budget, switch to WebGL for big traces, or bin server-side.
+    if mode == "density":
+        x_centers, y_centers, counts = density_grid(df[x], df[y], bins)
+        traces = [trace("heatmap", x=x_centers, y=y_centers, z=counts, colorscale=make_colorscale(sequential.Blues), colorbar=dict(title=dict(text="Students")))]
+    else:
+        points = stratified_sample(df, strata or [color], budget)
+        kind = "scattergl" if len(points) > WEBGL_THRESHOLD else "scatter"
+        groups = points.groupby(color, observed=True) if color else [(None, points)]
+        sizeref = 2.0 * df[size].max() / 20**2 if size else None
+        traces = [
+            trace(
+                kind,
+                x=group[x],
+                y=group[y],
+                mode="markers",
+                name=str(value) if value is not None else y,
+                showlegend=value is not None,
+                marker=dict(
+                    color=(color_map or {}).get(value),
+                    size=group[size] if size else None,
+                    sizemode="area",
+                    sizeref=sizeref,
+                    sizemin=1,
+                ),
+            )
+            for value, group in groups
+        ]
+    legend = color if mode == "points" else None
+    return figure(traces, titled(template(("scatter", x, y, legend, layout), lambda: styled_layout(
+        None,
+        dict(legend_title_text=legend) if legend else {},
+        dict(title_y=0.95, title_yanchor="bottom", xaxis_title=x, yaxis_title=y),
+        layout,
+        legend_font=dict(size=17, family="Arial Black"),
+        **AXIS_LAYOUT,
+    )), title))
+
+
+def add_trendlines(fig, fits, x_range, color_map=None, band=True):
+    # Lines and confidence bands drawn from cached fits; no per-point regression on rerun.
+    x = np.linspace(x_range[0], x_range[1], 50)
+    for group, fit in fits.items():
+        if fit is None:
+            continue
+        color = (color_map or {}).get(group)
+        if band:
+            lower, upper = fit.band(x)
+            fig["data"].append(trace(
+                "scatter",
+                x=np.concatenate([x, x[::-1]]),
+                y=np.concatenate([upper, lower[::-1]]),
+                fill="toself",
+                fillcolor=color,
+                opacity=0.2,
+                line=dict(width=0),
+                hoverinfo="skip",
+                legendgroup=str(group),
+                showlegend=False,
+            ))
+        fig["data"].append(trace(
+            "scatter",
+            x=x,
+            y=fit.predict(x),
+            mode="lines",
+            name=f"{group} trend",
+            legendgroup=str(group),
+            line=dict(color=color),
+            hovertemplate=f"y = {fit.slope:.3f}x + {fit.intercept:.2f}<br>R² = {fit.r2:.4f}<extra>{group}</extra>",
+        ))
+    return fig
+
+
+def heatmap_chart(matrix, title, **layout):
+    # px.imshow runs once per layout; later matrices only replace the trace's x, y and z, and the title.
+    def build():
+        import plotly.express as px
+
+        fig = px.imshow(matrix, text_auto=True)
+        fig.update_traces(textfont=dict(size=10, **BOLD_FONT), texttemplate="%{z}")
+        axis = dict(title="Features", tickfont=dict(size=12, family="Arial", color="black"))
+        style(fig, None, xaxis=axis, yaxis=axis, plot_bgcolor="white", width=1200, height=600)
+        fig.update_layout(**layout)
+        spec = fig.to_plotly_json()
+        styling = {name: value for name, value in spec["data"][0].items() if name not in ("x", "y", "z")}
+        return styling, spec["layout"]
+
+    styling, heatmap_layout = template(("heatmap", layout), build)
+    cells = {"x": list(matrix.columns), "y": list(matrix.index), "z": matrix.to_numpy()}
+    return figure([{**styling, **cells}], titled(heatmap_layout, title))
+
+
+def timeline_chart(spans, title, **layout):
+    # Waterfall of one rerun: a bar per span from its start offset, nested spans indented.
+    spans = spans.sort_values("start_ms")
+    labels = [" " * depth + name for name, depth in zip(spans["span"], spans["depth"])]
+    bar = trace(
+        "bar",
+        x=spans["duration_ms"],
+        y=labels,
+        base=spans["start_ms"],
+        orientation="h",
+        marker=dict(color=DEFAULT_COLOR),
+        hovertemplate="%{y}: %{x:.1f} ms<extra></extra>",
+    )
+    height = 120 + 18 * len(spans)
+    return figure([bar], titled(template(("timeline", layout), lambda: styled_layout(
+        None,
+        layout,
+        title_font=dict(size=14),
+        xaxis_title="ms",
+        yaxis_autorange="reversed",
+        margin=dict(l=10, r=10, t=40, b=10),
+    )), title, height=height))
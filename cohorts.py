@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from aggregates import AVERAGE_COLUMNS
+from filters import normalize_selection
+
+# Dimensions a cohort is defined on, in the order they appear in its label.
+COHORT_DIMENSIONS = ["department", "gender", "age_group"]
+
+
+@dataclass(frozen=True)
+class Comparison:
+    labels: list
+    counts: pd.Series
+    averages: pd.DataFrame
+    grade_distribution: pd.DataFrame
+    correlations: dict
+
+
+def cohort_labels(cohorts):
+    # "CS-Female-18-20" style labels from the chosen values, "All" for an unconstrained cohort;
+    # repeated labels get a counter so every cohort keeps its own column.
+    labels = []
+    for cohort in cohorts:
+        chosen = dict(normalize_selection(cohort))
+        label = "-".join("+".join(chosen[column]) for column in COHORT_DIMENSIONS if column in chosen) or "All"
+        repeats = sum(existing == label or existing.startswith(f"{label} (") for existing in labels)
+        labels.append(f"{label} ({repeats + 1})" if repeats else label)
+    return labels
+
+
+def membership(cells, cohorts):
+    # cells x cohorts: whether each aggregate cell belongs to each cohort. Cohorts may overlap, so
+    # this takes the place of a single cohort-label column.
+    matrix = np.ones((len(cells), len(cohorts)), dtype=bool)
+    text = {}
+    for k, cohort in enumerate(cohorts):
+        for column, values in normalize_selection(cohort):
+            if column not in text:
+                text[column] = cells[column].astype(str).to_numpy()
+            matrix[:, k] &= np.isin(text[column], values)
+    return matrix
+
+
+def compare(cube, moments, cohorts, columns=None):
+    # Every cohort's averages, grade mix and correlation matrix from one pass over the cube cells
+    # and one over the co-moment cells: a matrix product per statistic instead of a filter per cohort.
+    labels = cohort_labels(cohorts)
+    cells = cube.cells
+    weights = membership(cells, cohorts).astype("float64").T
+    counts = weights @ cells["count"].to_numpy(dtype="float64")
+    sums = weights @ cells[[f"{column}_sum" for column in AVERAGE_COLUMNS.values()]].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        averages = pd.DataFrame((sums / counts[:, None]).T, index=list(AVERAGE_COLUMNS), columns=labels)
+
+    grades = cells["grade"].astype(str)
+    onehot = pd.get_dummies(grades).reindex(columns=sorted(grades.unique())).to_numpy(dtype="float64")
+    grade_counts = weights @ (onehot * cells["count"].to_numpy(dtype="float64")[:, None])
+    grade_distribution = pd.DataFrame(grade_counts.T, index=sorted(grades.unique()), columns=labels).round().astype("int64")
+
+    n, moment_sums, grams = moments.totals_by(membership(moments.cells, cohorts))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlations = {
+            label: moments.matrix(n[k], moment_sums[k], grams[k], columns) for k, label in enumerate(labels)
+        }
+    return Comparison(labels, pd.Series(counts.round().astype("int64"), index=labels), averages, grade_distribution, correlations)
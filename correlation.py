@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from cube import CUBE_DIMENSIONS
+from data import NUMERIC_COLUMNS
+from filters import normalize_selection
+
+# Share of the rows that may change before Spearman ranks are taken again from the whole table.
+SPEARMAN_DRIFT = 0.05
+
+
+class CoMoments:
+    # Per-cell n, column sums and cross-product matrices; any selection's correlation matrix is the
+    # merge of its cells, so filtering never goes back to the rows.
+
+    def __init__(self, cells, counts, sums, grams, columns):
+        self.cells = cells
+        self.counts = counts
+        self.sums = sums
+        self.grams = grams
+        self.columns = list(columns)
+
+    @classmethod
+    def from_frame(cls, df, dimensions=CUBE_DIMENSIONS, columns=NUMERIC_COLUMNS, sign=1):
+        codes = df.groupby(list(dimensions), observed=True, sort=False).ngroup().to_numpy()
+        order = np.argsort(codes, kind="stable")
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        starts = np.concatenate(([0], boundaries))
+        values = df[list(columns)].to_numpy(dtype="float64")[order]
+
+        cells = df[list(dimensions)].iloc[order[starts]].astype(str).reset_index(drop=True)
+        blocks = np.split(values, boundaries)
+        counts = np.array([len(block) for block in blocks], dtype="float64") * sign
+        sums = np.array([block.sum(axis=0) for block in blocks]) * sign
+        grams = np.array([block.T @ block for block in blocks]) * sign
+        return cls(cells, counts, sums, grams, columns)
+
+    def merge(self, other):
+        cells = pd.concat([self.cells, other.cells], ignore_index=True)
+        codes = cells.groupby(list(cells.columns), sort=False).ngroup().to_numpy()
+        size = codes.max() + 1
+        counts = np.zeros(size)
+        sums = np.zeros((size, len(self.columns)))
+        grams = np.zeros((size, len(self.columns), len(self.columns)))
+        np.add.at(counts, codes, np.concatenate([self.counts, other.counts]))
+        np.add.at(sums, codes, np.concatenate([self.sums, other.sums]))
+        np.add.at(grams, codes, np.concatenate([self.grams, other.grams]))
+        first = np.unique(codes, return_index=True)[1]
+        return CoMoments(cells.iloc[first].reset_index(drop=True), counts, sums, grams, self.columns)
+
+    def totals(self, selection=None):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, values in normalize_selection(selection or {}):
+            mask &= self.cells[column].isin(values).to_numpy()
+        return self.counts[mask].sum(), self.sums[mask].sum(axis=0), self.grams[mask].sum(axis=0)
+
+    def totals_by(self, membership):
+        # Totals of several, possibly overlapping, sets of cells at once; membership is cells x sets.
+        weights = membership.astype("float64").T
+        return weights @ self.counts, weights @ self.sums, np.tensordot(weights, self.grams, axes=1)
+
+    def corr(self, selection=None, columns=None):
+        return self.matrix(*self.totals(selection), columns)
+
+    def matrix(self, n, sums, gram, columns=None):
+        index = [self.columns.index(column) for column in (columns or self.columns)]
+        sums, gram = sums[index], gram[np.ix_(index, index)]
+        mean = sums / n
+        covariance = gram / n - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            matrix = covariance / np.outer(std, std)
+        labels = [self.columns[i] for i in index]
+        return pd.DataFrame(np.clip(matrix, -1, 1), index=labels, columns=labels)
+
+
+class CorrelationIndex:
+    # Pearson co-moments of the values, and Spearman co-moments of their ranks built on first use.
+    # Ranks are taken over the whole table, so Spearman for a filtered subset is the correlation of
+    # global ranks: monotone within the subset, close to but not exactly the subset's own ranks.
+    # Upserted rows are ranked against the values the Spearman moments were built from and merged
+    # like Pearson's; once more than SPEARMAN_DRIFT of the rows changed, they are rebuilt.
+
+    def __init__(self, df, dimensions=CUBE_DIMENSIONS, columns=NUMERIC_COLUMNS, pearson=None):
+        # `pearson` takes co-moments already computed for df, e.g. merged from parallel workers.
+        self.df = df
+        self.dimensions = list(dimensions)
+        self.columns = list(columns)
+        self.pearson = pearson if pearson is not None else CoMoments.from_frame(df, dimensions, columns)
+        self._spearman = None
+
+    @property
+    def spearman(self):
+        if self._spearman is None:
+            values = self.df[self.columns].to_numpy(dtype="float64")
+            self._reference = [np.sort(column[~np.isnan(column)]) for column in values.T]
+            self._drift = 0
+            self._spearman = CoMoments.from_frame(self._ranked(self.df), self.dimensions, self.columns)
+        return self._spearman
+
+    def _ranked(self, rows):
+        # Average ranks of the rows' values among the reference values: for rows of the table it was
+        # taken from this is exactly rank(method="average"); new values rank between their neighbours.
+        values = rows[self.columns].to_numpy(dtype="float64")
+        ranks = np.empty_like(values)
+        for i, reference in enumerate(self._reference):
+            low = np.searchsorted(reference, values[:, i], side="left")
+            high = np.searchsorted(reference, values[:, i], side="right")
+            ranks[:, i] = np.where(np.isnan(values[:, i]), np.nan, (low + high + 1) / 2)
+        ranked = pd.DataFrame(ranks, columns=self.columns, index=rows.index)
+        return pd.concat([rows[self.dimensions], ranked], axis=1)
+
+    def update(self, df, old_rows, new_rows):
+        # Both kinds of moments retract the old rows and add the new ones.
+        self.pearson = self._merged(self.pearson, old_rows, new_rows, lambda rows: rows)
+        self.df = df
+        if self._spearman is not None:
+            self._drift += len(new_rows)
+            if self._drift > SPEARMAN_DRIFT * len(df):
+                self._spearman = None
+            else:
+                self._spearman = self._merged(self._spearman, old_rows, new_rows, self._ranked)
+
+    def _merged(self, moments, old_rows, new_rows, prepare):
+        added = CoMoments.from_frame(prepare(new_rows), self.dimensions, self.columns)
+        if len(old_rows):
+            moments = moments.merge(CoMoments.from_frame(prepare(old_rows), self.dimensions, self.columns, sign=-1))
+        return moments.merge(added)
+
+    def corr(self, selection=None, columns=None, method="pearson"):
+        moments = self.spearman if method == "spearman" else self.pearson
+        return moments.corr(selection, columns)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from data import NUMERIC_COLUMNS
+from filters import normalize_selection
+from sketches import cell_sketches, merge_all
+
+CUBE_DIMENSIONS = [
+    "gender",
+    "department",
+    "age_group",
+    "grade",
+    "parent_education_level",
+    "extracurricular_activities",
+    "internet_access_at_home",
+]
+
+
+PRODUCTS = [("study_hours_per_week", "total_score")]
+
+
+class Cube:
+    # Count, sum and sum of squares of every measure per cell of the categorical dimensions,
+    # cross-product sums for the regression pairs, and a quantile sketch per cell and measure.
+
+    def __init__(self, df, dimensions=CUBE_DIMENSIONS, measures=NUMERIC_COLUMNS, products=PRODUCTS):
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.products = list(products)
+        self.cells = self._aggregate(df)
+        self.sketches = cell_sketches(df, self.dimensions, self.measures)
+
+    def _aggregate(self, df, sign=1):
+        values = df[self.measures].astype("float64")
+        columns = [df[self.dimensions], values.add_suffix("_sum") * sign, values.pow(2).add_suffix("_sumsq") * sign]
+        for x, y in self.products:
+            columns.append((values[x] * values[y] * sign).rename(f"{x}*{y}_sum"))
+        frame = pd.concat(columns, axis=1)
+        frame["count"] = sign
+        return frame.groupby(self.dimensions, observed=True).sum().reset_index()
+
+    def add(self, df, sign=1):
+        # Fold new rows (or, with sign=-1, retract old ones) into the existing cells.
+        sketches = cell_sketches(df, self.dimensions, self.measures) if sign > 0 else {}
+        self._merge(self._aggregate(df, sign), sketches)
+
+    def replace_sketches(self, keys, rows):
+        # Sketches cannot forget values, so cells touched by retractions are re-sketched from rows.
+        rebuilt = cell_sketches(rows, self.dimensions, self.measures) if len(rows) else {}
+        for key in keys:
+            if key in rebuilt:
+                self.sketches[key] = rebuilt[key]
+            else:
+                self.sketches.pop(key, None)
+
+    def merge(self, other):
+        # Combine a cube built over a disjoint set of rows, e.g. one partition of the table.
+        self._merge(other.cells, other.sketches)
+        return self
+
+    def _merge(self, cells, sketches):
+        merged = pd.concat([self.cells, cells], ignore_index=True)
+        for column in self.dimensions:
+            merged[column] = merged[column].astype("category")
+        merged = merged.groupby(self.dimensions, observed=True).sum().reset_index()
+        self.cells = merged[merged["count"] > 0].reset_index(drop=True)
+        for key, cell in sketches.items():
+            current = self.sketches.get(key)
+            self.sketches[key] = cell if current is None else {
+                column: current[column] + sketch for column, sketch in cell.items()
+            }
+
+    def covers(self, selection):
+        return all(column in self.dimensions for column, _ in normalize_selection(selection))
+
+    def slice(self, selection=None):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, values in normalize_selection(selection or {}):
+            mask &= self.cells[column].isin(values).to_numpy()
+        return self.cells[mask]
+
+    def rollup(self, by, selection=None):
+        value_columns = [column for column in self.cells.columns if column not in self.dimensions]
+        cells = self.slice(selection)
+        if not by:
+            return cells[value_columns].sum().to_frame().T
+        rolled = cells.groupby(list(by), observed=True)[value_columns].sum()
+        return rolled[rolled["count"] > 0]
+
+    def counts(self, by, selection=None):
+        counts = self.rollup([by], selection)["count"].astype("int64")
+        return counts.sort_values(ascending=False, kind="stable").rename("count")
+
+    def means(self, by, measure, selection=None):
+        rolled = self.rollup(by, selection)
+        return (rolled[f"{measure}_sum"] / rolled["count"]).rename(measure)
+
+    def stds(self, by, measure, selection=None):
+        rolled = self.rollup(by, selection)
+        n = rolled["count"]
+        mean = rolled[f"{measure}_sum"] / n
+        variance = (rolled[f"{measure}_sumsq"] - n * mean**2) / (n - 1)
+        return np.sqrt(variance.clip(lower=0)).rename(measure)
+
+    def cell_keys(self, cells):
+        return [tuple(str(value) for value in key) for key in cells[self.dimensions].itertuples(index=False)]
+
+    def sketch(self, column, selection=None, by=None):
+        # Merge the per-cell sketches of the selected cells, overall or per value of one dimension.
+        cells = self.slice(selection)
+        keys = self.cell_keys(cells)
+        if by is None:
+            return merge_all(self.sketches[key][column] for key in keys if key in self.sketches)
+        groups = {}
+        for value, key in zip(cells[by].astype(str), keys):
+            if key in self.sketches:
+                groups.setdefault(value, []).append(self.sketches[key][column])
+        return {value: merge_all(sketches) for value, sketches in groups.items()}
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count, span
+
+CATEGORICAL_COLUMNS = [
+    "gender",
+    "department",
+    "grade",
+    "extracurricular_activities",
+    "internet_access_at_home",
+    "parent_education_level",
+    "family_income_level",
+    "age_group",
+]
+
+SCORE_COLUMNS = [
+    "attendance",
+    "midterm_score",
+    "final_score",
+    "assignments_avg",
+    "quizzes_avg",
+    "participation_score",
+    "projects_score",
+    "total_score",
+    "study_hours_per_week",
+    "sleep_hours_per_night",
+]
+
+NUMERIC_COLUMNS = ["age", *SCORE_COLUMNS[:-1], "stress_level", "sleep_hours_per_night"]
+
+SCHEMA = {
+    "student_id": "string",
+    "email": "string",
+    "full_name": "category",
+    "age": "int8",
+    "stress_level": "int8",
+    **{column: "category" for column in CATEGORICAL_COLUMNS},
+    **{column: "float32" for column in SCORE_COLUMNS},
+}
+
+# student_id "S<n>" and email "student<n - 1000>@university.com" are both derived from one integer.
+ID_COLUMN = "student_number"
+ID_COLUMNS = ["student_id", "email"]
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def read_students(path, columns=None):
+    with span(f"read {os.path.basename(path)}"):
+        if os.path.splitext(path)[1] in (".feather", ".arrow", ".parquet"):
+            from snapshot import read_snapshot
+
+            df = read_snapshot(path, columns)
+            # Snapshots written under an older schema are brought up to the current one; astype
+            # copies every column even when there is nothing to convert.
+            stale = {column: dtype for column, dtype in SCHEMA.items() if column in df and df[column].dtype != dtype}
+            if stale:
+                df = df.astype(stale)
+        else:
+            df = pd.read_csv(path, dtype=SCHEMA, usecols=columns)
+    count("rows_read", len(df))
+    return df
+
+
+def batch_version(version, rows):
+    # Chains the content hash of an applied batch onto the previous version. Processes that applied
+    # the same batches in the same order agree on it, so it can key caches that outlive a process.
+    digest = hashlib.sha1(version.encode())
+    digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def resolve_data_path(csv_path, fmt="feather"):
+    # Prefer a columnar snapshot that is at least as new as the CSV it came from.
+    snapshot = os.path.splitext(csv_path)[0] + "." + fmt
+    if os.path.exists(snapshot) and (
+        not os.path.exists(csv_path) or os.stat(snapshot).st_mtime_ns >= os.stat(csv_path).st_mtime_ns
+    ):
+        return snapshot
+    return csv_path
+
+
+def load_students(path="Students_Grading_Cleaned.csv", columns=None):
+    # One parsed frame per process and projection; a changed mtime or size drops the stale entry.
+    signature = file_signature(path)
+    key = (signature[0], tuple(columns) if columns else None)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        df = compact_ids(read_students(path, list(columns) if columns else None))
+        _cache[key] = (signature, df)
+        return df
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def release(df):
+    # Drop the cached entries holding df, once its user has taken a private copy of it.
+    with _lock:
+        for key in [key for key, (_, cached) in _cache.items() if cached is df]:
+            del _cache[key]
+
+
+def _derive_ids(column, numbers):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    numbers = pa.array(np.asarray(numbers, dtype="int64"))
+    if column == "student_id":
+        return pc.binary_join_element_wise("S", pc.cast(numbers, pa.string()), "")
+    return pc.binary_join_element_wise("student", pc.cast(pc.subtract(numbers, 1000), pa.string()), "@university.com", "")
+
+
+def derive_ids(column, numbers):
+    return pd.Series(pd.arrays.ArrowStringArray(_derive_ids(column, numbers)))
+
+
+def compact_ids(df):
+    # Replace student_id and email with ID_COLUMN when every row follows the pattern; otherwise
+    # (or when either column is missing) the frame is returned unchanged.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not len(df) or not set(ID_COLUMNS) <= set(df.columns):
+        return df
+    ids = pa.array(df["student_id"].astype(str).to_numpy(), pa.string())
+    try:
+        numbers = pc.cast(pc.utf8_slice_codeunits(ids, 1), pa.int64()).to_numpy()
+    except pa.ArrowInvalid:
+        return df
+    for column in ID_COLUMNS:
+        values = pa.array(df[column].astype(str).to_numpy(), pa.string())
+        if not pc.all(pc.equal(_derive_ids(column, numbers), values)).as_py():
+            return df
+    position = df.columns.get_loc("student_id")
+    df = df.drop(columns=ID_COLUMNS)
+    df.insert(position, ID_COLUMN, numbers.astype("int32" if numbers.max() < 2**31 else "int64"))
+    return df
+
+
+def expand_ids(df):
+    if ID_COLUMN not in df:
+        return df
+    position = df.columns.get_loc(ID_COLUMN)
+    numbers = df[ID_COLUMN].to_numpy()
+    df = df.drop(columns=ID_COLUMN)
+    for offset, column in enumerate(ID_COLUMNS):
+        df.insert(position + offset, column, derive_ids(column, numbers).set_axis(df.index))
+    return df
+
+
+def logical_columns(df):
+    # Column names as read from the CSV, whether or not the ids are stored compactly.
+    columns = list(df.columns)
+    if ID_COLUMN in columns:
+        position = columns.index(ID_COLUMN)
+        columns[position:position + 1] = ID_COLUMNS
+    return columns
+
+
+SMALL_TAKE = 1024
+
+
+def take_columns(df, rows, columns):
+    # Rows by position and columns by logical name; derived ids are built for those rows only.
+    physical = [column for column in columns if column in df.columns]
+    if len(rows) <= SMALL_TAKE:
+        # Slicing columns out of the consolidated float block copies them whole; a few rows are
+        # cheaper to take across every column first.
+        df, rows = df.take(rows), slice(None)
+    frame = df.iloc[rows, df.columns.get_indexer(physical)]
+    derived = [column for column in ID_COLUMNS if column in columns and ID_COLUMN in df]
+    if derived:
+        numbers = df[ID_COLUMN].to_numpy()[rows]
+        frame = frame.assign(**{column: derive_ids(column, numbers).set_axis(frame.index) for column in derived})
+        frame = frame[list(columns)]
+    return frame
+
+
+def student_keys(df):
+    return df[ID_COLUMN] if ID_COLUMN in df else df["student_id"].astype(str)
+
+
+def memory_report(df):
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": usage, "bytes/row": usage / max(len(df), 1)})
+    report.loc["total"] = ["", usage.sum(), usage.sum() / max(len(df), 1)]
+    return report
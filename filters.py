@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from data import CATEGORICAL_COLUMNS, take_columns
+from instrumentation import count, span
+
+
+def normalize_selection(selection):
+    # Column -> sorted tuple of values; unconstrained columns are dropped so equal filters compare equal.
+    normalized = []
+    for column, values in selection.items():
+        if values is None:
+            continue
+        if isinstance(values, str) or not np.iterable(values):
+            values = [values]
+        values = tuple(sorted(str(value) for value in values))
+        if values:
+            normalized.append((column, values))
+    return tuple(sorted(normalized))
+
+
+class FilterEngine:
+    # Packed per-value row bitmaps for the categorical columns, built once per loaded frame.
+
+    def __init__(self, df, columns=CATEGORICAL_COLUMNS):
+        self.df = df
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for column in columns:
+            codes = df[column].cat.codes.to_numpy() if df[column].dtype == "category" else None
+            if codes is None:
+                codes, uniques = df[column].factorize()
+            else:
+                uniques = df[column].cat.categories
+            self.bitmaps[column] = {
+                str(value): np.packbits(codes == code) for code, value in enumerate(uniques)
+            }
+
+    def update(self, positions, old_rows, new_rows):
+        # Move rewritten rows between value bitmaps without rebuilding them (packbits is big-endian).
+        positions = np.asarray(positions)
+        byte, bit = positions >> 3, (0x80 >> (positions & 7)).astype(np.uint8)
+        for column, bitmaps in self.bitmaps.items():
+            for value, group in pd.Series(byte).groupby(old_rows[column].astype(str).to_numpy()):
+                np.bitwise_and.at(bitmaps[value], group.to_numpy(), ~bit[group.index])
+            for value, group in pd.Series(byte).groupby(new_rows[column].astype(str).to_numpy()):
+                bitmap = bitmaps.setdefault(value, np.zeros((self.n_rows + 7) // 8, dtype=np.uint8))
+                np.bitwise_or.at(bitmap, group.to_numpy(), bit[group.index])
+
+    def append(self, df, rows):
+        # Extend every bitmap by the appended rows; df is the frame that now includes them.
+        n_rows = self.n_rows + len(rows)
+        for column, bitmaps in self.bitmaps.items():
+            values = rows[column].astype(str).to_numpy()
+            for value in set(bitmaps) | set(values):
+                old = bitmaps.get(value)
+                old = np.unpackbits(old, count=self.n_rows) if old is not None else np.zeros(self.n_rows, dtype=np.uint8)
+                bitmaps[value] = np.packbits(np.concatenate([old, (values == value).astype(np.uint8)]))
+        self.df = df
+        self.n_rows = n_rows
+
+    def values(self, column):
+        return [value for value, bitmap in self.bitmaps[column].items() if bitmap.any()]
+
+    def bitmap(self, selection):
+        result = None
+        for column, values in normalize_selection(selection):
+            bitmaps = self.bitmaps[column]
+            column_bitmap = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for value in values:
+                if value in bitmaps:
+                    column_bitmap |= bitmaps[value]
+            result = column_bitmap if result is None else result & column_bitmap
+        return result
+
+    def row_ids(self, selection):
+        bitmap = self.bitmap(selection)
+        if bitmap is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def count(self, selection):
+        bitmap = self.bitmap(selection)
+        return self.n_rows if bitmap is None else int(np.unpackbits(bitmap, count=self.n_rows).sum())
+
+    def select(self, selection, columns=None):
+        # Materialize only the matching rows and the requested columns, in one take.
+        with span("filter"):
+            rows = self.row_ids(selection)
+            count("rows_scanned", len(rows))
+            if columns is None:
+                return self.df.take(rows)
+            return take_columns(self.df, rows, columns)
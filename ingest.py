@@ -0,0 +1,163 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from aggregates import summarize_cube
+from cube import Cube
+from data import CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, SCHEMA
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class RunningStats:
+    # Describe-style moments, value histograms and category counts folded in one chunk at a time.
+    # Quantiles come from value histograms rounded to `precision` decimals, so memory is bounded by
+    # the number of distinct rounded values, not by rows. They are exact for columns exported with
+    # at most that many decimals; quantile_error() bounds the others (e.g. assignments_avg).
+
+    def __init__(self, numeric=NUMERIC_COLUMNS, categorical=CATEGORICAL_COLUMNS, precision=2):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.precision = precision
+        self.rows = 0
+        self.count = pd.Series(0.0, index=self.numeric)
+        self.sum = pd.Series(0.0, index=self.numeric)
+        self.sumsq = pd.Series(0.0, index=self.numeric)
+        self.min = pd.Series(np.inf, index=self.numeric)
+        self.max = pd.Series(-np.inf, index=self.numeric)
+        self.rounding_error = pd.Series(0.0, index=self.numeric)
+        self.histograms = {column: pd.Series(dtype="int64") for column in self.numeric}
+        self.counts = {column: pd.Series(dtype="int64") for column in self.categorical}
+
+    def update(self, chunk):
+        values = chunk[self.numeric].astype("float64")
+        self.rows += len(chunk)
+        self.count += values.count()
+        self.sum += values.sum()
+        self.sumsq += values.pow(2).sum()
+        self.min = np.minimum(self.min, values.min())
+        self.max = np.maximum(self.max, values.max())
+        for column in self.numeric:
+            rounded = values[column].round(self.precision)
+            self.rounding_error[column] = np.fmax(self.rounding_error[column], (rounded - values[column]).abs().max())
+            histogram = rounded.value_counts()
+            self.histograms[column] = self.histograms[column].add(histogram, fill_value=0).astype("int64")
+        for column in self.categorical:
+            counts = chunk[column].value_counts()
+            counts.index = counts.index.astype(str)
+            self.counts[column] = self.counts[column].add(counts, fill_value=0).astype("int64")
+
+    def quantile(self, column, q):
+        # Linear interpolation between order statistics, matching pandas' default.
+        histogram = self.histograms[column].sort_index()
+        cumulative = histogram.cumsum().to_numpy()
+        if not len(cumulative):
+            return np.nan
+        position = q * (cumulative[-1] - 1)
+        values = histogram.index.to_numpy()
+        lower = values[np.searchsorted(cumulative, np.floor(position) + 1)]
+        upper = values[np.searchsorted(cumulative, np.ceil(position) + 1)]
+        return lower + (upper - lower) * (position - np.floor(position))
+
+    def quantile_error(self):
+        # Per column, how far quantiles can be from exact. Rounding moves every order statistic, and so
+        # every interpolated quantile, by at most the largest rounding seen; below the float32
+        # resolution of the column that is only the storage error of values that had few decimals.
+        resolution = np.spacing(np.fmax(self.min.abs(), self.max.abs()).to_numpy(dtype="float32"))
+        return self.rounding_error.where(self.rounding_error > resolution, 0.0)
+
+    def describe(self):
+        mean = self.sum / self.count
+        std = np.sqrt(((self.sumsq - self.count * mean**2) / (self.count - 1)).clip(lower=0))
+        rows = {"count": self.count, "mean": mean, "std": std, "min": self.min}
+        for q in (0.25, 0.5, 0.75):
+            rows[f"{q:.0%}"] = pd.Series({column: self.quantile(column, q) for column in self.numeric})
+        rows["max"] = self.max
+        return pd.DataFrame(rows).T
+
+    def value_counts(self, column):
+        return self.counts[column].sort_values(ascending=False, kind="stable").rename("count")
+
+    def describe_categorical(self):
+        described = {}
+        for column in self.categorical:
+            counts = self.value_counts(column)
+            described[column] = {
+                "count": counts.sum(),
+                "unique": len(counts),
+                "top": counts.index[0] if len(counts) else None,
+                "freq": counts.iloc[0] if len(counts) else None,
+            }
+        return pd.DataFrame(described, dtype=object)
+
+
+class Ingestion:
+    # Running statistics and cube built from a CSV in bounded chunks, optionally spilled to Parquet,
+    # for the offline CLI below; the dashboard's own out-of-core path is the DuckDB backend.
+
+    def __init__(self, stats, cube, rows):
+        self.stats = stats
+        self.cube = cube
+        self.rows = rows
+
+    def summary(self, selection=None):
+        # Unfiltered summaries come from the running statistics, with quartiles within quantile_error();
+        # filtered ones come from the cube, with quartiles approximated by its sketches.
+        numerical = self.stats.describe() if not selection else None
+        categorical = self.stats.describe_categorical() if not selection else None
+        return summarize_cube(self.cube, selection, numerical, categorical)
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    return pd.read_csv(path, dtype=SCHEMA, chunksize=chunksize)
+
+
+def ingest(path, chunksize=DEFAULT_CHUNKSIZE, snapshot=None):
+    stats = RunningStats()
+    cube = None
+    writer = None
+    try:
+        for chunk in read_chunks(path, chunksize):
+            stats.update(chunk)
+            if cube is None:
+                cube = Cube(chunk)
+            else:
+                cube.add(chunk)
+            if snapshot:
+                writer = _spill(chunk, snapshot, writer)
+    finally:
+        if writer is not None:
+            writer.close()
+    return Ingestion(stats, cube, stats.rows)
+
+
+def _spill(chunk, path, writer):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    if writer is None:
+        writer = pq.ParquetWriter(path, table.schema)
+    writer.write_table(table.cast(writer.schema))
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a grades CSV in bounded memory.")
+    parser.add_argument("csv", help="path to a Students_Grading_Cleaned.csv-shaped file")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--snapshot", help="also spill the rows to this Parquet file")
+    args = parser.parse_args()
+
+    result = ingest(args.csv, args.chunksize, args.snapshot)
+    print(f"{result.rows} rows")
+    print(result.stats.describe().round(2).to_string())
+    for column, error in result.stats.quantile_error().items():
+        if error:
+            print(f"{column} quartiles are within ±{error:.3g} of exact (values rounded to {result.stats.precision} decimals)")
+    print(result.stats.describe_categorical().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import contextvars
+import csv
+import io
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# The trace of the rerun executing in this thread; spans and counters outside a trace are no-ops.
+_current = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    # Named, nested spans and counters collected over one script rerun.
+
+    def __init__(self, label=""):
+        self.label = label
+        self.started = time.time()
+        self.spans = []
+        self.counters = Counter()
+        self.duration_ms = None
+        self._origin = time.perf_counter()
+        self._depth = 0
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._origin) * 1000
+
+    def finish(self):
+        self.duration_ms = self.elapsed_ms()
+        return self
+
+    def records(self):
+        return [
+            {"rerun": self.label, "started": self.started, "span": name, "depth": depth, "start_ms": start, "duration_ms": duration}
+            for name, depth, start, duration in self.spans
+        ]
+
+    def to_dict(self):
+        return {
+            "rerun": self.label,
+            "started": self.started,
+            "duration_ms": self.duration_ms,
+            "counters": dict(self.counters),
+            "spans": self.records(),
+        }
+
+
+def start(label=""):
+    trace = Trace(label)
+    _current.set(trace)
+    return trace
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    begin = trace.elapsed_ms()
+    trace._depth += 1
+    try:
+        yield
+    finally:
+        trace._depth -= 1
+        # Recorded on exit, so parents follow their children; start_ms restores the order.
+        trace.spans.append((name, trace._depth, begin, trace.elapsed_ms() - begin))
+
+
+def count(name, amount=1):
+    trace = _current.get()
+    if trace is not None:
+        trace.counters[name] += amount
+
+
+def to_json(traces):
+    return json.dumps([trace.to_dict() for trace in traces], indent=2)
+
+
+def to_csv(traces):
+    # One row per span; each rerun's counters repeat on its rows.
+    names = sorted({name for trace in traces for name in trace.counters})
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, ["rerun", "started", "span", "depth", "start_ms", "duration_ms", *names])
+    writer.writeheader()
+    for trace in traces:
+        for record in sorted(trace.records(), key=lambda record: record["start_ms"]):
+            writer.writerow({**record, **{name: trace.counters.get(name, 0) for name in names}})
+    return buffer.getvalue()
@@ -0,0 +1,146 @@
+import re
+import threading
+
+import numpy as np
+
+from data import ID_COLUMN, ID_COLUMNS
+from sorting import merge_sorted
+
+ID_PATTERNS = {
+    "student_id": (re.compile(r"s(\d+)"), 0),
+    "email": (re.compile(r"student(\d+)@university\.com"), 1000),
+}
+
+
+class StudentLookup:
+    # Exact student_id/email lookup through sorted id keys and word-prefix search over full_name, so
+    # finding a student never scans the table. Both indexes are built on first use; upserted rows
+    # are merged into them rather than re-sorted.
+
+    def __init__(self, df, name_column="full_name"):
+        self.name_column = name_column
+        self._lock = threading.Lock()
+        self.reset(df)
+
+    def reset(self, df):
+        with self._lock:
+            self.df = df
+            self._ids = {}
+            self._names = None
+
+    def update(self, df, changed):
+        # The rows at positions `changed` were rewritten or appended.
+        with self._lock:
+            self.df = df
+            for column, (keys, positions) in self._ids.items():
+                self._ids[column] = merge_sorted(keys, positions, changed, len(df), self._id_keys(column, changed), changed)
+            if self._names is not None:
+                names = df[self.name_column]
+                if names.dtype != "category":
+                    self._names = None
+                    return
+                words, categories, keys, bounds = self._names
+                labels = names.cat.categories.astype(str).str.lower()
+                known = len(bounds) - 1
+                if len(labels) > known:
+                    # Categories are only ever added, so existing codes keep their words.
+                    added, added_categories = self._words(labels, range(known, len(labels)))
+                    at = np.searchsorted(words, added, side="right")
+                    words, categories = np.insert(words, at, added), np.insert(categories, at, added_categories)
+                keys, _ = merge_sorted(keys, keys & 0xFFFFFFFF, changed, len(df), self._name_keys(names, changed), changed)
+                self._names = (words, categories, keys, self._name_bounds(keys, len(labels)))
+
+    def _id_keys(self, column, positions=None):
+        # Compact ids key on their number; otherwise each id column keys on its lowercased text.
+        values = self.df[ID_COLUMN] if ID_COLUMN in self.df else self.df[column]
+        if positions is not None:
+            values = values.iloc[positions]
+        return values.to_numpy() if ID_COLUMN in self.df else values.astype(str).str.lower().to_numpy(dtype=object)
+
+    def _id_index(self, column):
+        # (keys, row positions) in ascending key order; a duplicated id keeps its rows in row order.
+        with self._lock:
+            if column not in self._ids:
+                keys = self._id_keys(column)
+                order = np.argsort(keys, kind="stable")
+                self._ids[column] = (keys[order], order)
+            return self._ids[column]
+
+    def locate(self, text):
+        # Row position of the student whose student_id or email is exactly `text`, or None.
+        positions = self.locate_all(text)
+        return int(positions[0]) if len(positions) else None
+
+    def locate_all(self, text):
+        # Every row whose student_id or email is exactly `text`, in row order. A table that stacks
+        # several terms holds one row per term for the same student.
+        text = text.strip().lower()
+        for column in ID_COLUMNS:
+            key = text
+            if ID_COLUMN in self.df:
+                pattern, offset = ID_PATTERNS[column]
+                match = pattern.fullmatch(text)
+                # Leading zeros would parse to a number whose derived id differs from the text.
+                if match is None or match[1] != str(int(match[1])):
+                    continue
+                key = int(match[1]) + offset
+            keys, positions = self._id_index(column)
+            low, high = np.searchsorted(keys, key, side="left"), np.searchsorted(keys, key, side="right")
+            if high > low:
+                return np.sort(positions[low:high])
+        return np.array([], dtype="int64")
+
+    @staticmethod
+    def _words(labels, codes):
+        # Every word of each name (and the whole name) against its category code, sorted.
+        words, categories = [], []
+        for code in codes:
+            for word in {labels[code], *labels[code].split()}:
+                words.append(word)
+                categories.append(code)
+        order = np.argsort(words, kind="stable")
+        return np.asarray(words)[order], np.asarray(categories, dtype="int64")[order]
+
+    @staticmethod
+    def _name_keys(names, positions):
+        # category code in the high 32 bits, row position in the low ones: sorted, rows group by name.
+        codes = names.cat.codes.to_numpy()[positions].astype("int64")
+        return (codes << 32) | np.asarray(positions, dtype="int64")
+
+    @staticmethod
+    def _name_bounds(keys, size):
+        return np.searchsorted(keys, np.arange(size + 1, dtype="int64") << 32)
+
+    def _name_index(self):
+        # Sorted words with their category codes for prefix ranges, plus the rows of each category
+        # grouped together.
+        with self._lock:
+            if self._names is None:
+                names = self.df[self.name_column]
+                if names.dtype != "category":
+                    names = names.astype("category")
+                labels = names.cat.categories.astype(str).str.lower()
+                words, categories = self._words(labels, range(len(labels)))
+                keys = np.sort(self._name_keys(names, np.arange(len(names))))
+                self._names = (words, categories, keys, self._name_bounds(keys, len(labels)))
+            return self._names
+
+    def search(self, text, limit=20):
+        # (row positions, total matches): every exact id/email match, else names with a word starting with text.
+        text = text.strip().lower()
+        if not text:
+            return np.array([], dtype="int64"), 0
+        positions = self.locate_all(text)
+        if len(positions):
+            return positions[:limit], len(positions)
+        words, categories, keys, bounds = self._name_index()
+        low, high = np.searchsorted(words, [text, text + "\uffff"])
+        matched = np.unique(categories[low:high])
+        total = int((bounds[matched + 1] - bounds[matched]).sum())
+        found, remaining = [], limit
+        for category in matched:
+            if remaining <= 0:
+                break
+            found.append(keys[bounds[category]:bounds[category + 1]][:remaining] & 0xFFFFFFFF)
+            remaining -= len(found[-1])
+        return (np.sort(np.concatenate(found)) if found else np.array([], dtype="int64")), total
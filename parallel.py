@@ -0,0 +1,75 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from correlation import CoMoments
+from cube import Cube
+
+
+def row_ranges(n_rows, count):
+    bounds = np.linspace(0, n_rows, count + 1).astype(int)
+    return [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def snapshot_rows(path):
+    import pyarrow as pa
+
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all().num_rows
+
+
+def read_partition(path, start, stop, columns=None):
+    # Each worker maps the same snapshot file; only its row range becomes pandas columns, which
+    # share the mapped buffers.
+    import pyarrow.feather as feather
+
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.slice(start, stop - start).to_pandas(split_blocks=True)
+
+
+def aggregate_partition(path, start, stop):
+    df = read_partition(path, start, stop)
+    return Cube(df), CoMoments.from_frame(df)
+
+
+def aggregate(path, workers=None, partitions=None):
+    # Partial cubes, sketches and correlation co-moments per row range in a process pool, merged here.
+    if os.path.splitext(path)[1] not in (".feather", ".arrow"):
+        from snapshot import convert
+
+        # The converted snapshot is only mapped by this run's workers, so it goes away with the run.
+        with tempfile.TemporaryDirectory(prefix="grades-") as directory:
+            return aggregate(convert(path, os.path.join(directory, "students.feather")), workers, partitions)
+    workers = workers or os.cpu_count()
+    ranges = row_ranges(snapshot_rows(path), partitions or workers * 2)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(aggregate_partition, path, start, stop) for start, stop in ranges]
+        cube, correlation = None, None
+        for future in futures:
+            partial_cube, partial_correlation = future.result()
+            cube = partial_cube if cube is None else cube.merge(partial_cube)
+            correlation = partial_correlation if correlation is None else correlation.merge(partial_correlation)
+    return cube, correlation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the aggregation cube in a process pool.")
+    parser.add_argument("path", help="a .feather snapshot (CSV files are converted first)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--partitions", type=int)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cube, correlation = aggregate(args.path, args.workers, args.partitions)
+    elapsed = time.perf_counter() - start
+    print(f"{int(cube.cells['count'].sum())} rows, {len(cube.cells)} cells in {elapsed:.2f}s with {args.workers} workers")
+    print(correlation.corr().round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
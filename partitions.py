@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from aggregates import AVERAGE_COLUMNS
+from data import CATEGORICAL_COLUMNS, ID_COLUMN, NUMERIC_COLUMNS, compact_ids, expand_ids, read_students
+from filters import normalize_selection
+from instrumentation import count, span
+from snapshot import write_snapshot
+
+MANIFEST = "manifest.json"
+
+TERM_COLUMN = "term"
+
+# Each partition's score sums are kept per cell of these too, so trends follow the sidebar filters.
+TREND_DIMENSIONS = ["gender", "age_group"]
+
+
+def partition_stats(df):
+    # Row count, min/max of every numeric column, the values of every categorical column, and
+    # count plus score sums per trend cell: everything a reader decides on without opening the file.
+    sums = {f"{column}_sum": df[column].astype("float64") for column in AVERAGE_COLUMNS.values()}
+    cells = (
+        pd.DataFrame({**{column: df[column].astype(str) for column in TREND_DIMENSIONS}, "count": 1, **sums})
+        .groupby(TREND_DIMENSIONS).sum().reset_index()
+    )
+    return {
+        "rows": len(df),
+        "ranges": {column: [float(df[column].min()), float(df[column].max())] for column in NUMERIC_COLUMNS},
+        "values": {column: sorted(df[column].astype(str).unique().tolist()) for column in CATEGORICAL_COLUMNS},
+        "cells": cells.to_dict("records"),
+    }
+
+
+def concat_frames(frames):
+    # pd.concat turns categoricals with differing categories into object columns; union them instead.
+    if len(frames) == 1:
+        return frames[0]
+    columns = frames[0].columns
+    categorical = [column for column in columns if frames[0][column].dtype == "category"]
+    combined = pd.concat([frame.drop(columns=categorical) for frame in frames], ignore_index=True)
+    for column in categorical:
+        combined[column] = pd.api.types.union_categoricals([frame[column] for frame in frames])
+    return combined[columns]
+
+
+class Manifest:
+    # Student rows stored as one Feather file per term and department under `root`, described by a
+    # manifest of per-partition stats. Terms keep the order they were first written in.
+
+    def __init__(self, root="partitions"):
+        self.root = root
+        self.path = os.path.join(root, MANIFEST)
+        self.terms, self.partitions = [], []
+        if os.path.exists(self.path):
+            with open(self.path) as file:
+                stored = json.load(file)
+            self.terms, self.partitions = stored["terms"], stored["partitions"]
+
+    def save(self):
+        # Written aside and renamed, so a reader never sees half a manifest.
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path + ".tmp", "w") as file:
+            json.dump({"terms": self.terms, "partitions": self.partitions}, file, indent=1)
+        os.replace(self.path + ".tmp", self.path)
+
+    def add(self, term, df):
+        # (Re)write every department partition of one term; a rewritten term replaces the old one.
+        if os.sep in term or term.startswith("."):
+            raise ValueError(f"Invalid term name: {term!r}")
+        directory = os.path.join(self.root, f"{TERM_COLUMN}={term}")
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        partitions = []
+        for department, rows in df.groupby("department", observed=True, sort=True):
+            path = os.path.join(f"{TERM_COLUMN}={term}", f"department={department}.feather")
+            write_snapshot(rows.reset_index(drop=True), os.path.join(self.root, path))
+            partitions.append({"term": term, "department": str(department), "path": path, **partition_stats(rows)})
+        if term not in self.terms:
+            self.terms.append(term)
+        self.partitions = [entry for entry in self.partitions if entry["term"] != term] + partitions
+        self.partitions.sort(key=lambda entry: (self.terms.index(entry["term"]), entry["department"]))
+        return partitions
+
+    def prune(self, terms=None, selection=None, ranges=None):
+        # Partitions that can hold rows of the given terms, categorical selection and numeric
+        # (low, high) ranges; an empty terms list means every term.
+        selection = normalize_selection(selection or {})
+        kept = []
+        for entry in self.partitions:
+            if terms and entry["term"] not in terms:
+                continue
+            if any(column in entry["values"] and not set(values) & set(entry["values"][column]) for column, values in selection):
+                continue
+            if any(
+                column in entry["ranges"] and (entry["ranges"][column][1] < low or entry["ranges"][column][0] > high)
+                for column, (low, high) in (ranges or {}).items()
+            ):
+                continue
+            kept.append(entry)
+        return kept
+
+    def read(self, terms=None, selection=None, ranges=None, columns=None):
+        # The rows of the partitions that survive pruning, with a term column in front. Selection and
+        # ranges only skip whole partitions; rows inside a kept partition are not filtered.
+        if not self.partitions:
+            raise ValueError(f"No partitions in {self.root}")
+        entries = self.prune(terms, selection, ranges)
+        count("partitions_read", len(entries))
+        count("partitions_skipped", len(self.partitions) - len(entries))
+        frames = []
+        with span(f"read {len(entries)} partitions"):
+            for entry in entries or self.partitions[:1]:
+                df = read_students(os.path.join(self.root, entry["path"]), columns)
+                codes = np.full(len(df), self.terms.index(entry["term"]), dtype="int16")
+                df.insert(0, TERM_COLUMN, pd.Categorical.from_codes(codes, self.terms))
+                frames.append(df if entries else df.iloc[:0])
+        if any(ID_COLUMN not in frame for frame in frames):
+            frames = [expand_ids(frame) for frame in frames]
+        return compact_ids(concat_frames(frames))
+
+    def trends(self, column, selection=None):
+        # Mean of `column` per term (rows) and department (columns) from the pre-aggregated cells.
+        cells = pd.DataFrame([
+            {"term": entry["term"], "department": entry["department"], **cell}
+            for entry in self.partitions
+            for cell in entry["cells"]
+        ])
+        mask = np.ones(len(cells), dtype=bool)
+        for name, values in normalize_selection(selection or {}):
+            if name in cells:
+                mask &= cells[name].isin(values).to_numpy()
+        rolled = cells[mask].groupby(["term", "department"])[[f"{column}_sum", "count"]].sum()
+        means = (rolled[f"{column}_sum"] / rolled["count"]).unstack("department")
+        return means.reindex([term for term in self.terms if term in means.index])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store one term of grades as per-department partitions.")
+    parser.add_argument("source", help="a Students_Grading_Cleaned.csv-shaped file or snapshot")
+    parser.add_argument("--term", required=True, help="term name, e.g. 2024-Fall")
+    parser.add_argument("--root", default="partitions", help="partitioned store directory")
+    args = parser.parse_args()
+
+    manifest = Manifest(args.root)
+    written = manifest.add(args.term, read_students(args.source))
+    manifest.save()
+    rows = sum(entry["rows"] for entry in written)
+    print(f"Wrote {rows} rows of {args.term} as {len(written)} partitions; {args.root} holds {len(manifest.terms)} terms")
+
+
+if __name__ == "__main__":
+    main()
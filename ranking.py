@@ -0,0 +1,143 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cube import CUBE_DIMENSIONS
+from filters import normalize_selection
+from sorting import merge_sorted, orderable
+
+RANKED_COLUMNS = [
+    "total_score",
+    "final_score",
+    "midterm_score",
+    "projects_score",
+    "quizzes_avg",
+    "assignments_avg",
+    "attendance",
+]
+
+
+class RankingIndex:
+    # Per score column, row positions sorted by (cell, value), so each cell of the cube dimensions is
+    # one ascending segment. Top/bottom k of any selection merges at most k rows (plus ties) from each
+    # selected cell: O(k * cells), independent of the number of rows. A column's order is built the
+    # first time it is ranked; upserted rows are merged into it rather than re-sorted.
+
+    def __init__(self, df, dimensions=CUBE_DIMENSIONS):
+        self.dimensions = list(dimensions)
+        self._lock = threading.Lock()
+        self.reset(df)
+
+    def reset(self, df):
+        with self._lock:
+            self.df = df
+            self._cells = None
+            self._orders = {}
+
+    def update(self, df, changed):
+        # The rows at positions `changed` were rewritten or appended: their cell codes are recomputed,
+        # new cells are added at the end, and every built order drops their old entries and takes
+        # the new ones in at their sorted place.
+        with self._lock:
+            self.df = df
+            if self._cells is None:
+                return
+            codes = np.empty(len(changed), dtype="int64")
+            added = []
+            for i, cell in enumerate(df[self.dimensions].iloc[changed].astype(str).itertuples(index=False, name=None)):
+                if cell not in self._cell_codes:
+                    self._cell_codes[cell] = len(self._cell_codes)
+                    added.append(cell)
+                codes[i] = self._cell_codes[cell]
+            if added:
+                self._cells = pd.concat([self._cells, pd.DataFrame(added, columns=self.dimensions)], ignore_index=True)
+            self._codes = np.concatenate([self._codes, np.zeros(len(df) - len(self._codes), dtype=self._codes.dtype)])
+            self._codes[changed] = codes
+            for column, (rows, keys, _) in self._orders.items():
+                values = df[column].to_numpy(dtype="float32")[changed]
+                valid = ~np.isnan(values)
+                keys, rows = merge_sorted(
+                    keys, rows, changed, len(df), self._keys(codes[valid], values[valid]), changed[valid]
+                )
+                self._orders[column] = (rows, keys, self._bounds(keys))
+
+    @property
+    def cells(self):
+        # Dimension values of each cell, with every row's cell code; built on first use so loading
+        # the store does not pay for it.
+        with self._lock:
+            if self._cells is None:
+                key = np.zeros(len(self.df), dtype="int64")
+                for column in self.dimensions:
+                    codes, uniques = pd.factorize(self.df[column])
+                    key = key * (len(uniques) + 1) + codes + 1
+                uniques, self._codes = np.unique(key, return_inverse=True)
+                first = np.zeros(len(uniques), dtype="int64")
+                first[self._codes[::-1]] = np.arange(len(key))[::-1]
+                self._cells = self.df[self.dimensions].iloc[first].astype(str).reset_index(drop=True)
+                self._cell_codes = {cell: code for code, cell in enumerate(self._cells.itertuples(index=False, name=None))}
+            return self._cells
+
+    @staticmethod
+    def _keys(codes, values):
+        # cell code in the high 32 bits, the value's float32 sort key in the low ones (scores are
+        # float32, see data.SCHEMA), so one int64 orders by cell, then value.
+        return (codes.astype("int64") << 32) | orderable(values).astype("int64")
+
+    def _bounds(self, keys):
+        return np.searchsorted(keys, np.arange(len(self._cells) + 1, dtype="int64") << 32)
+
+    def covers(self, selection):
+        return all(column in self.dimensions for column, _ in normalize_selection(selection or {}))
+
+    def _order(self, column):
+        self.cells  # builds the row cell codes on first use
+        with self._lock:
+            if column not in self._orders:
+                values = self.df[column].to_numpy(dtype="float32")
+                rows = np.flatnonzero(~np.isnan(values))
+                keys = self._keys(self._codes[rows], values[rows])
+                order = np.argsort(keys, kind="stable")
+                rows = rows[order].astype("int32" if len(values) < 2**31 else "int64")
+                keys = keys[order]
+                self._orders[column] = (rows, keys, self._bounds(keys))
+            return self._orders[column]
+
+    def _selected(self, selection):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, values in normalize_selection(selection or {}):
+            mask &= self.cells[column].isin(values).to_numpy()
+        return np.flatnonzero(mask)
+
+    def top(self, selection=None, column="total_score", k=5, ascending=False):
+        # Row positions of the k largest (or smallest) values, ties in row order, like nlargest/nsmallest.
+        rows, keys, bounds = self._order(column)
+        cells = self._selected(selection)
+        start, stop = bounds[cells], bounds[cells + 1]
+        start, stop = start[stop > start], stop[stop > start]
+        # Each cell contributes its k extreme rows plus any rows tied with the k-th.
+        if ascending:
+            low, high = start, np.searchsorted(keys, keys[np.minimum(start + k, stop) - 1], side="right")
+        else:
+            low, high = np.searchsorted(keys, keys[np.maximum(stop - k, start)], side="left"), stop
+        lengths = high - low
+        candidates = np.repeat(low - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        positions = rows[candidates]
+        values = self.df[column].to_numpy()[positions].astype("float64")
+        return positions[np.lexsort((positions, values if ascending else -values))[:k]]
+
+    def leaderboard(self, selection=None, by="department", column="total_score", k=5, ascending=False):
+        # {value of `by`: top-k row positions} for every value present in the selection.
+        groups = self.cells[by].iloc[self._selected(selection)].unique()
+        return {group: self.top({**(selection or {}), by: [group]}, column, k, ascending) for group in sorted(groups)}
+
+    def percentile_rank(self, position, selection=None, column="total_score"):
+        # Share of the selection scoring at or below the student at `position`, in percent.
+        _, keys, bounds = self._order(column)
+        cells = self._selected(selection)
+        start, stop = bounds[cells], bounds[cells + 1]
+        value = np.full(len(cells), self.df[column].iat[position], dtype="float32")
+        below = np.searchsorted(keys, self._keys(cells, value), side="right") - start
+        total = (stop - start).sum()
+        return 100 * below.sum() / total if total else np.nan
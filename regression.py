@@ -0,0 +1,101 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+Z_95 = 1.959963984540054
+
+
+@dataclass(frozen=True)
+class OLSStats:
+    # Sufficient statistics for a one-variable least-squares fit; merging is addition.
+    n: float = 0.0
+    sx: float = 0.0
+    sy: float = 0.0
+    sxy: float = 0.0
+    sxx: float = 0.0
+    syy: float = 0.0
+
+    @classmethod
+    def from_arrays(cls, x, y):
+        x = np.asarray(x, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        return cls(len(x), x.sum(), y.sum(), (x * y).sum(), (x * x).sum(), (y * y).sum())
+
+    def __add__(self, other):
+        return OLSStats(
+            self.n + other.n,
+            self.sx + other.sx,
+            self.sy + other.sy,
+            self.sxy + other.sxy,
+            self.sxx + other.sxx,
+            self.syy + other.syy,
+        )
+
+    def update(self, x, y):
+        return self + OLSStats.from_arrays(x, y)
+
+    def fit(self):
+        if self.n < 3:
+            return None
+        mean_x = self.sx / self.n
+        mean_y = self.sy / self.n
+        cxx = self.sxx - self.n * mean_x**2
+        cxy = self.sxy - self.n * mean_x * mean_y
+        cyy = self.syy - self.n * mean_y**2
+        if cxx <= 0:
+            return None
+        slope = cxy / cxx
+        residual = max(cyy - slope * cxy, 0.0)
+        return OLSFit(
+            n=int(self.n),
+            slope=slope,
+            intercept=mean_y - slope * mean_x,
+            r2=1 - residual / cyy if cyy > 0 else 0.0,
+            mean_x=mean_x,
+            cxx=cxx,
+            sigma=math.sqrt(residual / (self.n - 2)),
+        )
+
+
+@dataclass(frozen=True)
+class OLSFit:
+    n: int
+    slope: float
+    intercept: float
+    r2: float
+    mean_x: float
+    cxx: float
+    sigma: float
+
+    def predict(self, x):
+        return self.intercept + self.slope * np.asarray(x, dtype="float64")
+
+    def band(self, x, z=Z_95):
+        # Confidence band of the mean response; the normal quantile stands in for Student's t.
+        x = np.asarray(x, dtype="float64")
+        half_width = z * self.sigma * np.sqrt(1 / self.n + (x - self.mean_x) ** 2 / self.cxx)
+        fitted = self.predict(x)
+        return fitted - half_width, fitted + half_width
+
+
+def stats_from_cube(cube, x, y, by, selection=None):
+    rolled = cube.rollup([by], selection)
+    return {
+        value: OLSStats(
+            row["count"],
+            row[f"{x}_sum"],
+            row[f"{y}_sum"],
+            row[f"{x}*{y}_sum"],
+            row[f"{x}_sumsq"],
+            row[f"{y}_sumsq"],
+        )
+        for value, row in rolled.iterrows()
+    }
+
+
+def stats_from_rows(df, x, y, by):
+    return {
+        value: OLSStats.from_arrays(group[x], group[y])
+        for value, group in df.groupby(by, observed=True)
+    }
@@ -0,0 +1,31 @@
+import numpy as np
+
+
+def stratified_sample(df, strata, budget, seed=0):
+    # Proportional allocation per stratum so small groups keep their share of the points.
+    if len(df) <= budget:
+        return df
+    strata = [column for column in strata if column is not None]
+    if not strata:
+        rows = np.random.default_rng(seed).choice(len(df), budget, replace=False)
+        return df.iloc[np.sort(rows)]
+
+    codes = df.groupby(strata, observed=True, sort=False).ngroup().to_numpy()
+    sizes = np.bincount(codes)
+    quotas = np.maximum(1, np.floor(sizes * budget / len(df))).astype(int)
+    order = np.random.default_rng(seed).permutation(len(df))
+    order = order[np.argsort(codes[order], kind="stable")]
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rows = np.concatenate([order[start:start + quota] for start, quota in zip(starts, quotas)])
+    return df.iloc[np.sort(rows)]
+
+
+def density_grid(x, y, bins=60):
+    # Server-side 2D histogram; the browser receives bins x bins counts instead of every point.
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    keep = ~(np.isnan(x) | np.isnan(y))
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    return x_centers, y_centers, counts.T
@@ -0,0 +1,76 @@
+import argparse
+import os
+
+from data import ID_COLUMN, ID_COLUMNS, compact_ids, read_students
+
+SNAPSHOT_FORMATS = {".feather": "feather", ".arrow": "feather", ".parquet": "parquet"}
+
+
+def snapshot_path(csv_path, fmt="feather"):
+    return os.path.splitext(csv_path)[0] + "." + fmt
+
+
+def write_snapshot(df, path):
+    import pyarrow as pa
+
+    # Categorical columns become dictionary-encoded Arrow columns, and ids that follow the pattern
+    # one integer column, so reading a snapshot back converts no strings.
+    table = pa.Table.from_pandas(compact_ids(df), preserve_index=False)
+    fmt = SNAPSHOT_FORMATS[os.path.splitext(path)[1]]
+    if fmt == "feather":
+        import pyarrow.feather as feather
+
+        # Uncompressed so readers can memory-map the buffers directly.
+        feather.write_feather(table, path, compression="uncompressed")
+    else:
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path)
+    return path
+
+
+def snapshot_columns(path):
+    import pyarrow as pa
+
+    if SNAPSHOT_FORMATS[os.path.splitext(path)[1]] == "feather":
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).schema.names
+    import pyarrow.parquet as pq
+
+    return pq.read_schema(path).names
+
+
+def read_snapshot(path, columns=None):
+    # Feather columns come back as pandas columns over the memory-mapped buffers, without a copy:
+    # split_blocks keeps pandas from consolidating them into one block, so the frame's arrays are
+    # read-only. Categoricals are rebuilt from their dictionaries. A snapshot with compact ids
+    # answers a projection of student_id/email with ID_COLUMN.
+    if columns is not None and ID_COLUMN in snapshot_columns(path):
+        columns = list(dict.fromkeys(ID_COLUMN if column in ID_COLUMNS else column for column in columns))
+    fmt = SNAPSHOT_FORMATS[os.path.splitext(path)[1]]
+    if fmt == "feather":
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    else:
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def convert(csv_path, out_path=None):
+    out_path = out_path or snapshot_path(csv_path)
+    return write_snapshot(read_students(csv_path), out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a grades CSV into a columnar snapshot.")
+    parser.add_argument("csv", help="path to a Students_Grading_Cleaned.csv-shaped file")
+    parser.add_argument("-o", "--output", help="snapshot path (.feather, .arrow or .parquet)")
+    args = parser.parse_args()
+    print(f"Wrote {convert(args.csv, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import numpy as np
+
+
+def orderable(values):
+    # float32 values as uint32 keys that sort in the same order (-0.0 counts as 0.0, NaN sorts last).
+    values = np.asarray(values, dtype="float32") + np.float32(0)
+    bits = values.view("uint32")
+    keys = np.where(bits >> 31, ~bits, bits | np.uint32(0x80000000))
+    return np.where(np.isnan(values), np.uint32(0xFFFFFFFF), keys).astype("uint32")
+
+
+def merge_sorted(keys, rows, changed, size, new_keys, new_rows):
+    # Sorted (keys, rows) with the entries of the `changed` rows dropped and (new_keys, new_rows)
+    # inserted at their sorted place: O(n) copies instead of an O(n log n) re-sort.
+    stale = np.zeros(size, dtype=bool)
+    stale[changed] = True
+    kept = ~stale[rows]
+    keys, rows = keys[kept], rows[kept]
+    order = np.argsort(new_keys, kind="stable")
+    new_keys, new_rows = new_keys[order], new_rows[order]
+    at = np.searchsorted(keys, new_keys, side="right")
+    return np.insert(keys, at, new_keys), np.insert(rows, at, new_rows)
@@ -0,0 +1,131 @@
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import time
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "University.py")
+
+
+def _imported(node):
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    if isinstance(node, ast.ImportFrom) and node.level == 0:
+        return [node.module]
+    return []
+
+
+def app_imports(path=APP):
+    # (modules the app imports at module level before the first paint, modules it imports only
+    # inside functions or mode-dependent branches), each in source order, read from its source.
+    with open(path) as file:
+        tree = ast.parse(file.read())
+    startup = [name for node in tree.body for name in _imported(node)]
+    nested = sorted((node for node in ast.walk(tree) if _imported(node)), key=lambda node: node.lineno)
+    deferred = [name for node in nested for name in _imported(node) if name not in startup]
+    return list(dict.fromkeys(startup)), list(dict.fromkeys(deferred))
+
+
+def import_times(modules, baseline=frozenset()):
+    # Cumulative import time per top-level module in a fresh interpreter, via -X importtime,
+    # leaving out the modules in `baseline` (those the interpreter imports on its own).
+    code = "; ".join(f"import {module}" for module in modules) or "pass"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  ") and name.strip() not in baseline:
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def warmup_times(path):
+    from aggregates import SummaryCache
+    from cube import Cube
+    from data import load_students
+    from filters import FilterEngine
+
+    times = {}
+    start = time.perf_counter()
+    df = load_students(path)
+    times["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = FilterEngine(df)
+    times["filter engine"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cube = Cube(df)
+    times["cube"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    SummaryCache(engine, cube).get({"gender": engine.values("gender")[0]})
+    times["first summary"] = time.perf_counter() - start
+    return {stage: seconds * 1000 for stage, seconds in times.items()}
+
+
+def print_memory_report(path):
+    import pandas as pd
+
+    from data import load_students, memory_report
+
+    # The table as the dashboard holds it, next to a plain read_csv of the same file.
+    report = memory_report(load_students(path))
+    plain = memory_report(pd.read_csv(path))
+    print("Memory per column (bytes per row):")
+    for column, row in report.drop("total").iterrows():
+        before = f"{plain.at[column, 'bytes/row']:>9.1f}" if column in plain.index else ""
+        print(f"  {column:<30} {row['dtype']:<10} {row['bytes/row']:>9.1f}   read_csv: {before}")
+    for column in plain.index.difference(report.index):
+        print(f"  {column:<30} {'derived':<10} {0:>9.1f}   read_csv: {plain.at[column, 'bytes/row']:>9.1f}")
+    print(f"  {'total':<30} {'':<10} {report.at['total', 'bytes/row']:>9.1f}   read_csv: {plain.at['total', 'bytes/row']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report dashboard import and warm-up times.")
+    parser.add_argument("--data", default="Students_Grading_Cleaned.csv")
+    parser.add_argument("--app", default=APP, help="dashboard script whose imports are timed")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, help="fail if startup imports plus warm-up exceed this")
+    parser.add_argument("--memory", action="store_true", help="also report memory per column of the loaded table")
+    args = parser.parse_args()
+
+    # Modules the interpreter imports on its own are not the dashboard's cost.
+    baseline = set(import_times([]))
+    startup_modules, deferred_modules = app_imports(args.app)
+    startup = import_times(startup_modules, baseline)
+    combined = import_times(startup_modules + deferred_modules, baseline)
+    deferred = {name: ms for name, ms in combined.items() if name not in startup}
+    warmup = warmup_times(args.data)
+
+    print("Slowest top-level imports at startup (ms):")
+    for name, ms in sorted(startup.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<30} {ms:>9.1f}")
+    startup_ms = sum(startup.values())
+    deferred_ms = sum(deferred.values())
+    print(f"Startup imports: {startup_ms:.1f} ms (deferred until first use: {deferred_ms:.1f} ms)")
+
+    print("Warm-up (ms):")
+    for stage, ms in warmup.items():
+        print(f"  {stage:<30} {ms:>9.1f}")
+    total_ms = startup_ms + sum(warmup.values())
+    print(f"Time to first paint, excluding Streamlit server start: {total_ms:.1f} ms")
+
+    if args.memory:
+        print_memory_report(args.data)
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"Over budget by {total_ms - args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
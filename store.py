@@ -0,0 +1,175 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import SummaryCache
+from correlation import CorrelationIndex
+from cube import Cube
+from data import (
+    ID_COLUMN,
+    SCHEMA,
+    batch_version,
+    compact_ids,
+    expand_ids,
+    file_signature,
+    read_students,
+    release,
+    student_keys,
+)
+from filters import FilterEngine
+from lookup import StudentLookup
+from ranking import RankingIndex
+from viewer import TableView
+
+KEY = "student_id"
+
+# Batches touching more than this share of the rows rebuild the sorted indexes instead of merging.
+REBUILD_FRACTION = 0.1
+
+
+class StudentStore:
+    # The loaded table plus every structure derived from it, kept in step on upserts instead of
+    # being rebuilt. The loaded frame is shared (it is the process-wide cached one), so the first
+    # batch gives the store its own copy, which later batches rewrite in place, and drops the
+    # original from the loader's cache; `version` hashes
+    # the batches applied so far so caches can key on it. `cube` and `moments` take aggregates already
+    # computed for df, such as the ones merged from parallel workers.
+
+    def __init__(self, df, cube=None, moments=None):
+        self.df = df
+        self._owned = False
+        self.version = ""
+        self.applied = set()
+        self.lock = threading.RLock()
+        self.filter_engine = FilterEngine(df)
+        self.cube = cube if cube is not None else Cube(df)
+        self.correlation = CorrelationIndex(df, pearson=moments)
+        self.table_view = TableView(df)
+        self.ranking = RankingIndex(df)
+        self.lookup = StudentLookup(df)
+        self.summaries = SummaryCache(self.filter_engine, self.cube)
+        self._positions = pd.Series(range(len(df)), index=student_keys(df))
+
+    def upsert(self, rows, batch=None):
+        # Rows whose student_id exists replace it in place; the rest are appended. `batch` names the
+        # inbox file the rows came from.
+        with self.lock:
+            if not self._owned:
+                loaded, self.df = self.df, self.df.copy()
+                self.filter_engine.df = self.df
+                self._owned = True
+                # Otherwise the loader's cache keeps the original as a second full copy of the table.
+                release(loaded)
+            compact = ID_COLUMN in self.df
+            received = rows
+            rows = self._conform(rows.drop_duplicates(KEY, keep="last"))
+            existing = student_keys(rows).isin(self._positions.index).to_numpy()
+            updates, inserts = rows[existing], rows[~existing]
+            positions = self._positions.loc[student_keys(updates)].to_numpy()
+            old_rows = self.df.iloc[positions]
+
+            if len(updates):
+                self.filter_engine.update(positions, old_rows, updates)
+                self.cube.add(old_rows, sign=-1)
+                for index, column in enumerate(self.df.columns):
+                    self.df.iloc[positions, index] = updates[column].to_numpy()
+            start = len(self.df)
+            if len(inserts):
+                inserts = inserts.set_axis(range(start, start + len(inserts)))
+                self.df = pd.concat([self.df, inserts[self.df.columns]])
+                self.filter_engine.append(self.df, inserts)
+                self._positions = pd.concat([
+                    self._positions,
+                    pd.Series(range(start, start + len(inserts)), index=student_keys(inserts)),
+                ])
+
+            self.cube.add(rows)
+            if len(updates):
+                touched = set(self.cube.cell_keys(old_rows)) | set(self.cube.cell_keys(updates))
+                self.cube.replace_sketches(touched, self._cell_rows(touched))
+            self.correlation.update(self.df, old_rows, rows)
+            # Sorted indexes take the changed rows in by merging, unless the ids just changed form or
+            # the batch is large enough that sorting from scratch is cheaper.
+            changed = np.concatenate([positions, np.arange(start, start + len(inserts))]).astype("int64")
+            rebuild = compact != (ID_COLUMN in self.df) or len(changed) > REBUILD_FRACTION * len(self.df)
+            for index in (self.table_view, self.ranking, self.lookup):
+                if rebuild:
+                    index.reset(self.df)
+                else:
+                    index.update(self.df, changed)
+            self.summaries.clear()
+            if batch is not None:
+                self.applied.add(batch)
+            self.version = batch_version(self.version, received)
+            return len(updates), len(inserts)
+
+    def locate(self, student_id):
+        # Row position of a student by id or email, or None when unknown.
+        return self.lookup.locate(student_id)
+
+    def _cell_rows(self, keys):
+        row_ids = [
+            self.filter_engine.row_ids(dict(zip(self.cube.dimensions, key)))
+            for key in keys
+        ]
+        return self.df.take(np.unique(np.concatenate(row_ids))) if row_ids else self.df.iloc[:0]
+
+    def _conform(self, rows):
+        # Match the store's dtypes, widening categoricals on both sides when new values arrive.
+        rows = rows.astype({column: dtype for column, dtype in SCHEMA.items() if column in rows})
+        if ID_COLUMN in self.df:
+            rows = compact_ids(rows)
+            if ID_COLUMN not in rows:
+                # Ids that do not follow the pattern: the whole table goes back to string ids.
+                self.df = expand_ids(self.df)
+                self.filter_engine.df = self.df
+                self._positions = pd.Series(range(len(self.df)), index=student_keys(self.df))
+        if ID_COLUMN in rows:
+            rows[ID_COLUMN] = rows[ID_COLUMN].astype(self.df[ID_COLUMN].dtype)
+        for column in self.df.columns:
+            if self.df[column].dtype == "category":
+                current = self.df[column].cat.categories
+                new = rows[column].cat.categories.difference(current)
+                if len(new):
+                    self.df[column] = self.df[column].cat.add_categories(new)
+                rows[column] = rows[column].cat.set_categories(self.df[column].cat.categories)
+        return rows
+
+
+def batch_directory(directory, source):
+    # Where the batches applied on top of one source export are kept: named after its file name,
+    # mtime and size, so a replaced export gets a directory of its own.
+    _, mtime, size = file_signature(source)
+    return os.path.join(directory, "processed", f"{os.path.basename(source)}-{mtime}-{size}")
+
+
+def poll_inbox(store, source, directory="inbox"):
+    # Batches are persisted before they are applied: every CSV dropped into the inbox is first moved
+    # to the processed directory of the `source` export the store was loaded from, under a name that
+    # keeps its arrival order, then each batch there that this store has not applied yet is upserted,
+    # oldest first. A restarted process, or another worker serving the same data, replays the same
+    # batches instead of missing them. Batches kept for any other export are left alone, so
+    # corrections to an old export never overwrite a newer one.
+    if not os.path.isdir(directory):
+        return 0
+    processed = batch_directory(directory, source)
+    with store.lock:
+        for entry in os.scandir(directory):
+            if not (entry.is_file() and entry.name.endswith(".csv")):
+                continue
+            try:
+                os.makedirs(processed, exist_ok=True)
+                os.replace(entry.path, os.path.join(processed, f"{entry.stat().st_mtime_ns:020d}-{entry.name}"))
+            except FileNotFoundError:
+                # Another worker moved it first; it is picked up from the processed directory below.
+                continue
+        if not os.path.isdir(processed):
+            return 0
+        batches = sorted(
+            name for name in os.listdir(processed) if name.endswith(".csv") and name not in store.applied
+        )
+        for name in batches:
+            store.upsert(read_students(os.path.join(processed, name)), batch=name)
+    return len(batches)
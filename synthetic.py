@@ -0,0 +1,128 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data import SCHEMA, compact_ids, read_students
+
+REFERENCE_PATH = "Students_Grading_Cleaned.csv"
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+class Profile:
+    # Per-column value distributions of a reference export. Columns are sampled independently, as
+    # they are essentially uncorrelated in the source data; age_group is derived from age, names
+    # combine the reference first and last names, and ids and emails are unique per row.
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        self.frequencies = {
+            column: df[column].astype(str).value_counts(normalize=True)
+            for column in df.columns
+            if df[column].dtype == "category" and column not in ("age_group", "full_name")
+        }
+        for column in ("age", "stress_level"):
+            self.frequencies[column] = df[column].value_counts(normalize=True).sort_index()
+        names = df["full_name"].astype(str).str.split(" ", n=1, expand=True)
+        self.frequencies["first_name"] = names[0].value_counts(normalize=True)
+        self.frequencies["last_name"] = names[1].value_counts(normalize=True)
+        # Inverse CDFs on a fine grid reproduce each score's shape and range.
+        self.quantiles = {
+            column: np.quantile(df[column].astype("float64"), np.linspace(0, 1, 1001))
+            for column in df.columns
+            if df[column].dtype == "float32"
+        }
+        self.age_groups = df.groupby("age")["age_group"].agg(lambda groups: groups.mode()[0])
+        self.categories = {
+            column: sorted(df[column].astype(str).unique()) for column in df.columns if df[column].dtype == "category"
+        }
+        self.categories["full_name"] = sorted(
+            f"{first} {last}" for first in self.frequencies["first_name"].index for last in self.frequencies["last_name"].index
+        )
+
+    @classmethod
+    def from_csv(cls, path=REFERENCE_PATH):
+        return cls(read_students(path))
+
+    def _choice(self, column, n_rows, rng):
+        frequencies = self.frequencies[column]
+        return frequencies.index.to_numpy()[rng.choice(len(frequencies), n_rows, p=frequencies.to_numpy())]
+
+    def sample(self, n_rows, start=0, seed=0):
+        rng = np.random.default_rng((seed, start))
+        ids = np.arange(start, start + n_rows).astype(str)
+        columns = {
+            "student_id": np.char.add("S", (np.arange(start, start + n_rows) + 1000).astype(str)),
+            "email": np.char.add(np.char.add("student", ids), "@university.com"),
+            "full_name": np.char.add(
+                np.char.add(self._choice("first_name", n_rows, rng).astype(str), " "),
+                self._choice("last_name", n_rows, rng).astype(str),
+            ),
+        }
+        for column in self.frequencies:
+            if column not in ("first_name", "last_name"):
+                columns[column] = self._choice(column, n_rows, rng)
+        for column, quantiles in self.quantiles.items():
+            columns[column] = np.interp(rng.random(n_rows), np.linspace(0, 1, len(quantiles)), quantiles).round(2)
+        columns["age_group"] = self.age_groups.reindex(columns["age"]).to_numpy()
+
+        df = pd.DataFrame(columns)[self.columns].astype(SCHEMA)
+        # Fixed category lists keep every chunk's dictionaries identical.
+        for column, categories in self.categories.items():
+            df[column] = df[column].cat.set_categories(categories)
+        return df
+
+
+def generate(n_rows, profile=None, chunksize=DEFAULT_CHUNKSIZE, seed=0):
+    profile = profile or Profile.from_csv()
+    for start in range(0, n_rows, chunksize):
+        yield profile.sample(min(chunksize, n_rows - start), start, seed)
+
+
+def write(path, n_rows, profile=None, chunksize=DEFAULT_CHUNKSIZE, seed=0):
+    # Written chunk by chunk, so 10M rows never sit in memory at once.
+    extension = os.path.splitext(path)[1]
+    writer = None
+    try:
+        for index, chunk in enumerate(generate(n_rows, profile, chunksize, seed)):
+            if extension == ".csv":
+                chunk.to_csv(path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+                continue
+            import pyarrow as pa
+
+            # Ids are stored compactly, as write_snapshot does.
+            table = pa.Table.from_pandas(compact_ids(chunk), preserve_index=False)
+            if writer is None:
+                if extension == ".parquet":
+                    import pyarrow.parquet as pq
+
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    # Uncompressed Arrow IPC, i.e. a Feather file the dashboard can memory-map.
+                    writer = pa.ipc.new_file(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic student grades matching the reference export.")
+    parser.add_argument("rows", type=int, help="number of rows, e.g. 10000, 1000000 or 10000000")
+    parser.add_argument("output", help="output path (.csv, .feather, .arrow or .parquet)")
+    parser.add_argument("--reference", default=REFERENCE_PATH, help="CSV whose distributions are reproduced")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write(args.output, args.rows, Profile.from_csv(args.reference), args.chunksize, args.seed)
+    print(f"Wrote {args.rows} rows to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
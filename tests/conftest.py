@@ -0,0 +1,23 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SOURCE = os.path.join(ROOT, "Students_Grading_Cleaned.csv")
+
+
+@pytest.fixture(scope="session")
+def source(tmp_path_factory):
+    # A private copy of the export, so SQL backends build their database files next to it.
+    return str(shutil.copy(SOURCE, tmp_path_factory.mktemp("source") / "students.csv"))
+
+
+@pytest.fixture(scope="session")
+def students():
+    from data import load_students
+
+    return load_students(SOURCE)
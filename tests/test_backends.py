@@ -0,0 +1,156 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import BOX, BOX_STATS, COUNT_COLUMNS
+from backends import PandasBackend, SQLBackend
+from charts import box_chart
+from data import expand_ids, load_students, read_students
+from store import StudentStore
+
+SELECTIONS = [
+    {},
+    {"gender": "Female"},
+    {"department": ["CS", "Business"], "age_group": ["18-20", "24-26"]},
+    {"gender": "Male", "department": ["Mathematics"], "age_group": []},
+]
+
+EMPTY = {"gender": "Male", "department": ["Nope"], "age_group": []}
+
+
+@pytest.fixture(scope="module")
+def pandas_backend(source):
+    from data import load_students
+
+    return PandasBackend(StudentStore(load_students(source)))
+
+
+@pytest.fixture(scope="module", params=["sqlite", "duckdb"])
+def sql_backend(request, source):
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+    return SQLBackend(source, engine=request.param)
+
+
+@pytest.fixture(scope="module", params=["pandas", "sqlite", "duckdb"])
+def backend(request, pandas_backend, source):
+    if request.param == "pandas":
+        return pandas_backend
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+    return SQLBackend(source, engine=request.param)
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_sql_summary_matches_pandas(pandas_backend, sql_backend, selection):
+    summary, expected = sql_backend.summary(selection), pandas_backend.summary(selection)
+    assert summary.count == expected.count
+    for label, value in expected.averages.items():
+        np.testing.assert_allclose(summary.averages[label], value, rtol=1e-6)
+    for column in COUNT_COLUMNS:
+        counts = summary.value_counts[column]
+        assert dict(zip(counts.index.astype(str), counts)) == dict(
+            zip(expected.value_counts[column].index.astype(str), expected.value_counts[column])
+        )
+    np.testing.assert_array_equal(summary.box_stats["n"].sum(), expected.count)
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+@pytest.mark.parametrize("ascending", [False, True])
+def test_sql_top_matches_pandas(pandas_backend, sql_backend, selection, ascending):
+    for column in ["total_score", "final_score", "attendance"]:
+        top = sql_backend.top(selection, column, 10, ["student_id", column], ascending)
+        expected = pandas_backend.top(selection, column, 10, ["student_id", column], ascending)
+        assert top["student_id"].tolist() == expected["student_id"].tolist()
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+@pytest.mark.parametrize("ascending", [False, True])
+def test_sql_table_pages_match_pandas(pandas_backend, sql_backend, selection, ascending):
+    for sort_by in [None, "total_score", "age"]:
+        rows = sql_backend.table_rows(selection, sort_by, ascending)
+        expected = pandas_backend.table_rows(selection, sort_by, ascending)
+        assert rows.total == expected.total
+        for page in [1, 3]:
+            assert (
+                rows.page(page, 25, ["student_id"])["student_id"].tolist()
+                == expected.page(page, 25, ["student_id"])["student_id"].tolist()
+            )
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_sql_correlation_matches_pandas(pandas_backend, sql_backend, selection):
+    # DuckDB reads the CSV's scores as doubles rather than float32, hence the tolerance.
+    pd.testing.assert_frame_equal(sql_backend.corr(selection), pandas_backend.corr(selection), atol=1e-6)
+
+
+def test_empty_selection(backend):
+    x, _, color = BOX
+    summary = backend.summary(EMPTY)
+    assert summary.count == 0
+    assert all(isinstance(value, float) and np.isnan(value) for value in summary.averages.values())
+    # The average cards format each value with :.2f.
+    assert {f"{value:.2f}" for value in summary.averages.values()} == {"nan"}
+    assert list(summary.box_stats.columns) == [x, color, *BOX_STATS]
+    assert box_chart(summary.box_stats, x, color, "Total score")["data"] == []
+    assert backend.top(EMPTY, "total_score").empty
+    assert backend.table_rows(EMPTY, "total_score").total == 0
+
+
+def make_batch(df):
+    # Ten corrections, one student listed twice (the last row wins) and two new students whose ids
+    # sort differently as text and as numbers.
+    rows = expand_ids(df).iloc[:12].astype(object)
+    rows["total_score"] = np.arange(12) * 5.0
+    rows.loc[10, "student_id"], rows.loc[10, "email"] = "S10001", "student9001@university.com"
+    rows.loc[11, "student_id"], rows.loc[11, "email"] = "S20000", "student19000@university.com"
+    repeated = rows.iloc[[3]].assign(total_score=99.5)
+    return pd.concat([rows, repeated], ignore_index=True)
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def fresh_backends(request, source, tmp_path):
+    # Both backends over a private copy, since upserts write to it.
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+    path = str(shutil.copy(source, tmp_path / "students.csv"))
+    return SQLBackend(path, engine=request.param), PandasBackend(StudentStore(load_students(path)))
+
+
+def test_sql_upsert_matches_pandas(fresh_backends, tmp_path):
+    sql_backend, pandas_backend = fresh_backends
+    path = tmp_path / "batch.csv"
+    make_batch(pandas_backend.store.df).to_csv(path, index=False)
+    rows = read_students(str(path))
+    assert sql_backend.upsert(rows, "batch.csv") == pandas_backend.upsert(rows, "batch.csv") == (10, 2)
+    assert sql_backend.version == pandas_backend.version
+    assert sql_backend.summary({}).count == pandas_backend.summary({}).count == 5002
+    assert sql_backend.lookup("S1003", columns=["total_score"])[0]["total_score"].tolist() == [99.5]
+    for ascending in [True, False]:
+        for sort_by in ["student_id", "email", "total_score"]:
+            rows = sql_backend.table_rows({}, sort_by, ascending).page(1, 30, ["student_id"])
+            expected = pandas_backend.table_rows({}, sort_by, ascending).page(1, 30, ["student_id"])
+            assert rows["student_id"].tolist() == expected["student_id"].tolist()
+
+
+def test_sql_upsert_of_a_large_batch(fresh_backends):
+    sql_backend, pandas_backend = fresh_backends
+    rows = expand_ids(pandas_backend.store.df).iloc[:1500].copy()
+    rows["total_score"] = 1.0
+    assert sql_backend.upsert(rows) == (1500, 0)
+    assert sql_backend.summary({}).count == 5000
+    assert sql_backend.top({}, "total_score", 1500, ascending=True)["total_score"].eq(1.0).all()
+
+
+def test_ids_off_the_pattern_sort_as_text(fresh_backends):
+    sql_backend, pandas_backend = fresh_backends
+    rows = expand_ids(pandas_backend.store.df).iloc[:1].astype(object).assign(student_id="X-1", email="x@u.com")
+    for backend in fresh_backends:
+        backend.upsert(rows)
+    for ascending in [True, False]:
+        assert (
+            sql_backend.table_rows({}, "student_id", ascending).page(1, 20, ["student_id"])["student_id"].tolist()
+            == pandas_backend.table_rows({}, "student_id", ascending).page(1, 20, ["student_id"])["student_id"].tolist()
+        )
@@ -0,0 +1,109 @@
+import json
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+import charts
+from charts import (
+    DEPARTMENT_COLORS,
+    bar_chart,
+    box_chart,
+    clear_templates,
+    grouped_bar_chart,
+    heatmap_chart,
+    line_chart,
+    pie_chart,
+    scatter_chart,
+    timeline_chart,
+)
+
+
+@pytest.fixture(autouse=True)
+def templates():
+    clear_templates()
+    yield charts._templates
+    clear_templates()
+
+
+def spans(n):
+    return pd.DataFrame({
+        "span": [f"step {i}" for i in range(n)],
+        "depth": [i % 2 for i in range(n)],
+        "start_ms": [float(i) for i in range(n)],
+        "duration_ms": [1.5] * n,
+    })
+
+
+def every_chart(students, title):
+    counts = students["department"].value_counts()
+    matrix = students[["total_score", "final_score", "attendance"]].corr().round(2)
+    grades = pd.DataFrame({"grade": ["A", "B"], "x": [1, 2], "y": [3, 4]})
+    stats = pd.DataFrame({
+        "department": ["CS", "CS"], "gender": ["Female", "Male"], "q1": [1.0, 2.0], "median": [2.0, 3.0],
+        "q3": [3.0, 4.0], "lowerfence": [0.0, 1.0], "upperfence": [4.0, 5.0],
+    })
+    return [
+        bar_chart(counts.index, counts.values, title, color_map=DEPARTMENT_COLORS),
+        bar_chart(counts.index, counts.values, title, orientation="h", labels={"x": "Students", "y": "Department"}),
+        grouped_bar_chart(grades, "grade", ["x", "y"], title, palette=["#004e64", "#00a5cf"], legend_title="Cohort"),
+        line_chart(pd.DataFrame({"CS": [1, 2], "Art": [2, 3]}, index=["T1", "T2"]), title, labels={"x": "Term"}),
+        pie_chart(counts.index, counts.values, title, hole=0.5, annotation="Number of Students"),
+        box_chart(stats, "department", "gender", title, y_title="total_score"),
+        scatter_chart(students, "study_hours_per_week", "total_score", title, color="gender", budget=500),
+        heatmap_chart(matrix, title),
+        timeline_chart(spans(3), title),
+    ]
+
+
+def test_templates_are_shared_across_titles(students, templates):
+    first = every_chart(students, "First")
+    built = dict(templates)
+    second = every_chart(students, "Second")
+    assert templates == built
+    for a, b in zip(first, second):
+        assert a["layout"]["title"]["text"] == "First" and b["layout"]["title"]["text"] == "Second"
+        assert {**a["layout"], "title": None} == {**b["layout"], "title": None}
+    # Patching a title never touches the shared template.
+    assert all("text" not in repr(layout.get("title", {})) for layout in templates.values() if isinstance(layout, dict))
+
+
+def test_rerun_timelines_do_not_grow_the_templates(templates):
+    for rerun in range(50):
+        fig = timeline_chart(spans(rerun % 7 + 1), f"Rerun #{rerun}")
+        assert fig["layout"]["height"] == 120 + 18 * (rerun % 7 + 1)
+    assert len(templates) == 1
+
+
+def test_cohort_heatmaps_build_once(students, templates, monkeypatch):
+    import plotly.express as px
+
+    calls = []
+    imshow = px.imshow
+    monkeypatch.setattr(px, "imshow", lambda *args, **kwargs: calls.append(1) or imshow(*args, **kwargs))
+    matrix = students[["total_score", "attendance"]].corr()
+    for label in ["CS", "Engineering", "CS, Female", "Business"]:
+        heatmap_chart(matrix, f"{label} (pearson)", width=600, height=500)
+    assert len(calls) == 1 and len(templates) == 1
+
+
+def pruned(value):
+    # Empty objects, which plotly leaves out once a figure is validated.
+    if isinstance(value, dict):
+        value = {name: pruned(item) for name, item in value.items()}
+        return {name: item for name, item in value.items() if item != {}}
+    return [pruned(item) for item in value] if isinstance(value, list) else value
+
+
+def test_figures_match_plotly(students):
+    for fig in every_chart(students, "Title"):
+        # Validating the dict through plotly changes nothing; the layouts carry plotly's default
+        # template, which is left out of the comparison for brevity of failures.
+        spec = json.loads(pio.to_json(fig, validate=False))
+        validated = json.loads(go.Figure(fig).to_json())
+        assert spec["layout"].pop("template") == validated["layout"].pop("template")
+        assert pruned(spec) == validated
+        assert {name: spec["layout"]["title"][name] for name in ["text", "x", "xanchor"]} == {
+            "text": "Title", "x": 0.5, "xanchor": "center"
+        }
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import AVERAGE_COLUMNS
+from backends import PandasBackend, SQLBackend
+from cohorts import cohort_labels
+from store import StudentStore
+
+COHORTS = [
+    {"department": ["CS"], "gender": "Female", "age_group": ["18-20"]},
+    {"department": ["Engineering"], "gender": "Male"},
+    {"department": ["CS", "Engineering"]},
+    {"department": ["Nope"]},
+]
+
+
+@pytest.fixture(scope="module")
+def pandas_backend(students):
+    return PandasBackend(StudentStore(students))
+
+
+@pytest.fixture(scope="module", params=["sqlite", "duckdb"])
+def sql_backend(request, source):
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+    return SQLBackend(source, engine=request.param)
+
+
+def members(df, cohort):
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in cohort.items():
+        mask &= df[column].astype(str).isin([values] if isinstance(values, str) else values).to_numpy()
+    return df[mask]
+
+
+def test_labels():
+    assert cohort_labels([{"department": ["CS", "Art"], "gender": "Male"}, {}, {}, {"age_group": []}]) == [
+        "Art+CS-Male", "All", "All (2)", "All (3)",
+    ]
+
+
+def test_comparison_matches_each_cohort(students, pandas_backend):
+    comparison = pandas_backend.compare(COHORTS)
+    assert comparison.labels == cohort_labels(COHORTS)
+    for label, cohort in zip(comparison.labels, COHORTS):
+        rows = members(students, cohort)
+        assert comparison.counts[label] == len(rows)
+        expected = pd.Series({name: rows[column].astype("float64").mean() for name, column in AVERAGE_COLUMNS.items()})
+        pd.testing.assert_series_equal(comparison.averages[label], expected, rtol=1e-6, check_names=False)
+        grades = rows["grade"].astype(str).value_counts().reindex(comparison.grade_distribution.index, fill_value=0)
+        assert comparison.grade_distribution[label].to_dict() == grades.to_dict()
+        if len(rows) > 1:
+            correlations = comparison.correlations[label]
+            expected = rows[list(correlations.columns)].astype("float64").corr()
+            pd.testing.assert_frame_equal(correlations, expected, atol=1e-6, check_names=False)
+
+
+def test_sql_comparison_matches_pandas(pandas_backend, sql_backend):
+    comparison, expected = sql_backend.compare(COHORTS), pandas_backend.compare(COHORTS)
+    pd.testing.assert_series_equal(comparison.counts, expected.counts, check_dtype=False)
+    pd.testing.assert_frame_equal(comparison.averages, expected.averages, rtol=1e-6)
+    for label in comparison.labels:
+        pd.testing.assert_frame_equal(comparison.correlations[label], expected.correlations[label], atol=1e-6)
@@ -0,0 +1,33 @@
+import numpy as np
+
+from cube import Cube
+from data import NUMERIC_COLUMNS
+
+
+def test_cell_sketches_hold_each_cell_rows(students):
+    cube = Cube(students)
+    groups = students.groupby(cube.dimensions, observed=True)
+    assert len(cube.sketches) == groups.ngroups == len(cube.cells)
+    for key, group in groups:
+        sketches = cube.sketches[tuple(map(str, key))]
+        for column in NUMERIC_COLUMNS:
+            values = group[column].to_numpy(dtype="float64")
+            # Cells this small are never compacted, so the sketch holds exactly their values.
+            np.testing.assert_array_equal(np.sort(sketches[column].levels[0]), np.sort(values))
+            assert sketches[column].n == len(values)
+            assert (sketches[column].min, sketches[column].max) == (values.min(), values.max())
+
+
+def test_rollups_match_groupby(students):
+    cube = Cube(students)
+    selection = {"gender": "Female", "age_group": ["18-20", "21-23"]}
+    rows = students[(students["gender"] == "Female") & students["age_group"].isin(selection["age_group"])]
+    np.testing.assert_array_equal(
+        cube.counts("department", selection).sort_index(), rows["department"].value_counts().sort_index()
+    )
+    np.testing.assert_allclose(
+        cube.means(["department"], "total_score", selection).sort_index(),
+        rows.groupby("department", observed=True)["total_score"].mean().sort_index(),
+        rtol=1e-6,
+    )
+    assert cube.sketch("total_score", selection).n == len(rows)
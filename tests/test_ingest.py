@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from data import CATEGORICAL_COLUMNS, NUMERIC_COLUMNS
+from ingest import RunningStats, ingest
+
+
+def chunked(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_running_stats_match_describe(students):
+    stats = RunningStats()
+    for chunk in chunked(students, 700):
+        stats.update(chunk)
+    described, expected = stats.describe(), students[NUMERIC_COLUMNS].astype("float64").describe()
+    moments = ["count", "mean", "std", "min", "max"]
+    pd.testing.assert_frame_equal(described.loc[moments], expected.loc[moments], rtol=1e-9)
+    error = stats.quantile_error()
+    for column in NUMERIC_COLUMNS:
+        quartiles = described.loc[["25%", "50%", "75%"], column].to_numpy()
+        # Exact columns differ from describe() only by the float32 storage of their decimals.
+        bound = error[column] or np.spacing(np.float32(expected.at["max", column]))
+        np.testing.assert_allclose(quartiles, expected.loc[["25%", "50%", "75%"], column], rtol=0, atol=bound)
+
+
+def test_quantile_error_flags_unrounded_columns(students):
+    stats = RunningStats()
+    stats.update(students)
+    error = stats.quantile_error()
+    assert 0 < error["assignments_avg"] <= 0.005
+    assert error["total_score"] == error["age"] == 0
+
+
+def test_category_counts_match_value_counts(students):
+    stats = RunningStats()
+    for chunk in chunked(students, 999):
+        stats.update(chunk)
+    for column in CATEGORICAL_COLUMNS:
+        expected = students[column].value_counts()
+        assert stats.value_counts(column).to_dict() == dict(zip(expected.index.astype(str), expected))
+    assert stats.describe_categorical().at["freq", "department"] == students["department"].value_counts().iloc[0]
+
+
+def test_ingest_spills_every_row(source, students, tmp_path):
+    result = ingest(source, chunksize=1500, snapshot=str(tmp_path / "s.parquet"))
+    assert result.rows == len(students)
+    assert result.summary().count == len(students)
+    assert result.summary({"gender": "Female"}).count == (students["gender"] == "Female").sum()
+    assert len(pd.read_parquet(tmp_path / "s.parquet")) == len(students)
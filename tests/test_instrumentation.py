@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+import threading
+
+import pytest
+
+import instrumentation
+from instrumentation import count, span, start, to_csv, to_json
+
+
+@pytest.fixture
+def trace():
+    trace = start("#1")
+    yield trace
+    instrumentation._current.set(None)
+
+
+def test_spans_nest(trace):
+    with span("load"):
+        with span("read"):
+            count("rows_read", 10)
+        with span("parse"):
+            pass
+    with span("render"):
+        count("rows_read", 5)
+    records = sorted(trace.finish().records(), key=lambda record: record["start_ms"])
+    assert [(record["span"], record["depth"]) for record in records] == [
+        ("load", 0), ("read", 1), ("parse", 1), ("render", 0),
+    ]
+    load = records[0]
+    for child in records[1:3]:
+        assert load["start_ms"] <= child["start_ms"]
+        assert child["start_ms"] + child["duration_ms"] <= load["start_ms"] + load["duration_ms"]
+    assert trace.counters == {"rows_read": 15}
+    assert trace.duration_ms >= load["duration_ms"]
+
+
+def test_spans_record_failures(trace):
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError
+    with span("after"):
+        pass
+    assert [(name, depth) for name, depth, _, _ in trace.spans] == [("failing", 0), ("after", 0)]
+
+
+def test_no_trace_no_records():
+    assert instrumentation.current() is None
+    with span("ignored"):
+        count("ignored")
+    assert instrumentation.current() is None
+
+
+def test_traces_are_per_thread(trace):
+    def other():
+        assert instrumentation.current() is None
+        with span("elsewhere"):
+            pass
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    thread.join()
+    assert trace.spans == []
+
+
+def test_exports(trace):
+    with span("load"):
+        count("rows_read", 3)
+    second = start("#2")
+    with span("render"):
+        count("bytes_sent", 7)
+    traces = [trace.finish(), second.finish()]
+
+    exported = json.loads(to_json(traces))
+    assert [item["rerun"] for item in exported] == ["#1", "#2"]
+    assert exported[0]["counters"] == {"rows_read": 3}
+    assert [record["span"] for record in exported[1]["spans"]] == ["render"]
+
+    rows = list(csv.DictReader(io.StringIO(to_csv(traces))))
+    assert [(row["rerun"], row["span"], row["rows_read"], row["bytes_sent"]) for row in rows] == [
+        ("#1", "load", "3", "0"), ("#2", "render", "0", "7"),
+    ]
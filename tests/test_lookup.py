@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backends import PandasBackend, SQLBackend
+from data import expand_ids, load_students
+from store import StudentStore
+
+TEXTS = ["S1042", "s1042", "student42@university.com", "emma", "ali", "Omar Williams", "nobody"]
+
+
+@pytest.fixture(scope="module", params=["sqlite", "duckdb"])
+def stacked(request, students, tmp_path_factory):
+    # Two terms of the same students in one export, so every id and email matches two rows.
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+    terms = expand_ids(students)
+    later = terms.assign(total_score=terms["total_score"] / 2)
+    path = str(tmp_path_factory.mktemp("stacked") / "students.csv")
+    pd.concat([terms, later], ignore_index=True).to_csv(path, index=False)
+    return SQLBackend(path, engine=request.param), PandasBackend(StudentStore(load_students(path)))
+
+
+@pytest.fixture(scope="module", params=["sqlite", "duckdb"])
+def backends(request, source, students):
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+    return SQLBackend(source, engine=request.param), PandasBackend(StudentStore(students))
+
+
+def test_sql_lookup_matches_pandas(backends):
+    sql_backend, pandas_backend = backends
+    # Past the limit each backend picks its own subset of name matches, so every match is fetched.
+    for text in TEXTS:
+        rows, total = sql_backend.lookup(text, 5000, ["student_id"])
+        expected_rows, expected_total = pandas_backend.lookup(text, 5000, ["student_id"])
+        assert total == expected_total
+        assert sorted(rows["student_id"]) == sorted(expected_rows["student_id"])
+
+
+def test_exact_lookup_returns_every_match(stacked):
+    sql_backend, pandas_backend = stacked
+    for text in ["S1042", "student42@university.com"]:
+        rows, total = sql_backend.lookup(text, columns=["student_id", "total_score"])
+        expected_rows, expected_total = pandas_backend.lookup(text, columns=["student_id", "total_score"])
+        assert total == expected_total == 2
+        assert rows["student_id"].tolist() == expected_rows["student_id"].tolist() == ["S1042"] * 2
+        np.testing.assert_allclose(rows["total_score"], expected_rows["total_score"], rtol=1e-6)
+        assert len(sql_backend.lookup(text, 1)[0]) == len(pandas_backend.lookup(text, 1)[0]) == 1
+
+
+@pytest.mark.parametrize("text", ["S1042", "s1042", "student42@university.com", "STUDENT42@university.com"])
+def test_percentile_rank_by_id_or_email(backends, stacked, text):
+    for sql_backend, pandas_backend in [backends, stacked]:
+        rank = pandas_backend.percentile_rank(text)
+        assert rank is not None
+        assert sql_backend.percentile_rank(text) == pytest.approx(rank)
+        selection = {"gender": "Female"}
+        assert sql_backend.percentile_rank(text, selection) == pytest.approx(pandas_backend.percentile_rank(text, selection))
+    assert sql_backend.percentile_rank("nobody") is pandas_backend.percentile_rank("nobody") is None
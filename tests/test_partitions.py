@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import expand_ids
+from partitions import TERM_COLUMN, Manifest
+
+FALL, SPRING = "2024-Fall", "2025-Spring"
+
+
+def spring(students):
+    # A second term at half the scores (25-50 against the fall's 50-100), with no Mathematics.
+    later = students[students["department"] != "Mathematics"].reset_index(drop=True)
+    return later.assign(total_score=(later["total_score"] / 2).astype("float32"))
+
+
+@pytest.fixture(scope="module")
+def manifest(students, tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("partitions"))
+    manifest = Manifest(root)
+    manifest.add(FALL, students)
+    manifest.add(SPRING, spring(students))
+    manifest.save()
+    return Manifest(root)
+
+
+def kept(entries):
+    return [(entry["term"], entry["department"]) for entry in entries]
+
+
+def test_manifest_describes_every_partition(manifest, students):
+    assert manifest.terms == [FALL, SPRING]
+    assert len(manifest.partitions) == 7
+    assert sum(entry["rows"] for entry in manifest.partitions) == len(students) + len(spring(students))
+    for entry in manifest.partitions:
+        rows = students[students["department"] == entry["department"]]
+        if entry["term"] == FALL:
+            assert entry["rows"] == len(rows)
+            assert entry["ranges"]["total_score"] == [float(rows["total_score"].min()), float(rows["total_score"].max())]
+
+
+def test_prune_by_term_and_selection(manifest):
+    assert kept(manifest.prune([SPRING])) == [(SPRING, "Business"), (SPRING, "CS"), (SPRING, "Engineering")]
+    assert kept(manifest.prune([], {"department": ["CS"]})) == [(FALL, "CS"), (SPRING, "CS")]
+    assert kept(manifest.prune([SPRING], {"department": ["Mathematics"]})) == []
+    # Every partition holds both genders, so a gender filter skips none.
+    assert len(manifest.prune(None, {"gender": "Female"})) == 7
+
+
+def test_prune_by_range(manifest):
+    assert {term for term, _ in kept(manifest.prune(ranges={"total_score": (60, 100)}))} == {FALL}
+    assert {term for term, _ in kept(manifest.prune(ranges={"total_score": (0, 40)}))} == {SPRING}
+    assert manifest.prune(ranges={"total_score": (101, 200)}) == []
+
+
+def test_read_kept_partitions(manifest, students):
+    df = manifest.read([FALL], {"department": ["CS", "Art"]})
+    assert df[TERM_COLUMN].astype(str).eq(FALL).all()
+    assert list(df[TERM_COLUMN].cat.categories) == [FALL, SPRING]
+    rows = expand_ids(df).drop(columns=TERM_COLUMN)
+    expected = expand_ids(students[students["department"] == "CS"]).reset_index(drop=True)[list(rows.columns)]
+    pd.testing.assert_frame_equal(rows.astype(str), expected.astype(str))
+    assert len(manifest.read()) == len(students) + len(spring(students))
+    # Nothing kept still gives the columns, with no rows.
+    assert manifest.read([SPRING], {"department": ["Mathematics"]}).empty
+
+
+@pytest.mark.parametrize("selection", [{}, {"gender": "Female"}, {"gender": "Male", "age_group": ["18-20"]}])
+def test_trends_match_the_rows(manifest, students, selection):
+    rows = pd.concat([
+        students.assign(**{TERM_COLUMN: FALL}), spring(students).assign(**{TERM_COLUMN: SPRING})
+    ], ignore_index=True)
+    for column, values in selection.items():
+        rows = rows[rows[column].astype(str).isin([values] if isinstance(values, str) else values)]
+    rows = rows.assign(department=rows["department"].astype(str), total_score=rows["total_score"].astype("float64"))
+    expected = rows.groupby([TERM_COLUMN, "department"])["total_score"].mean().unstack("department")
+    trends = manifest.trends("total_score", selection)
+    pd.testing.assert_frame_equal(trends, expected, check_names=False, rtol=1e-9)
+    assert np.isnan(trends.at[SPRING, "Mathematics"])
+
+
+def test_rewritten_term_replaces_its_partitions(students, tmp_path):
+    manifest = Manifest(str(tmp_path))
+    manifest.add(FALL, students)
+    manifest.add(SPRING, students)
+    manifest.add(FALL, spring(students))
+    assert manifest.terms == [FALL, SPRING]
+    assert kept(manifest.prune([FALL])) == [(FALL, "Business"), (FALL, "CS"), (FALL, "Engineering")]
+    assert not (tmp_path / f"{TERM_COLUMN}={FALL}" / "department=Mathematics.feather").exists()
+    with pytest.raises(ValueError):
+        manifest.add("../elsewhere", students)
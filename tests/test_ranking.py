@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from store import StudentStore
+
+SELECTIONS = [
+    {},
+    {"gender": "Female"},
+    {"department": ["CS", "Art"], "age_group": ["18-20"]},
+    {"gender": "Male", "department": ["Mathematics"]},
+]
+
+
+@pytest.fixture(scope="module")
+def store(students):
+    return StudentStore(students)
+
+
+def selected(store, selection):
+    positions = pd.Series(store.filter_engine.row_ids(selection))
+    return positions, store.df.iloc[positions].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+@pytest.mark.parametrize("column", ["total_score", "final_score", "attendance"])
+def test_top_matches_nlargest(store, selection, column):
+    positions, rows = selected(store, selection)
+    np.testing.assert_array_equal(
+        store.ranking.top(selection, column, 7), positions[rows[column].nlargest(7).index].to_numpy()
+    )
+    np.testing.assert_array_equal(
+        store.ranking.top(selection, column, 7, ascending=True), positions[rows[column].nsmallest(7).index].to_numpy()
+    )
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_leaderboard_ranks_each_group(store, selection):
+    positions, rows = selected(store, selection)
+    leaderboard = store.ranking.leaderboard(selection, "department", "total_score", 3)
+    assert list(leaderboard) == sorted(rows["department"].astype(str).unique())
+    for department, top in leaderboard.items():
+        group = rows[rows["department"].astype(str) == department]["total_score"]
+        np.testing.assert_array_equal(top, positions[group.nlargest(3).index].to_numpy())
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_percentile_rank_counts_scores_at_or_below(store, selection):
+    positions, rows = selected(store, selection)
+    scores = rows["total_score"].dropna()
+    for i in [0, len(rows) // 2, len(rows) - 1]:
+        value = rows["total_score"].iat[i]
+        expected = 100 * (scores <= value).sum() / len(scores)
+        assert store.ranking.percentile_rank(positions[i], selection) == pytest.approx(expected)
+
+
+def test_percentile_rank_of_an_empty_selection(store):
+    assert np.isnan(store.ranking.percentile_rank(0, {"department": ["Nope"]}))
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from cube import Cube
+from regression import OLSStats, stats_from_cube, stats_from_rows
+
+X, Y = "study_hours_per_week", "total_score"
+
+
+def polyfit(x, y):
+    x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    slope, intercept = np.polyfit(x, y, 1)
+    residual = y - (slope * x + intercept)
+    return slope, intercept, 1 - (residual**2).sum() / ((y - y.mean()) ** 2).sum(), residual
+
+
+def test_fit_matches_polyfit(students):
+    fit = OLSStats.from_arrays(students[X], students[Y]).fit()
+    slope, intercept, r2, residual = polyfit(students[X], students[Y])
+    assert fit.slope == pytest.approx(slope, rel=1e-9)
+    assert fit.intercept == pytest.approx(intercept, rel=1e-9)
+    assert fit.r2 == pytest.approx(r2, rel=1e-6)
+    assert fit.sigma == pytest.approx(np.sqrt((residual**2).sum() / (len(residual) - 2)), rel=1e-6)
+    np.testing.assert_allclose(fit.predict([0, 10]), [intercept, intercept + 10 * slope])
+
+
+def test_merged_statistics_fit_like_the_whole(students):
+    halves = [students.iloc[:1234], students.iloc[1234:]]
+    merged = OLSStats().update(halves[0][X], halves[0][Y]) + OLSStats.from_arrays(halves[1][X], halves[1][Y])
+    whole = OLSStats.from_arrays(students[X], students[Y])
+    assert merged.fit().slope == pytest.approx(whole.fit().slope, rel=1e-9)
+    assert merged.fit().intercept == pytest.approx(whole.fit().intercept, rel=1e-9)
+
+
+def test_band_surrounds_the_line(students):
+    fit = OLSStats.from_arrays(students[X], students[Y]).fit()
+    x = np.linspace(0, 30, 7)
+    lower, upper = fit.band(x)
+    assert np.all(lower < fit.predict(x)) and np.all(fit.predict(x) < upper)
+    # Narrowest at the mean of x.
+    widths = upper - lower
+    assert widths.argmin() == np.abs(x - fit.mean_x).argmin()
+
+
+def test_degenerate_inputs_have_no_fit():
+    assert OLSStats.from_arrays([1, 2], [3, 4]).fit() is None
+    assert OLSStats.from_arrays([2, 2, 2], [1, 2, 3]).fit() is None
+
+
+def test_cube_statistics_match_the_rows(students):
+    selection = {"department": ["CS", "Business"]}
+    rows = students[students["department"].isin(selection["department"])]
+    from_cube = stats_from_cube(Cube(students), X, Y, "gender", selection)
+    from_rows = stats_from_rows(rows, X, Y, "gender")
+    assert set(from_cube) == set(from_rows)
+    for group, stats in from_rows.items():
+        slope, intercept, _, _ = polyfit(rows.loc[rows["gender"] == group, X], rows.loc[rows["gender"] == group, Y])
+        assert from_cube[group].fit().slope == pytest.approx(stats.fit().slope, rel=1e-6)
+        assert from_cube[group].fit().slope == pytest.approx(slope, rel=1e-6)
+        assert from_cube[group].fit().intercept == pytest.approx(intercept, rel=1e-6)
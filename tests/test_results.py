@@ -0,0 +1,110 @@
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import results
+from data import batch_version
+from results import ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(results.time, "monotonic", clock)
+    return clock
+
+
+def test_hits_skip_the_computation():
+    cache = ResultCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get(("v", "a"), lambda: calls.append(1) or "value") == "value"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResultCache(ttl=60)
+    cache.get("key", lambda: 1)
+    clock.now += 59
+    assert cache.get("key", lambda: 2) == 1
+    clock.now += 2
+    assert cache.get("key", lambda: 2) == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted_by_size():
+    size = len(pickle.dumps("x" * 1000, pickle.HIGHEST_PROTOCOL))
+    cache = ResultCache(max_bytes=3 * size)
+    for key in "abc":
+        cache.get(key, lambda: "x" * 1000)
+    cache.get("a", lambda: None)
+    cache.get("d", lambda: "x" * 1000)
+    assert cache.nbytes == 3 * size
+    assert cache.stats()["evictions"] == 1
+    # "b" was the least recently used.
+    assert cache.get("b", lambda: "recomputed") == "recomputed"
+
+
+def test_values_larger_than_the_cache_are_not_kept():
+    cache = ResultCache(max_bytes=100)
+    assert cache.get("big", lambda: "x" * 1000) == "x" * 1000
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_disk_entries_warm_a_new_cache(tmp_path):
+    ResultCache(directory=str(tmp_path)).get(("v", "a"), lambda: pd.DataFrame({"x": [1, 2]}))
+    restarted = ResultCache(directory=str(tmp_path))
+    value = restarted.get(("v", "a"), lambda: pytest.fail("recomputed"))
+    pd.testing.assert_frame_equal(value, pd.DataFrame({"x": [1, 2]}))
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_stale_disk_entries_are_dropped(tmp_path):
+    ResultCache(ttl=60, directory=str(tmp_path)).get("key", lambda: 1)
+    (path,) = tmp_path.iterdir()
+    os.utime(path, (time.time() - 120,) * 2)
+    assert ResultCache(ttl=60, directory=str(tmp_path)).get("key", lambda: 2) == 2
+    os.utime(path, (time.time() - 120,) * 2)
+    ResultCache(ttl=60, directory=str(tmp_path))
+    assert not list(tmp_path.iterdir())
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    calls, started = [], threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "value"
+
+    values = []
+    threads = [threading.Thread(target=lambda: values.append(cache.get("key", compute))) for _ in range(4)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert values == ["value"] * 4 and len(calls) == 1
+
+
+def test_batch_versions_follow_content_and_order():
+    first, second = pd.DataFrame({"x": [1, 2]}), pd.DataFrame({"x": [3]})
+    assert batch_version(batch_version("", first), second) == batch_version(batch_version("", first.copy()), second)
+    assert batch_version(batch_version("", first), second) != batch_version(batch_version("", second), first)
+    assert batch_version("", first) != batch_version("", first.assign(x=[1, 5]))
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from charts import WEBGL_THRESHOLD, scatter_chart
+from sampling import density_grid, stratified_sample
+
+
+def test_small_frames_are_not_sampled(students):
+    assert stratified_sample(students, ["gender"], len(students)) is students
+
+
+def test_stratified_sample_keeps_each_group_share(students):
+    strata = ["gender", "department"]
+    sample = stratified_sample(students, strata, 1000)
+    assert len(sample) <= 1000
+    assert sample.index.is_unique and sample.index.is_monotonic_increasing
+    shares = students.groupby(strata, observed=True).size() / len(students)
+    sampled = sample.groupby(strata, observed=True).size()
+    np.testing.assert_allclose(sampled, np.maximum(1, np.floor(shares * 1000)))
+    pd.testing.assert_frame_equal(sample, stratified_sample(students, strata, 1000))
+
+
+def test_every_stratum_keeps_a_point(students):
+    rare = students.iloc[np.r_[0:len(students), 0]].reset_index(drop=True)
+    rare["gender"] = rare["gender"].cat.add_categories("Other")
+    rare.loc[len(rare) - 1, "gender"] = "Other"
+    assert (stratified_sample(rare, ["gender"], 100)["gender"] == "Other").sum() == 1
+
+
+def test_density_grid_counts_every_point(students):
+    x, y = students["study_hours_per_week"].to_numpy(), students["total_score"].to_numpy()
+    x_centers, y_centers, counts = density_grid(x, y, bins=20)
+    assert counts.shape == (20, 20) and len(x_centers) == len(y_centers) == 20
+    expected = np.histogram2d(x.astype("float64"), y.astype("float64"), bins=20)[0].T
+    np.testing.assert_array_equal(counts, expected)
+    assert counts.sum() == len(students)
+
+
+def test_density_grid_skips_missing_values():
+    _, _, counts = density_grid([1.0, np.nan, 2.0, 3.0], [1.0, 2.0, np.nan, 3.0], bins=4)
+    assert counts.sum() == 2
+
+
+def test_scatter_payload_is_bounded(students):
+    fig = scatter_chart(students, "study_hours_per_week", "total_score", "t", color="gender", budget=600)
+    assert sum(len(trace["x"]) for trace in fig["data"]) <= 600
+    assert {trace["type"] for trace in fig["data"]} == {"scatter"}
+
+    doubled = pd.concat([students, students], ignore_index=True)
+    fig = scatter_chart(doubled, "study_hours_per_week", "total_score", "t", color="gender", budget=len(doubled))
+    assert sum(len(trace["x"]) for trace in fig["data"]) == len(doubled) > WEBGL_THRESHOLD
+    assert {trace["type"] for trace in fig["data"]} == {"scattergl"}
+
+    fig = scatter_chart(students, "study_hours_per_week", "total_score", "t", mode="density", bins=30)
+    assert [trace["type"] for trace in fig["data"]] == ["heatmap"]
+    assert np.asarray(fig["data"][0]["z"]).sum() == len(students)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import BOX, BOX_STATS, summarize, summarize_cube
+from cube import Cube
+from data import NUMERIC_COLUMNS
+from sketches import KLLSketch, box_stats, merge_all
+
+EMPTY = {"gender": "Male", "department": ["Nope"], "age_group": []}
+
+
+def test_exact_sketch_quartiles_match_describe(students):
+    for column in NUMERIC_COLUMNS:
+        values = students[column].to_numpy()[:150]
+        described = pd.Series(values).describe()
+        stats = box_stats(KLLSketch.from_values(values))
+        np.testing.assert_allclose(
+            [stats["q1"], stats["median"], stats["q3"]], described[["25%", "50%", "75%"]], rtol=1e-6
+        )
+
+
+def test_compacted_sketch_stays_within_its_rank_error():
+    values = np.random.default_rng(1).normal(size=200_000)
+    sketch = merge_all(KLLSketch.from_values(part) for part in np.array_split(values, 40))
+    assert sketch.n == len(values) and sketch.min == values.min() and sketch.max == values.max()
+    assert sum(len(level) for level in sketch.levels) < 2000
+    ordered = np.sort(values)
+    for q in [0.01, 0.25, 0.5, 0.75, 0.99]:
+        rank = np.searchsorted(ordered, sketch.quantile(q)) / len(values)
+        assert abs(rank - q) <= sketch.rank_error
+
+
+def test_sketches_skip_missing_values():
+    sketch = KLLSketch.from_values([1.0, np.nan, 3.0])
+    assert sketch.n == 2 and sketch.quantile(0.5) == 2.0
+    assert np.isnan(KLLSketch().quantile(0.5))
+
+
+def test_cube_summary_quartiles_are_close_to_describe(students):
+    summary = summarize_cube(Cube(students), {"gender": "Female"})
+    expected = summarize(students[students["gender"] == "Female"])
+    np.testing.assert_allclose(summary.numerical.loc["count"], expected.numerical.loc["count"])
+    spread = expected.numerical.loc["max"] - expected.numerical.loc["min"]
+    for quartile in ["25%", "50%", "75%"]:
+        error = (summary.numerical.loc[quartile] - expected.numerical.loc[quartile]).abs() / spread
+        assert (error < 0.05).all()
+
+
+def test_empty_cube_summary(students):
+    x, _, color = BOX
+    summary = summarize_cube(Cube(students), EMPTY)
+    assert summary.count == 0
+    assert list(summary.box_stats.columns) == [x, color, *BOX_STATS]
@@ -0,0 +1,49 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from data import ID_COLUMN, expand_ids, read_students, resolve_data_path
+from snapshot import convert, read_snapshot, snapshot_columns, write_snapshot
+
+
+@pytest.mark.parametrize("fmt", ["feather", "parquet"])
+def test_snapshot_round_trip(source, students, tmp_path, fmt):
+    path = convert(source, str(tmp_path / f"s.{fmt}"))
+    df = read_students(path)
+    assert ID_COLUMN in snapshot_columns(path)
+    pd.testing.assert_frame_equal(df, students)
+
+
+def test_feather_columns_are_memory_mapped(source, tmp_path):
+    df = read_students(convert(source, str(tmp_path / "s.feather")))
+    assert not df["total_score"].to_numpy().flags.writeable
+    assert not df[ID_COLUMN].to_numpy().flags.writeable
+
+
+@pytest.mark.parametrize("fmt", ["feather", "parquet"])
+def test_snapshot_projection(source, tmp_path, fmt):
+    columns = ["student_id", "email", "total_score", "department"]
+    df = read_snapshot(convert(source, str(tmp_path / f"s.{fmt}")), columns)
+    # Both ids come from the one compact column.
+    assert list(df.columns) == [ID_COLUMN, "total_score", "department"]
+    assert df["department"].dtype == "category"
+    pd.testing.assert_frame_equal(expand_ids(df), read_students(source, columns)[columns], check_dtype=False)
+
+
+def test_ids_off_the_pattern_stay_text(students, tmp_path):
+    df = expand_ids(students).head(20).copy()
+    df["student_id"] = df["student_id"].astype(object)
+    df.loc[3, "student_id"] = "X-17"
+    path = write_snapshot(df, str(tmp_path / "s.feather"))
+    assert "student_id" in snapshot_columns(path)
+    assert read_snapshot(path)["student_id"].tolist() == df["student_id"].tolist()
+
+
+def test_newer_snapshot_is_preferred(source, tmp_path):
+    source = str(shutil.copy(source, tmp_path / "students.csv"))
+    snapshot = convert(source)
+    assert resolve_data_path(source) == snapshot
+    os.utime(source, ns=(os.stat(snapshot).st_mtime_ns + 10**9,) * 2)
+    assert resolve_data_path(source) == source
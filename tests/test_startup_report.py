@@ -0,0 +1,15 @@
+from startup_report import APP, app_imports, import_times
+
+
+def test_app_imports_split_startup_from_deferred():
+    startup, deferred = app_imports(APP)
+    assert "streamlit" in startup and "backends" in startup
+    # Chart and tab modules load on first use.
+    assert "charts" in deferred and "charts" not in startup
+    assert not set(startup) & set(deferred)
+
+
+def test_import_times_leave_out_the_baseline():
+    baseline = set(import_times([]))
+    times = import_times(["json"], baseline)
+    assert "json" in times and not set(times) & baseline
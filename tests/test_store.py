@@ -0,0 +1,182 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data
+from data import expand_ids, load_students, read_students
+from ranking import RANKED_COLUMNS
+from store import StudentStore, batch_directory, poll_inbox
+
+SELECTIONS = [
+    {},
+    {"gender": "Female"},
+    {"department": ["CS", "Art"], "age_group": ["18-20"]},
+    {"gender": "Male", "department": ["Mathematics"]},
+]
+
+SORT_COLUMNS = ["total_score", "age", "department", "full_name", "student_id", "email"]
+
+
+def make_batch(df, seed=0):
+    # Corrections to existing students (new scores, some moved to a new department) and new
+    # students, one of whom has a name no one had before.
+    rng = np.random.default_rng(seed)
+    rows = expand_ids(df)
+    updates = rows.iloc[rng.choice(len(rows), 40, replace=False)].astype(object)
+    updates["total_score"] = rng.uniform(0, 100, len(updates)).round(2)
+    updates["final_score"] = rng.uniform(0, 100, len(updates)).round(2)
+    updates.iloc[:5, updates.columns.get_loc("department")] = "Art"
+    inserts = rows.iloc[:10].astype(object)
+    inserts["student_id"] = [f"S{900_000 + i}" for i in range(10)]
+    inserts["email"] = [f"student{899_000 + i}@university.com" for i in range(10)]
+    inserts["full_name"] = ["Zed Quux"] + list(inserts["full_name"].iloc[1:])
+    inserts["total_score"] = rng.uniform(0, 100, len(inserts)).round(2)
+    return pd.concat([updates, inserts], ignore_index=True)
+
+
+def recomputed(df, batch, tmp_path):
+    # The same table built from scratch: updated rows replaced in place, new rows appended, read
+    # back through the loader so dtypes and categories come out as they do for a fresh load.
+    table = expand_ids(df).astype(object).set_index("student_id")
+    batch = batch.set_index("student_id")
+    existing = batch.index.isin(table.index)
+    table.loc[batch.index[existing]] = batch[existing]
+    table = pd.concat([table, batch[~existing]]).reset_index()
+    path = tmp_path / "recomputed.csv"
+    table.to_csv(path, index=False)
+    return load_students(str(path))
+
+
+def read_students_frame(batch, tmp_path):
+    path = tmp_path / "batch.csv"
+    batch.to_csv(path, index=False)
+    return read_students(str(path))
+
+
+@pytest.fixture(scope="module")
+def upserted(students, tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("upsert")
+    store = StudentStore(students)
+    # Build every lazy index first, so the upsert has to keep them in step rather than skip them.
+    for column in RANKED_COLUMNS:
+        store.ranking.top(None, column)
+    for column in SORT_COLUMNS:
+        store.table_view.sort_index(column)
+    store.lookup.search("emma")
+    store.locate("S1000")
+    store.correlation.spearman
+    batch = make_batch(students)
+    store.upsert(read_students_frame(batch, tmp_path))
+    return store, StudentStore(recomputed(students, batch, tmp_path))
+
+
+def test_upsert_leaves_the_loaded_frame_untouched(students, tmp_path):
+    before = students.copy()
+    store = StudentStore(students)
+    store.upsert(read_students_frame(make_batch(students), tmp_path))
+    pd.testing.assert_frame_equal(students, before)
+    assert len(store.df) == len(students) + 10
+
+
+def test_upsert_matches_the_recomputed_table(upserted):
+    store, fresh = upserted
+    pd.testing.assert_frame_equal(
+        expand_ids(store.df).astype(str).reset_index(drop=True),
+        expand_ids(fresh.df).astype(str).reset_index(drop=True),
+    )
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_upsert_matches_recomputed_aggregates(upserted, selection):
+    store, fresh = upserted
+    np.testing.assert_array_equal(store.filter_engine.row_ids(selection), fresh.filter_engine.row_ids(selection))
+    summary, expected = store.summaries.get(selection), fresh.summaries.get(selection)
+    assert summary.count == expected.count
+    for label, value in expected.averages.items():
+        np.testing.assert_allclose(summary.averages[label], value, rtol=1e-6)
+    for column, counts in expected.value_counts.items():
+        pd.testing.assert_series_equal(
+            summary.value_counts[column].astype("int64").sort_index(),
+            counts.astype("int64").sort_index(),
+            check_names=False,
+            check_index_type=False,
+            check_categorical=False,
+        )
+    pd.testing.assert_frame_equal(store.correlation.corr(selection), fresh.correlation.corr(selection), atol=1e-9)
+    # Spearman ranks new rows against the values it was built from, so it only stays close.
+    pd.testing.assert_frame_equal(
+        store.correlation.corr(selection, method="spearman"),
+        fresh.correlation.corr(selection, method="spearman"),
+        atol=1e-3,
+    )
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+@pytest.mark.parametrize("ascending", [False, True])
+def test_upsert_matches_recomputed_rankings(upserted, selection, ascending):
+    store, fresh = upserted
+    for column in RANKED_COLUMNS:
+        np.testing.assert_array_equal(
+            store.ranking.top(selection, column, 10, ascending), fresh.ranking.top(selection, column, 10, ascending)
+        )
+    position = int(fresh.filter_engine.row_ids(selection)[:1].sum())
+    assert store.ranking.percentile_rank(position, selection) == fresh.ranking.percentile_rank(position, selection)
+
+
+def test_upsert_matches_recomputed_sort_and_lookup(upserted):
+    store, fresh = upserted
+    for column in SORT_COLUMNS:
+        np.testing.assert_array_equal(store.table_view.sort_index(column), fresh.table_view.sort_index(column))
+    for text in ["zed", "emma", "john s", "S900003", "student899004@university.com", "S1010", "s1010"]:
+        rows, total = store.lookup.search(text)
+        expected_rows, expected_total = fresh.lookup.search(text)
+        np.testing.assert_array_equal(rows, expected_rows)
+        assert total == expected_total
+
+
+def test_inbox_batches_replay_in_a_new_store(students, source, tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    batch = make_batch(students)
+    batch.iloc[:25].to_csv(inbox / "first.csv", index=False)
+    batch.iloc[25:].to_csv(inbox / "second.csv", index=False)
+    store = StudentStore(students)
+    assert poll_inbox(store, source, str(inbox)) == 2
+    assert poll_inbox(store, source, str(inbox)) == 0
+    assert not list(inbox.glob("*.csv"))
+    assert len(os.listdir(batch_directory(str(inbox), source))) == 2
+
+    restarted = StudentStore(students)
+    assert poll_inbox(restarted, source, str(inbox)) == 2
+    assert restarted.version == store.version != StudentStore(students).version
+    pd.testing.assert_frame_equal(restarted.df, store.df)
+
+
+def test_inbox_batches_stay_with_their_export(students, source, tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    export = str(shutil.copy(source, tmp_path / "students.csv"))
+    make_batch(students).to_csv(inbox / "first.csv", index=False)
+    assert poll_inbox(StudentStore(students), export, str(inbox)) == 1
+    old = batch_directory(str(inbox), export)
+
+    # A newer export replaces the source: the old corrections are not replayed on top of it.
+    os.utime(export, ns=(os.stat(export).st_mtime_ns + 10**9,) * 2)
+    store = StudentStore(load_students(export))
+    assert poll_inbox(store, export, str(inbox)) == 0
+    assert store.version == ""
+    assert batch_directory(str(inbox), export) != old and len(os.listdir(old)) == 1
+
+
+def test_first_upsert_releases_the_cached_frame(source, tmp_path):
+    path = str(shutil.copy(source, tmp_path / "students.csv"))
+    loaded = load_students(path)
+    store = StudentStore(loaded)
+    assert load_students(path) is loaded
+    store.upsert(read_students_frame(make_batch(loaded), tmp_path))
+    assert store.df is not loaded
+    assert not any(cached is loaded for _, cached in data._cache.values())
+    assert load_students(path) is not loaded
@@ -0,0 +1,138 @@
+import contextlib
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data import ID_COLUMN, ID_COLUMNS, derive_ids, logical_columns, take_columns
+from instrumentation import count, span
+from sorting import merge_sorted, orderable
+
+SEARCH_COLUMNS = ["student_id", "email", "full_name"]
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+class TableView:
+    # Server-side sorting, searching and paging over one loaded frame; only a page is materialized.
+    # Sort indexes of numeric and categorical columns take upserted rows in by merging; text columns
+    # are re-sorted the next time they are asked for.
+
+    def __init__(self, df):
+        self.df = df
+        self._sort_indexes = {}
+        self._lock = threading.Lock()
+
+    def reset(self, df):
+        with self._lock:
+            self.df = df
+            self._sort_indexes.clear()
+
+    def update(self, df, changed):
+        # The rows at positions `changed` were rewritten or appended.
+        with self._lock:
+            self.df = df
+            for column, index in list(self._sort_indexes.items()):
+                keys = self._sort_keys(column)
+                if keys is None:
+                    del self._sort_indexes[column]
+                    continue
+                # Rows that did not change keep their relative order, so their keys stay sorted even
+                # when categories were added and the label ranks moved.
+                self._sort_indexes[column] = merge_sorted(keys[index], index, changed, len(df), keys[changed], changed)[1]
+
+    def _sort_values(self, column):
+        # Compact ids sort by their number; categoricals by label, whatever order categories were added in.
+        values = self.df[ID_COLUMN if column in ID_COLUMNS and ID_COLUMN in self.df else column]
+        if values.dtype == "category":
+            ranks = np.argsort(np.argsort(values.cat.categories.astype(str)))
+            codes = values.cat.codes.to_numpy()
+            values = pd.Series(np.where(codes >= 0, ranks[codes], len(ranks)))
+        return values.reset_index(drop=True)
+
+    def _sort_keys(self, column):
+        # One uint64 per row, ascending in sort order with ties in row order: the value's 32-bit sort
+        # key above the row position. None for columns that do not fit in 32 bits.
+        values = self._sort_values(column)
+        if values.dtype == "float32":
+            high = orderable(values.to_numpy())
+        elif values.dtype.kind in "iu" and (len(values) == 0 or -2**31 <= values.min() and values.max() < 2**31):
+            high = (values.to_numpy().astype("int64") + 2**31).astype("uint32")
+        else:
+            return None
+        return (high.astype("uint64") << np.uint64(32)) | np.arange(len(values), dtype="uint64")
+
+    def sort_index(self, column):
+        # Row positions of the full frame in ascending order of column, computed once per column.
+        with self._lock:
+            if column not in self._sort_indexes:
+                self._sort_indexes[column] = self._sort_values(column).sort_values(kind="stable").index.to_numpy()
+            return self._sort_indexes[column]
+
+    def search(self, row_ids, text):
+        if not text:
+            return row_ids
+        text = text.lower()
+        matches = np.zeros(len(row_ids), dtype=bool)
+        for column in SEARCH_COLUMNS:
+            if column in ID_COLUMNS and ID_COLUMN in self.df:
+                values = derive_ids(column, self.df[ID_COLUMN].to_numpy()[row_ids]).str.lower()
+            else:
+                values = self.df[column].take(row_ids).astype("string").str.lower()
+            matches |= values.str.contains(text, regex=False).fillna(False).to_numpy()
+        return row_ids[matches]
+
+    def order(self, row_ids, sort_by=None, ascending=True):
+        if sort_by is None:
+            return row_ids
+        member = np.zeros(len(self.df), dtype=bool)
+        member[row_ids] = True
+        index = self.sort_index(sort_by)
+        ordered = index[member[index]]
+        return ordered if ascending else ordered[::-1]
+
+    def rows(self, row_ids, sort_by=None, ascending=True, search=None):
+        return self.order(self.search(row_ids, search), sort_by, ascending)
+
+    def page(self, rows, page=1, page_size=50, columns=None):
+        start = (page - 1) * page_size
+        return take_columns(self.df, rows[start:start + page_size], list(columns or logical_columns(self.df)))
+
+
+class RowSet:
+    # Ordered row positions for one table state; pages are materialized on demand, under `lock`
+    # when the frame can change underneath them.
+
+    def __init__(self, view, rows, lock=None):
+        self.view = view
+        self.rows = rows
+        self.total = len(rows)
+        self.lock = lock or contextlib.nullcontext()
+
+    def page(self, page=1, page_size=50, columns=None):
+        with self.lock:
+            return self.view.page(self.rows, page, page_size, columns)
+
+
+def render_table(backend, selection, key="table"):
+    columns = list(backend.columns)
+    controls = st.columns([3, 2, 1, 1, 1])
+    search = controls[0].text_input("Search name, email or ID", key=f"{key}_search")
+    sort_by = controls[1].selectbox("Sort by", [None, *columns], key=f"{key}_sort")
+    ascending = controls[2].radio("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Ascending"
+    page_size = controls[3].selectbox("Rows", PAGE_SIZES, index=1, key=f"{key}_size")
+    shown = st.multiselect("Columns", columns, default=columns, key=f"{key}_columns")
+
+    with span("table rows"):
+        rows = backend.table_rows(selection, sort_by, ascending, search)
+    pages = max(1, math.ceil(rows.total / page_size))
+    page = controls[4].number_input("Page", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+
+    with span("table page"):
+        frame = rows.page(page, page_size, shown or columns)
+        count("bytes_sent", int(frame.memory_usage(deep=True).sum()))
+        st.dataframe(frame)
+    start = (page - 1) * page_size
+    st.caption(f"Rows {min(start + 1, rows.total)}-{start + len(frame)} of {rows.total} · page {page} of {pages}")